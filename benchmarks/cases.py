@@ -0,0 +1,269 @@
+# benchmarks/cases.py
+"""Benchmark cases. Imported by benchmarks.run after MINIRDBMS_DATA_DIR is set."""
+import os
+import csv
+import random
+import time
+import asyncio
+
+from rdbms.parser import parse
+from rdbms.executor import Executor
+from rdbms.index import Index
+from rdbms.fileio import DATA_DIR
+from rdbms.asyncexecutor import AsyncExecutor
+from benchmarks import datagen
+
+
+def bulk_load(ex, table, rows):
+    """Append rows straight to storage and write each index once at the end."""
+    ts = ex.catalog.get_table(table)
+    built = {col: Index(table, col)._load() for col in ts.indexed}
+    count = 0
+    for row in rows:
+        i = ex.storage.insert(table, row)
+        for col, entries in built.items():
+            entries.setdefault(str(row.get(col)), []).append(str(i))
+        count += 1
+    for col, entries in built.items():
+        Index(table, col)._save(entries)
+    return count
+
+
+class Bench:
+    def __init__(self, n, ops, seed=0):
+        self.n = n
+        self.ops = ops
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.sizes = datagen.tier_sizes(n)
+        self.ex = Executor()
+
+    def setup(self):
+        self.ex.drop_all_tables()
+        for sql in datagen.SCHEMA:
+            res = self.ex.execute(parse(sql))
+            if not res["ok"]:
+                raise RuntimeError(res["error"])
+        for table, rows in datagen.dataset(self.n, seed=self.seed).items():
+            self.sizes[table] = bulk_load(self.ex, table, rows)
+
+    def teardown(self):
+        self.ex.drop_all_tables()
+
+    def run_sql(self, sql):
+        res = self.ex.execute(parse(sql))
+        if not res["ok"]:
+            raise RuntimeError(f"{sql}: {res['error']}")
+        return res["result"]
+
+    def pick(self, table):
+        return self.rng.randint(1, self.sizes[table])
+
+
+def _timed(ops, fn):
+    latencies = []
+    for i in range(ops):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+# -----------------------------
+# Cases: fn(bench, ops) -> per-op latencies in seconds
+# -----------------------------
+PARSE_MIX = [
+    "INSERT INTO users (id, name, email) VALUES (12345, 'O''Brien', 'obrien@example.com');",
+    "SELECT * FROM users WHERE id=42;",
+    "UPDATE users SET name='Alice', email='alice@example.com' WHERE id=1;",
+    "DELETE FROM tickets WHERE id=7;",
+    "SELECT events.title, orders.user_id FROM events INNER JOIN orders ON events.id = orders.event_id;",
+    "CREATE TABLE t (id INTEGER PRIMARY KEY, a TEXT UNIQUE, b INTEGER REFERENCES users(id), UNIQUE(a, b));",
+]
+
+def case_parse(bench, ops):
+    return _timed(ops * 10, lambda i: parse(PARSE_MIX[i % len(PARSE_MIX)]))
+
+def case_parse_bulk_insert(bench, ops):
+    # One ~50 KB INSERT with 2000 quoted values
+    cols = ", ".join(f"c{i}" for i in range(2000))
+    vals = ", ".join(f"'value ''{i}'' here'" for i in range(2000))
+    sql = f"INSERT INTO t ({cols}) VALUES ({vals});"
+    return _timed(max(1, ops // 10), lambda i: parse(sql))
+
+def case_insert_single(bench, ops):
+    start = bench.sizes["users"] + 1
+    def op(i):
+        bench.run_sql(datagen.insert_sql("users", next(datagen.users(1, start=start + i))))
+    latencies = _timed(ops, op)
+    bench.sizes["users"] += ops
+    return latencies
+
+def case_insert_bulk(bench, ops):
+    # One op = one batch of 100 rows loaded through the bulk path
+    start = bench.sizes["events"] + 1
+    batches = max(1, ops // 10)
+    def op(i):
+        bulk_load(bench.ex, "events", datagen.events(100, seed=i, start=start + i * 100))
+    latencies = _timed(batches, op)
+    bench.sizes["events"] += batches * 100
+    return latencies
+
+# Rows in the file each import_csv op loads
+IMPORT_ROWS = 10_000
+
+def case_import_csv(bench, ops):
+    # One op = one CSV file of IMPORT_ROWS new users through the streaming import
+    path = os.path.join(DATA_DIR, "bench_import.csv")
+    latencies = []
+    for i in range(max(1, ops // 100)):
+        start = bench.sizes["users"] + 1
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name", "email"])
+            writer.writerows([r["id"], r["name"], r["email"]] for r in datagen.users(IMPORT_ROWS, start=start))
+        latencies.extend(_timed(1, lambda i: bench.ex.import_file(path, "users")))
+        bench.sizes["users"] += IMPORT_ROWS
+    os.remove(path)
+    return latencies
+
+def case_point_select(bench, ops):
+    return _timed(ops, lambda i: bench.run_sql(f"SELECT * FROM users WHERE id={bench.pick('users')};"))
+
+def case_point_select_prepared(bench, ops):
+    stmt = bench.ex.prepare("SELECT * FROM users WHERE id=?;")
+    return _timed(ops, lambda i: stmt.execute([bench.pick("users")]))
+
+# Point selects awaited together per async_point_select op
+ASYNC_CONCURRENCY = 50
+
+def case_async_point_select(bench, ops):
+    # What an async web handler sees: many lightweight queries in flight on one event loop
+    checkpoint_every = bench.ex.checkpoint_every
+    db = AsyncExecutor(bench.ex)
+
+    async def run():
+        latencies = []
+        for _ in range(max(1, ops // ASYNC_CONCURRENCY)):
+            t0 = time.perf_counter()
+            await asyncio.gather(*(db.execute(f"SELECT * FROM users WHERE id={bench.pick('users')};")
+                                   for _ in range(ASYNC_CONCURRENCY)))
+            latencies.append(time.perf_counter() - t0)
+        await db.close()
+        return latencies
+    try:
+        return asyncio.run(run())
+    finally:
+        bench.ex.checkpoint_every = checkpoint_every
+
+def case_indexed_select(bench, ops):
+    # orders.user_id is indexed because it is a foreign key
+    return _timed(ops, lambda i: bench.run_sql(f"SELECT * FROM orders WHERE user_id={bench.pick('users')};"))
+
+def case_covered_select(bench, ops):
+    # The same lookup by name, answered from a covering index without reading users
+    bench.run_sql("CREATE INDEX users_by_name ON users (name) INCLUDE (id, email);")
+    try:
+        return _timed(ops, lambda i: bench.run_sql(f"SELECT * FROM users WHERE name='user{bench.pick('users')}';"))
+    finally:
+        bench.run_sql("DROP INDEX users_by_name;")
+
+def case_name_select(bench, ops):
+    return _timed(ops, lambda i: bench.run_sql(f"SELECT * FROM users WHERE name='user{bench.pick('users')}';"))
+
+def case_in_list_select(bench, ops):
+    # The 20 users an orders page refers to, in one statement
+    return _timed(max(1, ops // 10), lambda i: bench.run_sql(
+        f"SELECT * FROM users WHERE id IN ({', '.join(str(bench.pick('users')) for _ in range(20))});"))
+
+def case_scan_select(bench, ops):
+    # tickets.buyer_name has no index, so every lookup is a full scan
+    return _timed(max(1, ops // 10), lambda i: bench.run_sql(
+        f"SELECT * FROM tickets WHERE buyer_name='user{bench.pick('users')}';"))
+
+def case_projected_scan(bench, ops):
+    # The scan_select filter, copying out two columns instead of whole rows
+    return _timed(max(1, ops // 10), lambda i: bench.run_sql(
+        f"SELECT id, event_id FROM tickets WHERE buyer_name='user{bench.pick('users')}';"))
+
+def case_join(bench, ops):
+    return _timed(max(1, ops // 100), lambda i: bench.run_sql(
+        "SELECT events.title, tickets.buyer_name FROM events "
+        f"INNER JOIN tickets ON events.id = tickets.event_id WHERE events.id={bench.pick('events')};"))
+
+def case_join_3way(bench, ops):
+    # One user's orders with event titles: the filtered side should drive index lookups
+    return _timed(max(1, ops // 10), lambda i: bench.run_sql(
+        "SELECT orders.id, users.name, events.title FROM orders "
+        "JOIN users ON orders.user_id = users.id JOIN events ON orders.event_id = events.id "
+        f"WHERE users.id={bench.pick('users')};"))
+
+def case_update(bench, ops):
+    return _timed(max(1, ops // 10), lambda i: bench.run_sql(
+        f"UPDATE users SET email='changed{i}@example.com' WHERE id={bench.pick('users')};"))
+
+def case_delete(bench, ops):
+    # Delete from the top so ids stay dense for the other cases
+    top = bench.sizes["tickets"]
+    latencies = _timed(max(1, ops // 10), lambda i: bench.run_sql(f"DELETE FROM tickets WHERE id={top - i};"))
+    bench.sizes["tickets"] -= len(latencies)
+    return latencies
+
+def case_webapp_orders_page(bench, ops):
+    # What GET /orders asks the engine for
+    def op(i):
+        bench.run_sql("SELECT orders.id, users.name, events.title FROM orders "
+                      "JOIN users ON orders.user_id = users.id JOIN events ON orders.event_id = events.id;")
+        bench.run_sql("SELECT * FROM events;")
+        bench.run_sql("SELECT * FROM users;")
+    return _timed(max(1, ops // 20), op)
+
+
+def case_view_orders_page(bench, ops):
+    # webapp_orders_page with the join kept in a materialized view (creation is not timed)
+    bench.run_sql("CREATE MATERIALIZED VIEW order_rows AS SELECT orders.id, users.name, events.title FROM orders "
+                  "JOIN users ON orders.user_id = users.id JOIN events ON orders.event_id = events.id;")
+    def op(i):
+        bench.run_sql("SELECT * FROM order_rows;")
+        bench.run_sql("SELECT * FROM events;")
+        bench.run_sql("SELECT * FROM users;")
+    try:
+        return _timed(max(1, ops // 20), op)
+    finally:
+        bench.run_sql("DROP MATERIALIZED VIEW order_rows;")
+
+
+def case_cached_listing(bench, ops):
+    # The events dropdown with the result cache on: only the first op reads the table
+    bench.ex.set_result_cache(64 << 20)
+    try:
+        # SQL text, not a parsed AST: results are cached by statement text
+        return _timed(ops, lambda i: bench.ex.execute("SELECT * FROM events;"))
+    finally:
+        bench.ex.set_result_cache(None)
+
+
+# Order matters: mutating cases run after the read-only ones
+CASES = {
+    "parse": case_parse,
+    "parse_bulk_insert": case_parse_bulk_insert,
+    "point_select": case_point_select,
+    "point_select_prepared": case_point_select_prepared,
+    "async_point_select": case_async_point_select,
+    "indexed_select": case_indexed_select,
+    "name_select": case_name_select,
+    "covered_select": case_covered_select,
+    "in_list_select": case_in_list_select,
+    "scan_select": case_scan_select,
+    "projected_scan": case_projected_scan,
+    "join": case_join,
+    "join_3way": case_join_3way,
+    "webapp_orders_page": case_webapp_orders_page,
+    "view_orders_page": case_view_orders_page,
+    "cached_listing": case_cached_listing,
+    "import_csv": case_import_csv,
+    "insert_single": case_insert_single,
+    "insert_bulk": case_insert_bulk,
+    "update": case_update,
+    "delete": case_delete,
+}
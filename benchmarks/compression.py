@@ -0,0 +1,102 @@
+# benchmarks/compression.py
+"""Size vs scan speed of each block codec against plain JSON lines.
+
+    python -m benchmarks.compression                  # 10k rows, every codec
+    python -m benchmarks.compression --rows 100k --fetches 500 --out codecs.json
+
+Loads the same synthetic `users` rows once per layout and reports the
+bytes on disk, full-scan (read_all) time and point-fetch time.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from benchmarks.run import parse_tier
+from benchmarks.datagen import users
+
+COLUMNS = ["id", "name", "email"]
+
+
+def _on_disk(paths):
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def measure(storage, table, rows, fetches, scans, seed=0):
+    for row in users(rows):
+        storage.insert(table, row)
+    paths = storage.files(table)
+
+    t0 = time.perf_counter()
+    for _ in range(scans):
+        count = len(storage.read_all(table))
+    scan_ms = (time.perf_counter() - t0) * 1000 / scans
+
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    for _ in range(fetches):
+        storage.fetch(table, [rng.randrange(rows)])
+    fetch_ms = (time.perf_counter() - t0) * 1000 / fetches
+
+    assert count == rows
+    return {
+        "bytes": _on_disk(paths),
+        "scan_ms": round(scan_ms, 3),
+        "rows_per_sec": round(rows / (scan_ms / 1000), 1) if scan_ms else None,
+        "fetch_ms": round(fetch_ms, 4),
+    }
+
+
+def run(rows, fetches, scans, block_rows):
+    # Import lazily: engine modules read MINIRDBMS_DATA_DIR at import time
+    from rdbms.storage import Storage
+    from rdbms.blocks import storage_options
+    from rdbms.codecs import available_codecs
+
+    storage = Storage()
+    results = {"jsonl": measure(storage, "bench_jsonl", rows, fetches, scans)}
+    for codec in available_codecs():
+        table = f"bench_{codec}"
+        storage.create_table(table, COLUMNS, storage_options({"compression": codec, "block_rows": block_rows}))
+        results[codec] = measure(storage, table, rows, fetches, scans)
+
+    base = results["jsonl"]["bytes"]
+    for name, r in results.items():
+        r["ratio"] = round(base / r["bytes"], 2) if r["bytes"] else None
+        print(f"{name:<8} {r['bytes']:>12,} B  x{r['ratio'] or 0:<5}  scan {r['scan_ms']:>9.2f} ms  "
+              f"fetch {r['fetch_ms']:>7.3f} ms", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Block codec size/speed benchmark")
+    parser.add_argument("--rows", default="10k", help="rows per table, e.g. 10k or 1M")
+    parser.add_argument("--fetches", type=int, default=200, help="point fetches per codec")
+    parser.add_argument("--scans", type=int, default=3, help="full scans per codec (averaged)")
+    parser.add_argument("--block-rows", type=int, default=1024)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="minirdbms-codecs-")
+    os.environ["MINIRDBMS_DATA_DIR"] = data_dir
+    rows = parse_tier(args.rows)
+    try:
+        results = run(rows, args.fetches, args.scans, args.block_rows)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    text = json.dumps({"rows": rows, "block_rows": args.block_rows, "codecs": results}, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
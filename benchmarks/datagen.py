@@ -0,0 +1,84 @@
+# benchmarks/datagen.py
+"""Deterministic synthetic data shaped like the webapp schema."""
+import random
+from datetime import date, timedelta
+
+# Mirrors init_schema() in webapp/app.py
+SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, email TEXT);",
+    "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, date DATE);",
+    "CREATE TABLE tickets (id INTEGER PRIMARY KEY, event_id INTEGER REFERENCES events(id) ON DELETE CASCADE, "
+    "buyer_name TEXT, UNIQUE(event_id, buyer_name));",
+    "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id) ON DELETE CASCADE, "
+    "event_id INTEGER REFERENCES events(id) ON DELETE CASCADE, UNIQUE(user_id, event_id));",
+]
+
+TABLES = ["users", "events", "tickets", "orders"]
+
+WORDS = ["Tech", "Music", "Food", "Art", "Film", "Book", "Code", "Jazz", "Data", "Game"]
+KINDS = ["Meetup", "Festival", "Fair", "Night", "Summit", "Workshop", "Expo", "Gala"]
+
+
+def tier_sizes(n):
+    """Row counts per table for a tier of `n` rows."""
+    return {"users": n, "events": max(1, n // 10), "tickets": n, "orders": n}
+
+
+def users(n, start=1):
+    for i in range(start, start + n):
+        yield {"id": str(i), "name": f"user{i}", "email": f"user{i}@example.com"}
+
+
+def events(n, seed=0, start=1):
+    rng = random.Random(seed)
+    base = date(2026, 1, 1)
+    for i in range(start, start + n):
+        title = f"{rng.choice(WORDS)} {rng.choice(KINDS)} {i}"
+        day = base + timedelta(days=rng.randrange(730))
+        yield {"id": str(i), "title": title, "date": day.isoformat()}
+
+
+def _distinct_pairs(n, left, right, seed):
+    # (left, right) pairs unique across the table, as the composite UNIQUEs require
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < n:
+        pair = (rng.randint(1, left), rng.randint(1, right))
+        if pair not in seen:
+            seen.add(pair)
+            yield pair
+
+
+def tickets(n, n_events, n_users, seed=1):
+    n = min(n, n_events * n_users)
+    for i, (event_id, buyer) in enumerate(_distinct_pairs(n, n_events, n_users, seed), start=1):
+        yield {"id": str(i), "event_id": str(event_id), "buyer_name": f"user{buyer}"}
+
+
+def orders(n, n_users, n_events, seed=2):
+    n = min(n, n_users * n_events)
+    for i, (user_id, event_id) in enumerate(_distinct_pairs(n, n_users, n_events, seed), start=1):
+        yield {"id": str(i), "user_id": str(user_id), "event_id": str(event_id)}
+
+
+def dataset(n, seed=0):
+    """Rows for every table at tier size `n`, in FK-safe load order."""
+    sizes = tier_sizes(n)
+    return {
+        "users": users(sizes["users"]),
+        "events": events(sizes["events"], seed=seed),
+        "tickets": tickets(sizes["tickets"], sizes["events"], sizes["users"], seed=seed + 1),
+        "orders": orders(sizes["orders"], sizes["users"], sizes["events"], seed=seed + 2),
+    }
+
+
+def _sql_literal(value):
+    if value.isdigit():
+        return value
+    return "'" + value.replace("'", "''") + "'"
+
+
+def insert_sql(table, row):
+    cols = ", ".join(row)
+    vals = ", ".join(_sql_literal(v) for v in row.values())
+    return f"INSERT INTO {table} ({cols}) VALUES ({vals});"
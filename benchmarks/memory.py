@@ -0,0 +1,88 @@
+# benchmarks/memory.py
+"""Bytes per row held in memory: row dicts vs Records (rdbms/rows.py).
+
+    python -m benchmarks.memory                  # 100k rows
+    python -m benchmarks.memory --rows 1M --out memory.json
+
+Loads synthetic `users` rows into a JSON-lines and a block table, then
+measures with tracemalloc what a full read_all() keeps alive once it
+returns: plain dicts, as the executor used to hold them, and Records over
+the table's columns, as it does now. Values are the same strings either
+way, so the difference is the per-row container and key overhead.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+from benchmarks.run import parse_tier
+from benchmarks.compression import COLUMNS
+from benchmarks.datagen import users
+
+
+def held(read):
+    """(bytes per row still allocated after read() returns, rows, seconds)."""
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        rows = read()
+        seconds = time.perf_counter() - t0
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size / max(1, len(rows)), len(rows), seconds
+
+
+def run(rows):
+    # Import lazily: engine modules read MINIRDBMS_DATA_DIR at import time
+    from rdbms.storage import Storage
+    from rdbms.blocks import storage_options
+
+    storage = Storage()
+    storage.create_table("bench_blocks", COLUMNS, storage_options({"compression": "none"}))
+    for table in ("bench_jsonl", "bench_blocks"):
+        for row in users(rows):
+            storage.insert(table, row)
+
+    results = {}
+    for table in ("bench_jsonl", "bench_blocks"):
+        layout = table.split("_")[1]
+        for kind, columns in (("dicts", None), ("records", COLUMNS)):
+            per_row, count, seconds = held(lambda: storage.read_all(table, columns))
+            assert count == rows
+            results[f"{layout}_{kind}"] = {"bytes_per_row": round(per_row, 1), "scan_ms": round(seconds * 1000, 2)}
+        saved = results[f"{layout}_dicts"]["bytes_per_row"] - results[f"{layout}_records"]["bytes_per_row"]
+        print(f"{layout:<7} dicts {results[f'{layout}_dicts']['bytes_per_row']:>7.1f} B/row  "
+              f"records {results[f'{layout}_records']['bytes_per_row']:>7.1f} B/row  (-{saved:.1f})", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Row memory benchmark")
+    parser.add_argument("--rows", default="100k", help="rows per table, e.g. 10k or 1M")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="minirdbms-memory-")
+    os.environ["MINIRDBMS_DATA_DIR"] = data_dir
+    rows = parse_tier(args.rows)
+    try:
+        results = run(rows)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    text = json.dumps({"rows": rows, "layouts": results}, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# benchmarks/run.py
+"""Run the benchmark suite against a throwaway data directory.
+
+    python -m benchmarks.run                             # 1k and 10k tiers
+    python -m benchmarks.run --tiers 1k,100k --ops 500 --out results.json
+    python -m benchmarks.run --compare baseline.json     # exit 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+
+DEFAULT_TIERS = "1k,10k"
+ROWS_PER_OP = {"insert_bulk": 100, "async_point_select": 50, "import_csv": 10_000}
+
+
+def parse_tier(tier):
+    tier = tier.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(tier[-1:], 1)
+    return int(float(tier[:-1] if scale > 1 else tier) * scale)
+
+
+def summarize(case, latencies):
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    summary = {
+        "ops": len(latencies),
+        "seconds": round(total, 6),
+        "ops_per_sec": round(len(latencies) / total, 2) if total else None,
+        "p50_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+    if case in ROWS_PER_OP and total:
+        summary["rows_per_sec"] = round(len(latencies) * ROWS_PER_OP[case] / total, 2)
+    return summary
+
+
+def run(tiers, ops, selected, seed=0):
+    # Import lazily: engine modules read MINIRDBMS_DATA_DIR at import time
+    from benchmarks.cases import Bench, CASES
+    logging.getLogger("rdbms.executor").setLevel(logging.ERROR)
+
+    results = {}
+    for tier in tiers:
+        n = parse_tier(tier)
+        bench = Bench(n, ops, seed=seed)
+        t0 = time.perf_counter()
+        bench.setup()
+        load_seconds = time.perf_counter() - t0
+        tier_results = {"rows": n, "load_seconds": round(load_seconds, 3), "cases": {}}
+        print(f"[{tier}] loaded {n} rows/table in {load_seconds:.2f}s", file=sys.stderr)
+        for name, case in CASES.items():
+            if selected and name not in selected:
+                continue
+            summary = summarize(name, case(bench, ops))
+            tier_results["cases"][name] = summary
+            print(f"[{tier}] {name:<20} {summary['ops_per_sec'] or 0:>12.1f} ops/s  "
+                  f"p50 {summary['p50_ms']:.3f} ms  p95 {summary['p95_ms']:.3f} ms", file=sys.stderr)
+        bench.teardown()
+        results[tier] = tier_results
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Return (lines, regressions) comparing ops/sec per tier and case."""
+    lines, regressions = [], []
+    for tier, tier_results in current["results"].items():
+        base_cases = baseline.get("results", {}).get(tier, {}).get("cases", {})
+        for name, summary in tier_results["cases"].items():
+            base = base_cases.get(name)
+            if not base or not base.get("ops_per_sec") or not summary.get("ops_per_sec"):
+                continue
+            ratio = summary["ops_per_sec"] / base["ops_per_sec"]
+            flag = ""
+            if ratio < 1 - threshold:
+                flag = "REGRESSION"
+                regressions.append((tier, name, ratio))
+            elif ratio > 1 + threshold:
+                flag = "faster"
+            lines.append(f"{tier:>6} {name:<20} {base['ops_per_sec']:>12.1f} -> "
+                         f"{summary['ops_per_sec']:>12.1f} ops/s  x{ratio:.2f} {flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MiniRDBMS benchmark suite")
+    parser.add_argument("--tiers", default=DEFAULT_TIERS, help="comma-separated sizes, e.g. 1k,10k,100k,1M")
+    parser.add_argument("--ops", type=int, default=200, help="operations per case (scans/joins run fewer)")
+    parser.add_argument("--cases", default="", help="comma-separated subset of cases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts as a regression")
+    parser.add_argument("--data-dir", help="data directory to use (default: a temporary one)")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="minirdbms-bench-")
+    os.environ["MINIRDBMS_DATA_DIR"] = data_dir
+
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    selected = {c.strip() for c in args.cases.split(",") if c.strip()}
+    try:
+        results = run(tiers, args.ops, selected, seed=args.seed)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ops": args.ops,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(report, baseline, args.threshold)
+        print("\n".join(lines), file=sys.stderr)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
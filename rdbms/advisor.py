@@ -0,0 +1,204 @@
+# rdbms/advisor.py
+"""Workload-driven index advice.
+
+    ADVISE INDEXES;                     candidates ranked by estimated savings (.advise in the REPL)
+    ADVISE INDEXES APPLY;               ...and create them
+    MINIRDBMS_AUTO_INDEX_BYTES=67108864     create them as the workload runs, within ~64 MB
+    executor.set_auto_index(64 << 20)       the same at runtime; None turns it off
+
+The executor records every query that scans for an AND-ed `=` / IN filter
+on a column without an index (Workload.record): the rows the scan read,
+the index lookups that would have replaced it and the rows that matched.
+Joins that read a table in full on a join column without an index are
+recorded likewise, from the join optimizer's estimates. With an index,
+those rows would have cost about INDEX_LOOKUP_COST rows per lookup plus
+the matches, so each recorded scan would have saved
+
+    rows scanned - (INDEX_LOOKUP_COST * lookups + rows matched)
+
+rows. A candidate's savings add these up, less INDEX_LOOKUP_COST per
+write to its table (the index has to be kept up to date), and its size
+is estimated from the column's current values. Candidates are created as
+USING HASH indexes named auto_<table>_<column>, so index upkeep stays a
+page write or two per row changed.
+
+Automatic mode looks for candidates once the savings recorded since the
+last look reach min_savings rows, between statements like auto-vacuum
+(AsyncExecutor runs it as a background task that waits for the tables to
+be quiet), and creates those saving at least min_savings rows, best first,
+while the auto_ indexes fit in the byte budget. A scan credits every
+unindexed column it filters on, so two candidates may claim the same scan;
+once one is created the other stops collecting evidence for those queries.
+"""
+import os
+import json
+import threading
+
+from rdbms.index import index_file, hash_index_size
+from rdbms.joins import INDEX_LOOKUP_COST
+from rdbms.expressions import conjuncts, is_condition
+
+AUTO_PREFIX = "auto_"
+# Rows a candidate must save before automatic mode creates it
+AUTO_MIN_SAVINGS = 100_000
+
+
+class Workload:
+    """Thread-safe tallies of unindexed scans per (table, column) and writes per table."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._columns = {}  # (table, column) -> counters
+            self._writes = {}
+            self.pending = 0  # rows saved by candidates since automatic mode last looked
+
+    def record(self, table, columns, kind, scanned, matched):
+        """A scan of `scanned` rows (`matched` of them kept) that an index on
+        any of `columns` ({column: lookups}) would have answered; `kind` is
+        "filter" or "join"."""
+        with self._lock:
+            for col, lookups in columns.items():
+                entry = self._columns.get((table, col))
+                if entry is None:
+                    entry = self._columns[(table, col)] = {
+                        "filter": 0, "join": 0, "rows_scanned": 0, "lookups": 0, "rows_matched": 0}
+                entry[kind] += 1
+                entry["rows_scanned"] += scanned
+                entry["lookups"] += lookups
+                entry["rows_matched"] += matched
+                self.pending += max(0, scanned - INDEX_LOOKUP_COST * lookups - matched)
+
+    def record_write(self, table):
+        with self._lock:
+            self._writes[table] = self._writes.get(table, 0) + 1
+
+    def forget(self, table, column=None):
+        """Drop what was recorded for a column (or a whole table)."""
+        with self._lock:
+            for key in [k for k in self._columns if k[0] == table and column in (None, k[1])]:
+                del self._columns[key]
+            if column is None:
+                self._writes.pop(table, None)
+
+    def take_pending(self):
+        with self._lock:
+            pending, self.pending = self.pending, 0
+            return pending
+
+    def snapshot(self):
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._columns.items()}, dict(self._writes)
+
+
+class AutoIndex:
+    """Automatic mode settings: the bytes auto_ indexes may take and the rows a
+    candidate must save."""
+
+    def __init__(self, budget_bytes, min_savings=AUTO_MIN_SAVINGS):
+        self.budget = int(budget_bytes)
+        self.min_savings = min_savings
+
+    @classmethod
+    def from_env(cls):
+        budget = os.environ.get("MINIRDBMS_AUTO_INDEX_BYTES")
+        if not budget or int(budget) <= 0:
+            return None
+        return cls(budget)
+
+    def due(self, workload):
+        return workload.pending >= self.min_savings
+
+
+def unindexed_filters(ts, condition, segments=1):
+    """{column: index lookups} for the AND-ed `=` / IN filters of `condition` on
+    columns of table `ts` that have no index, probed in `segments` segments."""
+    if ts.view:
+        return {}
+    found = {}
+    for part in conjuncts(condition):
+        if not is_condition(part) or part["column"] in ts.indexed or part.get("op", "=") not in ("=", "in"):
+            continue
+        values = len(part["values"]) if part.get("op") == "in" else 1
+        found[part["column"]] = found.get(part["column"], 0) + values * segments
+    return found
+
+
+def advise(executor, min_savings=1):
+    """Candidate indexes saving at least `min_savings` rows, best first:
+    [{"table", "column", "filter_scans", "join_scans", "rows_scanned", "writes",
+    "estimated_savings", "estimated_bytes", "sql"}]."""
+    usage, writes = executor.workload.snapshot()
+    candidates = []
+    for (table, col), entry in usage.items():
+        ts = executor.catalog.get_table(table)
+        if ts is None or not ts.has_column(col) or col in ts.indexed:
+            executor.workload.forget(table, col)
+            continue
+        saved = entry["rows_scanned"] - INDEX_LOOKUP_COST * entry["lookups"] - entry["rows_matched"]
+        saved -= INDEX_LOOKUP_COST * writes.get(table, 0)
+        if saved < min_savings:
+            continue
+        candidates.append({
+            "table": table, "column": col,
+            "filter_scans": entry["filter"], "join_scans": entry["join"],
+            "rows_scanned": entry["rows_scanned"], "writes": writes.get(table, 0),
+            "estimated_savings": saved, "estimated_bytes": _estimate_bytes(executor, ts, col),
+            "sql": f"CREATE INDEX {index_name(table, col)} ON {table} USING HASH ({col});",
+        })
+    candidates.sort(key=lambda c: (-c["estimated_savings"], c["estimated_bytes"], c["table"], c["column"]))
+    return candidates
+
+
+def apply(executor, candidates, budget=None):
+    """Create the candidates in order while auto_ indexes fit in `budget` bytes
+    (no limit if None); marks each with "created". Returns the new index names."""
+    used = auto_index_bytes(executor)
+    created = []
+    for cand in candidates:
+        fits = budget is None or used + cand["estimated_bytes"] <= budget
+        cand["created"] = fits
+        if not fits:
+            continue
+        name = index_name(cand["table"], cand["column"])
+        executor._create_index({"index": name, "table": cand["table"], "column": cand["column"],
+                                "include": [], "using": "hash"})
+        executor.workload.forget(cand["table"], cand["column"])
+        used += auto_index_bytes(executor, cand["table"], cand["column"])
+        created.append(name)
+    return created
+
+
+def index_name(table, column):
+    return f"{AUTO_PREFIX}{table}_{column}"
+
+
+def auto_index_bytes(executor, table=None, column=None):
+    """Bytes on disk of the auto_ indexes (or of the one on `table`.`column`)."""
+    total = 0
+    for name in executor.catalog.list_tables():
+        ts = executor.catalog.get_table(name)
+        for index, spec in ts.indexes.items():
+            if not index.startswith(AUTO_PREFIX) or table not in (None, name) or column not in (None, spec["column"]):
+                continue
+            for segment in ts.segments:
+                path = index_file(segment, spec["column"], spec["column"] in ts.hashed)
+                if os.path.exists(path):
+                    total += os.path.getsize(path)
+    return total
+
+
+def _estimate_bytes(executor, ts, col):
+    """Size of a hash index on `col` built from the column's current values."""
+    total = 0
+    for segment in ts.segments:
+        keys, payload = set(), 0
+        for row_id, row in executor.storage.scan(segment, columns=[col]):
+            keys.add(str(row.get(col)))
+            payload += len(str(row_id)) + 3
+        payload += sum(len(json.dumps(key)) + 3 for key in keys)
+        total += hash_index_size(payload)
+    return total
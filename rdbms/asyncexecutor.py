@@ -0,0 +1,207 @@
+# rdbms/asyncexecutor.py
+"""asyncio front end to an Executor for embedding in async web stacks.
+
+    db = AsyncExecutor(workers=8)
+    res = await db.execute("SELECT * FROM users WHERE id=?;", [1])
+    async for row in db.stream("SELECT * FROM events;"):
+        ...
+    await db.close()
+
+Statements run on a bounded pool of worker threads, so file I/O never
+blocks the event loop. Before a statement is handed to the pool it takes
+per-table readers-writer locks for every table it can touch (see
+footprint()): reads of a table run side by side, writes to it queue up
+one at a time, and statements on unrelated tables do not wait for each
+other. Waiting for a lock is just a suspended coroutine, so thousands of
+queries can be in flight on one loop. DDL, VACUUM of every table and
+checkpoints wait until nothing else is running, and so does automatic
+indexing (see rdbms.advisor), which runs as a background task once the
+workload calls for it instead of after the statement that tipped it.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from rdbms.executor import Executor, WRITE_ACTIONS
+from rdbms.advisor import AUTO_MIN_SAVINGS
+from rdbms.prepared import PreparedStatement
+
+DEFAULT_WORKERS = 8
+# Rows handed out by stream() between yields to the event loop
+STREAM_BATCH = 500
+
+
+def footprint(catalog, ast):
+    """(tables read, tables written) by a statement AST, or None when it needs
+    the whole database to itself (DDL, VACUUM of every table, anything unknown)."""
+    action = ast.get("action")
+    if action == "select":
+        return {ast["table"]}, set()
+    if action == "select_join":
+        return set(ast["tables"]), set()
+    if action == "refresh_view":
+        ts = catalog.get_table(ast["view"])
+        return set(ts.view["query"]["tables"]) if ts is not None and ts.view else set(), {ast["view"]}
+    if action not in ("insert", "update", "delete") and not (action == "vacuum" and ast.get("table")):
+        return None
+
+    # Foreign keys are probed in both directions, deletes cascade, and
+    # materialized views over a written table are written too
+    reads, writes = set(), {ast["table"]}
+    pending = [ast["table"]]
+    while pending:
+        ts = catalog.get_table(pending.pop())
+        if ts is None:
+            continue
+        reads.update(ref["table"] for _, ref in ts.foreign_keys)
+        for child, _, ref in catalog.get_references_to(ts.name):
+            reads.add(child)
+            if action == "delete" and ref["on_delete"] == "cascade" and child not in writes:
+                writes.add(child)
+                pending.append(child)
+        for view in catalog.get_views_on(ts.name):
+            writes.add(view)
+            reads.update(catalog.get_table(view).view["query"]["tables"])
+    return reads - writes, writes
+
+
+class RWLock:
+    """asyncio readers-writer lock. Writers queue in arrival order, and readers
+    arriving while a writer waits queue behind it, so reads cannot starve writes."""
+
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    async def acquire(self, write=False):
+        async with self._cond:
+            if not write:
+                await self._cond.wait_for(lambda: not self._writer and not self._waiting_writers)
+                self._readers += 1
+                return
+            self._waiting_writers += 1
+            try:
+                await self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    async def release(self, write=False):
+        async with self._cond:
+            if write:
+                self._writer = False
+            else:
+                self._readers -= 1
+            self._cond.notify_all()
+
+
+class AsyncExecutor:
+    def __init__(self, executor=None, workers=DEFAULT_WORKERS, checkpoint_every=None):
+        self.executor = executor or Executor()
+        # Checkpoints need every table quiet, so they are scheduled here rather than by statements
+        self.checkpoint_every = self.executor.checkpoint_every if checkpoint_every is None else checkpoint_every
+        self.executor.checkpoint_every = 0
+        self._writes_since_checkpoint = 0
+        # Likewise automatic indexing, as a task holding every table
+        self.auto_index, self.executor.auto_index = self.executor.auto_index, None
+        self._indexing = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rdbms-io")
+        self._schema = RWLock()
+        self._tables = {}
+
+    async def execute(self, sql, params=None, metrics=False):
+        """Run SQL text, a PreparedStatement or a parsed AST like Executor.execute.
+        If the awaiting task is cancelled the statement still runs to completion."""
+        statement = sql
+        if isinstance(sql, str):
+            try:
+                statement = self.executor.prepare(sql)
+            except ValueError:
+                pass  # Executor.execute reports the parse error
+        return await asyncio.shield(self._statement(statement, params, metrics))
+
+    async def stream(self, sql, params=None, batch_size=STREAM_BATCH):
+        """Async iterator over the rows a query returns, yielding to the event loop
+        every `batch_size` rows. Raises ValueError if the statement fails."""
+        response = await self.execute(sql, params)
+        if not response["ok"]:
+            raise ValueError(response["error"])
+        rows = response["result"]
+        if not isinstance(rows, list):
+            raise ValueError("stream() needs a statement that returns rows")
+        for start in range(0, len(rows), batch_size):
+            for row in rows[start:start + batch_size]:
+                yield row
+            await asyncio.sleep(0)
+
+    async def checkpoint(self, clean=False):
+        async with self._locked(None):
+            self._writes_since_checkpoint = 0
+            return await self._run(self.executor.checkpoint, clean)
+
+    async def close(self):
+        """Checkpoint, mark the shutdown clean and stop the worker threads."""
+        if self._indexing is not None:
+            await self._indexing
+        generation = await self.checkpoint(clean=True)
+        self._pool.shutdown(wait=True)
+        return generation
+
+    def set_auto_index(self, budget_bytes, min_savings=AUTO_MIN_SAVINGS):
+        """Executor.set_auto_index, with the indexes built in the background."""
+        self.executor.set_auto_index(budget_bytes, min_savings)
+        self.auto_index, self.executor.auto_index = self.executor.auto_index, None
+
+    async def _statement(self, statement, params, metrics):
+        ast = statement.ast if isinstance(statement, PreparedStatement) else statement
+        if not isinstance(ast, dict):
+            ast = {}  # unparsable: Executor.execute only reports the error
+        async with self._locked(ast):
+            response = await self._run(self.executor.execute, statement, metrics, params)
+        if response["ok"] and ast.get("action") in WRITE_ACTIONS and self.checkpoint_every:
+            self._writes_since_checkpoint += 1
+            if self._writes_since_checkpoint >= self.checkpoint_every:
+                await self.checkpoint()
+        if self.auto_index is not None and self._indexing is None and self.auto_index.due(self.executor.workload):
+            self._indexing = asyncio.ensure_future(self._auto_index())
+        return response
+
+    async def _auto_index(self):
+        try:
+            async with self._locked(None):
+                return await self._run(self.executor.run_auto_index, self.auto_index)
+        finally:
+            self._indexing = None
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    @asynccontextmanager
+    async def _locked(self, ast):
+        """Hold the locks for the statement `ast` (None: everything, as for a checkpoint)."""
+        if ast is None or (ast and footprint(self.executor.catalog, ast) is None):
+            await self._schema.acquire(write=True)
+            try:
+                yield
+            finally:
+                await self._schema.release(write=True)
+            return
+        held = []
+        await self._schema.acquire()
+        try:
+            # With the schema lock held no DDL can change what the statement touches
+            reads, writes = footprint(self.executor.catalog, ast) if ast else (set(), set())
+            # One global order of acquisition, so statements cannot deadlock
+            for table in sorted(reads | writes):
+                lock = self._tables.setdefault(table, RWLock())
+                write = table in writes
+                await lock.acquire(write)
+                held.append((lock, write))
+            yield
+        finally:
+            for lock, write in reversed(held):
+                await lock.release(write)
+            await self._schema.release()
+
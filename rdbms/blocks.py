@@ -0,0 +1,347 @@
+# rdbms/blocks.py
+"""Block-structured table storage.
+
+A table `t` stored in blocks consists of:
+
+    t.meta        JSON root, atomically replaced: codec, column order, the
+                  current segment and tail file names, and the block index
+    t.<g>.seg     sealed blocks, each a codec-compressed JSON array of rows
+    t.<g>.tail    JSON lines for rows not yet sealed into a block
+
+Rows are arrays in schema column order, so column names are not repeated
+per row. Inserts append to the tail; once it holds `block_rows` rows it is
+compressed into a new block. The block index (byte range and row count per
+block) lets fetch() decompress only the blocks holding the requested row
+ids. The meta file is the commit point: a segment or tail it does not name
+is left over from a crash, and repair() removes it.
+"""
+import os
+import re
+import json
+import bisect
+
+from rdbms import metrics, synopsis
+from rdbms.codecs import get_codec
+from rdbms.rows import record_class, from_arrays
+from rdbms.fileio import DATA_DIR, atomic_write, truncate_torn_tail, count_lines, append_lines, remove_file
+
+DEFAULT_BLOCK_ROWS = 1024
+
+
+def storage_options(options=None):
+    """Validate `CREATE TABLE ... WITH (...)` options into block storage settings.
+
+    Returns None (plain JSON lines) when no option is given and
+    MINIRDBMS_COMPRESSION is unset.
+    """
+    options = dict(options or {})
+    default = os.environ.get("MINIRDBMS_COMPRESSION")
+    if not options and not default:
+        return None
+    codec = options.pop("compression", default or "none")
+    block_rows = options.pop("block_rows", DEFAULT_BLOCK_ROWS)
+    if options:
+        raise ValueError(f"Unknown table option(s): {', '.join(sorted(options))}")
+    try:
+        block_rows = int(block_rows)
+    except (TypeError, ValueError):
+        block_rows = 0
+    if block_rows < 1:
+        raise ValueError("block_rows must be a positive integer")
+    return {"format": "blocks", "codec": get_codec(codec).name, "block_rows": block_rows}
+
+
+def _to_rows(columns, arrays, keep=None):
+    """Row dicts for value arrays laid out as `columns`; with a `keep` column
+    list, Records (see rdbms.rows) holding just those columns."""
+    if keep is not None:
+        return from_arrays(record_class(keep), columns, arrays)
+    rows = []
+    for values in arrays:
+        row = dict(zip(columns, values))
+        if None in values:
+            row = {c: v for c, v in row.items() if v is not None}
+        rows.append(row)
+    return rows
+
+
+class BlockStore:
+    def __init__(self, table):
+        self.table = table
+        self.meta_path = os.path.join(DATA_DIR, f"{table}.meta")
+        self._file_re = re.compile(re.escape(table) + r"\.\d+\.(seg|tail)$")
+
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    def _path(self, name):
+        return os.path.join(DATA_DIR, name)
+
+    def _load(self):
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def _save(self, meta):
+        atomic_write(self.meta_path, json.dumps(meta))
+
+    def _data_files(self):
+        return [name for name in os.listdir(DATA_DIR) if self._file_re.match(name)]
+
+    def create(self, columns, options):
+        for name in self._data_files():
+            remove_file(self._path(name))
+        self._save({
+            "codec": options["codec"],
+            "block_rows": options["block_rows"],
+            "columns": list(columns),
+            "generation": 0,
+            "segment": f"{self.table}.0.seg",
+            "tail": f"{self.table}.0.tail",
+            "blocks": [],
+        })
+
+    def files(self):
+        meta = self._load()
+        names = [self.meta_path] + [self._path(meta["segment"]), self._path(meta["tail"])]
+        return [p for p in names if os.path.exists(p)]
+
+    def drop(self):
+        for name in self._data_files():
+            remove_file(self._path(name))
+        os.remove(self.meta_path)
+
+    # -----------------------------
+    # Encoding
+    # -----------------------------
+    def _encode(self, meta, arrays):
+        return get_codec(meta["codec"]).compress(json.dumps(arrays, separators=(",", ":")).encode())
+
+    def _decode(self, meta, data):
+        return json.loads(get_codec(meta["codec"]).decompress(data))
+
+    def _read_tail(self, meta):
+        path = self._path(meta["tail"])
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            data = f.read()
+        metrics.add("bytes_read", len(data))
+        metrics.touch(path)
+        return [json.loads(line) for line in data.splitlines()]
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def scan(self, probe, keep=None):
+        """(pairs, skipped): (id, row) for rows in blocks whose synopsis may match
+        `probe` plus the tail, and the (first, end) id ranges of skipped blocks.
+        With `keep` columns, rows are Records of just those."""
+        meta = self._load()
+        columns = meta["columns"]
+        synopses = {s["first"]: s for s in synopsis.SynopsisLog(synopsis.synopsis_file(self.table)).load(meta["segment"])}
+        pairs, skipped = [], []
+        start = read = 0
+        with metrics.span("storage.scan"):
+            if meta["blocks"]:
+                path = self._path(meta["segment"])
+                with open(path, "rb") as f:
+                    for block in meta["blocks"]:
+                        s = synopses.get(start)
+                        if s and s["rows"] == block["rows"] and not synopsis.may_match(s, probe):
+                            skipped.append((start, start + block["rows"]))
+                        else:
+                            f.seek(block["offset"])
+                            rows = _to_rows(columns, self._decode(meta, f.read(block["length"])), keep)
+                            pairs.extend(enumerate(rows, start))
+                            read += 1
+                            metrics.add("bytes_read", block["length"])
+                        start += block["rows"]
+                metrics.add("blocks_read", read)
+                metrics.add("blocks_skipped", len(skipped))
+                metrics.touch(path)
+            pairs.extend(enumerate(_to_rows(columns, self._read_tail(meta), keep), start))
+        metrics.add("rows_scanned", len(pairs))
+        return pairs, skipped
+
+    def read_all(self, keep=None):
+        meta = self._load()
+        columns = meta["columns"]
+        arrays = []
+        with metrics.span("storage.scan"):
+            if meta["blocks"]:
+                path = self._path(meta["segment"])
+                with open(path, "rb") as f:
+                    data = f.read()
+                for block in meta["blocks"]:
+                    start = block["offset"]
+                    arrays.extend(self._decode(meta, data[start:start + block["length"]]))
+                metrics.add("bytes_read", len(data))
+                metrics.add("blocks_read", len(meta["blocks"]))
+                metrics.touch(path)
+            arrays.extend(self._read_tail(meta))
+            rows = _to_rows(columns, arrays, keep)
+        metrics.add("rows_scanned", len(rows))
+        return rows
+
+    def base_id(self):
+        """Changes only when the rows are rewritten (sealing keeps the segment)."""
+        return self._load()["segment"]
+
+    def slots(self):
+        """Number of rows ever appended since the last rewrite (the next row's position)."""
+        meta = self._load()
+        return sum(b["rows"] for b in meta["blocks"]) + count_lines(self._path(meta["tail"]))
+
+    def fetch(self, row_ids, keep=None):
+        """(id, row) for each of `row_ids` (positions) that exists, in id order,
+        decompressing only the blocks that hold them."""
+        meta = self._load()
+        starts, sealed = [], 0
+        for block in meta["blocks"]:
+            starts.append(sealed)
+            sealed += block["rows"]
+
+        wanted = sorted({int(i) for i in row_ids})
+        by_block = {}
+        for i in wanted:
+            if i < sealed:
+                by_block.setdefault(bisect.bisect_right(starts, i) - 1, []).append(i)
+
+        found = {}
+        scanned = 0
+        with metrics.span("storage.fetch"):
+            if by_block:
+                path = self._path(meta["segment"])
+                with open(path, "rb") as f:
+                    for b, ids in sorted(by_block.items()):
+                        block = meta["blocks"][b]
+                        f.seek(block["offset"])
+                        arrays = self._decode(meta, f.read(block["length"]))
+                        scanned += len(arrays)
+                        metrics.add("bytes_read", block["length"])
+                        for i in ids:
+                            found[i] = arrays[i - starts[b]]
+                metrics.add("blocks_read", len(by_block))
+                metrics.touch(path)
+            if wanted and wanted[-1] >= sealed:
+                tail = self._read_tail(meta)
+                scanned += len(tail)
+                for i in wanted:
+                    if sealed <= i < sealed + len(tail):
+                        found[i] = tail[i - sealed]
+        metrics.add("rows_scanned", scanned)
+        ids = [i for i in wanted if i in found]
+        return list(zip(ids, _to_rows(meta["columns"], [found[i] for i in ids], keep)))
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def append(self, row):
+        """Append `row`; returns its position."""
+        meta = self._load()
+        line = json.dumps([row.get(c) for c in meta["columns"]]) + "\n"
+        path = self._path(meta["tail"])
+        with metrics.span("storage.append"):
+            count = append_lines(path, line)
+        metrics.add("bytes_written", len(line))
+        metrics.touch(path)
+        position = sum(b["rows"] for b in meta["blocks"]) + count
+        if count + 1 >= meta["block_rows"]:
+            self._seal(meta)
+        return position
+
+    def append_many(self, rows):
+        """Append `rows` with one write per block they fill; returns the first one's position."""
+        meta = self._load()
+        position = None
+        while rows:
+            path = self._path(meta["tail"])
+            count = count_lines(path)
+            room = meta["block_rows"] - count
+            batch, rows = rows[:room], rows[room:]
+            data = "".join(json.dumps([row.get(c) for c in meta["columns"]]) + "\n" for row in batch)
+            with metrics.span("storage.append"):
+                append_lines(path, data)
+            metrics.add("bytes_written", len(data))
+            metrics.touch(path)
+            if position is None:
+                position = sum(b["rows"] for b in meta["blocks"]) + count
+            if count + len(batch) >= meta["block_rows"]:
+                self._seal(meta)
+        return self.slots() if position is None else position
+
+    def _seal(self, meta):
+        """Compress the tail into a new block at the end of the segment."""
+        old_tail = self._path(meta["tail"])
+        arrays = self._read_tail(meta)
+        data = self._encode(meta, arrays)
+        path = self._path(meta["segment"])
+        with metrics.span("storage.seal"), open(path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        first = sum(b["rows"] for b in meta["blocks"])
+        meta["blocks"].append({"offset": offset, "length": len(data), "rows": len(arrays)})
+        synopsis.SynopsisLog(synopsis.synopsis_file(self.table)).append(
+            meta["segment"], [synopsis.build(_to_rows(meta["columns"], arrays), first)])
+        meta["generation"] += 1
+        meta["tail"] = f"{self.table}.{meta['generation']}.tail"
+        self._save(meta)
+        remove_file(old_tail)
+        metrics.add("bytes_written", len(data))
+        metrics.touch(path)
+
+    def rewrite(self, rows):
+        """Re-encode the whole table into a fresh segment and tail, then switch the meta over."""
+        meta = self._load()
+        columns = meta["columns"]
+        arrays = [[row.get(c) for c in columns] for row in rows]
+        n = meta["block_rows"]
+        full = len(arrays) // n * n
+        old = [self._path(meta["segment"]), self._path(meta["tail"])]
+
+        meta["generation"] += 1
+        meta["segment"] = f"{self.table}.{meta['generation']}.seg"
+        meta["tail"] = f"{self.table}.{meta['generation']}.tail"
+        blocks, synopses = [], []
+        written = 0
+        with metrics.span("storage.rewrite"):
+            if full:
+                with open(self._path(meta["segment"]), "wb") as f:
+                    for start in range(0, full, n):
+                        data = self._encode(meta, arrays[start:start + n])
+                        blocks.append({"offset": f.tell(), "length": len(data), "rows": n})
+                        synopses.append(synopsis.build(rows[start:start + n], start))
+                        f.write(data)
+                        written += len(data)
+            if full < len(arrays):
+                lines = "".join(json.dumps(values) + "\n" for values in arrays[full:])
+                with open(self._path(meta["tail"]), "w") as f:
+                    f.write(lines)
+                written += len(lines)
+            meta["blocks"] = blocks
+            synopsis.SynopsisLog(synopsis.synopsis_file(self.table)).write(meta["segment"], synopses)
+            self._save(meta)
+        for path in old:
+            remove_file(path)
+        metrics.add("bytes_written", written)
+        metrics.touch(self._path(meta["segment"]))
+
+    def repair(self):
+        """Cut a torn tail row and bytes past the last block; drop files the meta does not name."""
+        meta = self._load()
+        cut = 0
+        tail = self._path(meta["tail"])
+        if os.path.exists(tail):
+            cut += truncate_torn_tail(tail)
+        segment = self._path(meta["segment"])
+        if os.path.exists(segment):
+            end = max((b["offset"] + b["length"] for b in meta["blocks"]), default=0)
+            size = os.path.getsize(segment)
+            if size > end:
+                with open(segment, "rb+") as f:
+                    f.truncate(end)
+                cut += size - end
+        for name in self._data_files():
+            if name not in (meta["segment"], meta["tail"]):
+                remove_file(self._path(name))
+        return cut
@@ -0,0 +1,313 @@
+# rdbms/bulk.py
+"""Streaming CSV / JSON-lines import and export.
+
+    executor.import_file("users.csv", "users")      # or .import users.csv users in the REPL
+    executor.export_table("users", "users.jsonl")   # or .export users users.jsonl
+
+An import is a pipeline: the file is read in chunks of whole records, a
+pool of worker processes parses them and checks column types, and the
+main process checks keys for each parsed chunk against key sets loaded
+once (instead of scanning the table per row as INSERT does) and streams
+the rows to a staging file per segment. Only when the whole file is valid
+are the staged rows appended to the table in large writes and every index
+updated once, so a bad record leaves the table untouched. Only key values
+are held in memory, never the rows themselves, and at most a few chunks
+are in flight at a time.
+
+CSV files need a header row naming the columns. Empty fields and JSON
+nulls load as NULL, which is also how NULL is exported to CSV.
+"""
+import os
+import csv
+import json
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from rdbms.catalog import TableSchema
+from rdbms.fileio import DATA_DIR
+from rdbms.index import Index
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Records per chunk handed to a parse worker
+CHUNK_ROWS = 5000
+# Worker processes parsing chunks; imports smaller than a chunk parse in-process
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def file_format(path, fmt=None):
+    if fmt:
+        if fmt not in FORMATS.values():
+            raise ValueError(f"Unknown format '{fmt}'; use csv or jsonl")
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Cannot tell the format of '{path}'; use a .csv or .jsonl file")
+    return FORMATS[ext]
+
+
+# -----------------------------
+# Import
+# -----------------------------
+def import_file(executor, path, table, fmt=None, workers=None, chunk_rows=CHUNK_ROWS):
+    """Load every record of `path` into `table`; all of them or, on the first
+    invalid one, none. Returns {"table": table, "imported": rows}."""
+    fmt = file_format(path, fmt)
+    ts = executor._table(table)
+    executor._check_writable(ts)
+    if not os.path.exists(path):
+        raise ValueError(f"File '{path}' does not exist")
+    workers = DEFAULT_WORKERS if workers is None else workers
+
+    keys = _key_columns(ts)
+    checker = _KeyChecker(executor, ts, keys)
+    staging = {segment: os.path.join(DATA_DIR, f"{segment}.import.tmp") for segment in ts.segments}
+    staged = {segment: [] for segment in ts.segments}  # key values of each staged row, in order
+    files = {}
+    try:
+        with open(path, newline="" if fmt == "csv" else None) as f:
+            records = _records(f, fmt)
+            header = _header(ts, next(records, None)) if fmt == "csv" else None
+            for numbers, lines, values in _parse(records, fmt, ts, header, keys, workers, chunk_rows):
+                batches = {}
+                for number, line, kv in zip(numbers, lines, values):
+                    checker.check(number, kv)
+                    segment = ts.segment_of(dict(zip(keys, kv))) if ts.partitioning else ts.name
+                    batches.setdefault(segment, []).append(line)
+                    staged[segment].append(kv)
+                for segment, batch in batches.items():
+                    if segment not in files:
+                        files[segment] = open(staging[segment], "w")
+                    files[segment].write("\n".join(batch) + "\n")
+        checker.finish()
+        for f in files.values():
+            f.close()
+
+        total = 0
+        for segment in files:
+            first, added = executor.storage.append_file(segment, staging[segment])
+            entries = []
+            for n, kv in enumerate(staged[segment]):
+                row = dict(zip(keys, kv))
+                entries.extend(ts.index_entry(col, row, first + n) for col in ts.indexed)
+            executor._update_indexes(segment, added=entries)
+            total += added
+    finally:
+        for segment, f in files.items():
+            f.close()
+            os.remove(staging[segment])
+
+    if total:
+        executor._bump(table)
+        for name in executor.catalog.get_views_on(table):
+            executor._rematerialize(executor._table(name))
+    return {"table": table, "imported": total}
+
+
+def _key_columns(ts):
+    """Columns whose values the main process needs: indexes (with the columns
+    they cover), keys and the partition column."""
+    cols = list(ts.indexed)
+    for include in ts.includes.values():
+        cols.extend(include)
+    for group in ts.composite_unique:
+        cols.extend(group)
+    if ts.partitioning is not None:
+        cols.append(ts.partitioning.column)
+    return list(dict.fromkeys(cols))
+
+
+def _records(f, fmt):
+    """(line number, text) per record. CSV records run on while a quoted field is open."""
+    pending, start, quotes = [], 0, 0
+    for number, line in enumerate(f, 1):
+        if fmt == "jsonl":
+            if line.strip():
+                yield number, line
+            continue
+        if not pending:
+            start = number
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            text = "".join(pending)
+            if text.strip():
+                yield start, text
+            pending, quotes = [], 0
+    if pending:
+        yield start, "".join(pending)  # unterminated quote; the parser reports it
+
+
+def _header(ts, record):
+    if record is None:
+        raise ValueError("CSV file is empty; the first line must name the columns")
+    header = [c.strip() for c in next(csv.reader([record[1]]))]
+    for col in header:
+        if not ts.has_column(col) or col in ts.hidden:
+            raise ValueError(f"Column '{col}' does not exist in table '{ts.name}'")
+    if len(set(header)) != len(header):
+        raise ValueError("CSV header names a column more than once")
+    return header
+
+
+def _parse(records, fmt, ts, header, keys, workers, chunk_rows):
+    """Parsed chunks in file order: parsed in-process, or by `workers`
+    processes with a bounded number of chunks in flight."""
+    chunks = iter(lambda: list(itertools.islice(records, chunk_rows)), [])
+    job = (fmt, ts.name, ts.raw, header, keys)
+    head = list(itertools.islice(chunks, 2))
+    if len(head) < 2 or workers <= 1:
+        for chunk in itertools.chain(head, chunks):
+            yield parse_chunk(*job, chunk)
+        return
+
+    pool = ProcessPoolExecutor(workers)
+    try:
+        pending = deque()
+        for chunk in itertools.chain(head, chunks):
+            pending.append(pool.submit(parse_chunk, *job, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_chunk(fmt, table, schema, header, keys, records):
+    """Parse and type-check (line number, text) records (runs in a worker process).
+    Returns (line numbers, JSON-encoded rows, key column values per row)."""
+    ts = TableSchema(table, schema)
+    numbers, lines, values = [], [], []
+    reader = csv.reader([text for _, text in records]) if fmt == "csv" else None
+    for number, text in records:
+        try:
+            row = _csv_row(header, next(reader)) if reader else _json_row(ts, text)
+            ts.validate(row)
+        except (ValueError, csv.Error) as e:
+            raise ValueError(f"Line {number}: {e}") from None
+        numbers.append(number)
+        lines.append(json.dumps(row))
+        values.append(tuple(row.get(c) for c in keys))
+    return numbers, lines, values
+
+
+def _csv_row(header, fields):
+    if len(fields) != len(header):
+        raise ValueError(f"expected {len(header)} fields, found {len(fields)}")
+    return {col: value for col, value in zip(header, fields) if value != ""}
+
+
+def _json_row(ts, text):
+    try:
+        record = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e.msg})")
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    row = {}
+    for col, value in record.items():
+        if not ts.has_column(col) or col in ts.hidden:
+            raise ValueError(f"Column '{col}' does not exist in table '{ts.name}'")
+        if value is None:
+            continue
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"Column '{col}' holds a nested JSON value")
+        # Stored as text, the way the SQL parser hands values over
+        row[col] = ("TRUE" if value else "FALSE") if isinstance(value, bool) else str(value)
+    return row
+
+
+class _KeyChecker:
+    """PRIMARY KEY, UNIQUE and FOREIGN KEY checks for imported rows against
+    key sets built once from the indexes, plus the keys imported so far."""
+
+    def __init__(self, executor, ts, keys):
+        self.ts = ts
+        self.position = {c: i for i, c in enumerate(keys)}
+        # Index keys are str(value), so NULLs collide as they do for INSERT
+        self.single = {}
+        for col in dict.fromkeys(ts.primary_key + ts.unique):
+            seen = set()
+            for segment in ts.segments:
+                seen.update(_index_keys(segment, col))
+            kind = "primary key" if col in ts.primary_key else "unique value"
+            self.single[col] = (seen, kind)
+        self.composite = []
+        if ts.composite_unique:
+            rows = executor._read(ts)
+            for cols in ts.composite_unique:
+                self.composite.append((cols, {tuple(r.get(c) for c in cols) for r in rows}))
+        self.foreign = []
+        for col, ref in ts.foreign_keys:
+            if ref["table"] == ts.name:
+                parent = self.single[ref["column"]][0]
+            else:
+                parent = set()
+                for segment in executor._table(ref["table"]).segments:
+                    parent.update(_index_keys(segment, ref["column"]))
+            self.foreign.append((col, ref, parent))
+        self.deferred = []  # self-references to rows later in the file
+
+    def check(self, number, kv):
+        ts = self.ts
+        for col, (seen, kind) in self.single.items():
+            key = str(kv[self.position[col]])
+            if key in seen:
+                raise ValueError(f"Line {number}: Duplicate {kind} '{col}={kv[self.position[col]]}' "
+                                 f"in table '{ts.name}'")
+            seen.add(key)
+        for cols, seen in self.composite:
+            key = tuple(kv[self.position[c]] for c in cols)
+            if key in seen:
+                raise ValueError(f"Line {number}: Duplicate composite unique ({', '.join(cols)}) "
+                                 f"in table '{ts.name}'")
+            seen.add(key)
+        for col, ref, parent in self.foreign:
+            val = kv[self.position[col]]
+            if val is None or val in parent:
+                continue
+            if ref["table"] == ts.name:
+                self.deferred.append((number, col, ref, val))
+                continue
+            raise ValueError(f"Line {number}: " + _fk_error(col, ref, val))
+
+    def finish(self):
+        for number, col, ref, val in self.deferred:
+            if val not in self.single[ref["column"]][0]:
+                raise ValueError(f"Line {number}: " + _fk_error(col, ref, val))
+
+
+def _index_keys(segment, col):
+    return Index(segment, col)._load().keys()
+
+
+def _fk_error(col, ref, val):
+    return f"Foreign key violation: '{col}={val}' not found in '{ref['table']}.{ref['column']}'"
+
+
+# -----------------------------
+# Export
+# -----------------------------
+def export_table(executor, table, path, fmt=None):
+    """Write every row of `table` to `path`, one segment in memory at a time.
+    Returns {"table": table, "exported": rows}."""
+    fmt = file_format(path, fmt)
+    ts = executor._table(table)
+    columns = ts.visible
+    count = 0
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="" if fmt == "csv" else None) as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+        for segment in ts.segments:
+            rows = [r for _, r in executor.storage.scan(segment)]
+            if writer:
+                writer.writerows([["" if r.get(c) is None else r[c] for c in columns] for r in rows])
+            else:
+                f.writelines(json.dumps({c: r[c] for c in columns if r.get(c) is not None}) + "\n"
+                             for r in rows)
+            count += len(rows)
+    os.replace(tmp, path)
+    return {"table": table, "exported": count}
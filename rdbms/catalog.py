@@ -1,26 +1,187 @@
 import os
+import re
 import json
 
+from rdbms.storage import atomic_write
+from rdbms.partition import Partitioning
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
+DATA_DIR = os.environ.get("MINIRDBMS_DATA_DIR", os.path.join(BASE_DIR, "data"))
 os.makedirs(DATA_DIR, exist_ok=True)
 
 CATALOG_FILE = os.path.join(DATA_DIR, "catalog.json")
 
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# -----------------------------
+# Per-type validators/coercers
+# -----------------------------
+def _integer_validator(col):
+    def check(val):
+        if not str(val).isdigit():
+            raise ValueError(f"Column '{col}' expects INTEGER, got '{val}'")
+    return check
+
+def _float_validator(col):
+    def check(val):
+        try:
+            float(val)
+        except Exception:
+            raise ValueError(f"Column '{col}' expects FLOAT, got '{val}'")
+    return check
+
+def _boolean_validator(col):
+    def check(val):
+        if str(val).upper() not in ("TRUE", "FALSE"):
+            raise ValueError(f"Column '{col}' expects BOOLEAN (TRUE/FALSE), got '{val}'")
+    return check
+
+def _date_validator(col):
+    match = DATE_RE.match
+    def check(val):
+        if not match(str(val)):
+            raise ValueError(f"Column '{col}' expects DATE (YYYY-MM-DD), got '{val}'")
+    return check
+
+# TEXT accepts anything, so it has no validator
+VALIDATORS = {
+    "INTEGER": _integer_validator,
+    "FLOAT": _float_validator,
+    "BOOLEAN": _boolean_validator,
+    "DATE": _date_validator,
+}
+
+def _to_bool(val):
+    return str(val).upper() == "TRUE"
+
+# Stored values are raw strings; coercers give them their natural ordering
+COERCERS = {
+    "INTEGER": int,
+    "FLOAT": float,
+    "BOOLEAN": _to_bool,
+    "DATE": str,
+    "TEXT": str,
+}
+
+
+class TableSchema:
+    """Compiled view of one catalog entry, built once per load/change."""
+
+    def __init__(self, name, schema):
+        self.name = name
+        self.raw = schema
+        columns = schema["columns"]
+
+        self.columns = list(columns)
+        self.ordinals = {c: i for i, c in enumerate(self.columns)}
+        self.types = {c: meta["type"].upper() for c, meta in columns.items()}
+
+        self.primary_key = [c for c, meta in columns.items() if meta.get("primary_key")]
+        self.unique = [c for c, meta in columns.items() if meta.get("unique")]
+        self.composite_unique = [
+            list(c.get("columns", [])) for c in schema.get("table_constraints", [])
+            if c.get("type") == "unique"
+        ]
+        self.foreign_keys = [(c, meta["references"]) for c, meta in columns.items() if meta.get("references")]
+        # CREATE INDEX name -> {"column": col, "include": [col, ...][, "using": "hash"]}
+        self.indexes = schema.get("indexes", {})
+        named = {spec["column"] for spec in self.indexes.values()}
+        # PK/UNIQUE columns, plus FK columns so ON DELETE can probe children
+        self.indexed = [
+            c for c, meta in columns.items()
+            if meta.get("primary_key") or meta.get("unique") or meta.get("references") or meta.get("index")
+            or c in named
+        ]
+        # Indexed column -> the columns its index covers
+        self.includes = {spec["column"]: spec["include"] for spec in self.indexes.values() if spec["include"]}
+        # Indexed columns kept as a HashIndex (CREATE INDEX ... USING HASH)
+        self.hashed = {spec["column"] for spec in self.indexes.values() if spec.get("using") == "hash"}
+        # Bookkeeping columns (a materialized view's row lineage) that SELECT leaves out
+        self.hidden = [c for c, meta in columns.items() if meta.get("hidden")]
+        self.visible = [c for c in self.columns if c not in self.hidden]
+        # {"query": select_join AST, "output": [[column, table, table column], ...]} for views
+        self.view = schema.get("view")
+
+        self.validators = [
+            (c, VALIDATORS[t](c)) for c, t in self.types.items() if t in VALIDATORS
+        ]
+        self.coercers = {c: COERCERS.get(t, str) for c, t in self.types.items()}
+
+        spec = schema.get("partition")
+        self.partitioning = Partitioning(spec, self.coercers[spec["column"]]) if spec else None
+        # Physical segments holding the rows; just the table itself unless partitioned
+        self.segments = self.partitioning.segments(name) if spec else [name]
+
+    def has_column(self, col):
+        return col in self.ordinals
+
+    def index_entry(self, col, row, row_id):
+        """(col, value, row id, included values or None): `row` as Executor._update_indexes adds it."""
+        include = self.includes.get(col)
+        return col, row.get(col), str(row_id), [row.get(c) for c in include] if include else None
+
+    def index_changed(self, col, old, new):
+        """Whether an update from row `old` to `new` changes its entry in the index on `col`."""
+        return any(old.get(c) != new.get(c) for c in [col, *self.includes.get(col, ())])
+
+    def segment_of(self, row):
+        """Segment a row belongs in."""
+        if self.partitioning is None:
+            return self.name
+        return self.segments[self.partitioning.locate(row.get(self.partitioning.column))]
+
+    def prune(self, condition):
+        """Segments that can hold rows matching the WHERE tree `condition` (all of them without one)."""
+        if self.partitioning is None or not condition:
+            return self.segments
+        keep = self._partitions(condition)
+        return [segment for i, segment in enumerate(self.segments) if i in keep]
+
+    def _partitions(self, expr):
+        p = self.partitioning
+        if "and" in expr:
+            return set.intersection(*(self._partitions(e) for e in expr["and"]))
+        if "or" in expr:
+            return set().union(*(self._partitions(e) for e in expr["or"]))
+        if "not" in expr or expr["column"] != p.column:
+            return set(range(p.count))
+        if expr.get("op") == "in":
+            return {i for v in expr["values"] for i in p.prune("=", v)}
+        return set(p.prune(expr.get("op", "="), expr["value"]))
+
+    def validate(self, row):
+        for col, check in self.validators:
+            val = row.get(col)
+            if val is not None:
+                check(val)
+
+
 class Catalog:
     def __init__(self):
         if not os.path.exists(CATALOG_FILE):
-            with open(CATALOG_FILE, "w") as f:
-                json.dump({}, f)
+            atomic_write(CATALOG_FILE, "{}", durable=True)
         self._load()
 
     def _load(self):
         with open(CATALOG_FILE, "r") as f:
             self.tables = json.load(f)
+        self._compile()
 
     def _save(self):
-        with open(CATALOG_FILE, "w") as f:
-            json.dump(self.tables, f, indent=2)
+        atomic_write(CATALOG_FILE, json.dumps(self.tables, indent=2), durable=True)
+        self._compile()
+
+    def _compile(self):
+        # Bumped on every load/change so cached plans know when to re-plan
+        self.version = getattr(self, "version", 0) + 1
+        self._compiled = {name: TableSchema(name, schema) for name, schema in self.tables.items()}
+        self._referencing = {}
+        self._views = {}
+        for ts in self._compiled.values():
+            for col, ref in ts.foreign_keys:
+                self._referencing.setdefault(ref["table"], []).append((ts.name, col, ref))
+            for table in ts.view["query"]["tables"] if ts.view else ():
+                self._views.setdefault(table, []).append(ts.name)
 
     def create_table(self, name, schema):
         if name in self.tables:
@@ -34,8 +195,38 @@ class Catalog:
         del self.tables[name]
         self._save()
 
+    def create_index(self, table, name, spec):
+        if self.find_index(name) is not None:
+            raise ValueError(f"Index {name} already exists")
+        self.tables[table].setdefault("indexes", {})[name] = spec
+        self._save()
+
+    def drop_index(self, name):
+        table = self.find_index(name)
+        if table is None:
+            raise ValueError(f"Index {name} does not exist")
+        del self.tables[table]["indexes"][name]
+        self._save()
+        return table
+
+    def find_index(self, name):
+        """Table holding the index created as `name`, or None."""
+        return next((t for t, schema in self.tables.items() if name in schema.get("indexes", {})), None)
+
     def list_tables(self):
         return list(self.tables.keys())
 
     def get_schema(self, name):
-        return self.tables.get(name)
\ No newline at end of file
+        return self.tables.get(name)
+
+    def get_table(self, name):
+        """Return the compiled TableSchema for `name`, or None."""
+        return self._compiled.get(name)
+
+    def get_references_to(self, name):
+        """Return (child_table, column, references) for every FK pointing at `name`."""
+        return self._referencing.get(name, [])
+
+    def get_views_on(self, name):
+        """Names of the materialized views that read table `name`."""
+        return self._views.get(name, [])
@@ -0,0 +1,237 @@
+# rdbms/client.py
+"""Blocking client for rdbms.server with a DB-API-like cursor and a pool.
+
+    pool = ConnectionPool(host="127.0.0.1", port=5433, size=4)
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM users WHERE id=?;", [1])
+        print(cur.fetchone())
+"""
+import socket
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from rdbms.protocol import encode_frame, recv_frame, ProtocolError, DEFAULT_HOST, DEFAULT_PORT
+
+
+class DatabaseError(ValueError):
+    pass
+
+
+class Connection:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, timeout=None):
+        if path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._next_id = 0
+        self.closed = False
+
+    def _send(self, sql=None, **fields):
+        self._next_id += 1
+        message = {"id": self._next_id, **fields}
+        if sql is not None:
+            message["sql"] = sql
+        self._sock.sendall(encode_frame(message))
+        return self._next_id
+
+    def _receive(self, request_id):
+        response = recv_frame(self._sock)
+        if response.get("id") not in (request_id, None):
+            raise DatabaseError(f"Out-of-order response {response.get('id')} for request {request_id}")
+        return response
+
+    def execute(self, sql, params=None, metrics=False):
+        """Run one statement and return the raw {"ok", "result"/"error"} response.
+
+        `params` binds `?` (a sequence) or `:name` (a dict) placeholders server-side.
+        """
+        fields = {}
+        if params is not None:
+            fields["params"] = _params(params)
+        if metrics:
+            fields["metrics"] = True
+        return self._receive(self._send(sql, **fields))
+
+    def metrics(self):
+        """Return the server's aggregated metrics in Prometheus text format."""
+        return self._receive(self._send(op="metrics"))["result"]
+
+    def pipeline(self, statements):
+        """Send every statement before reading any response; responses keep input order.
+
+        Items are SQL strings or (sql, params) pairs.
+        """
+        ids = []
+        for item in statements:
+            if isinstance(item, str):
+                ids.append(self._send(item))
+            else:
+                sql, params = item
+                ids.append(self._send(sql, params=_params(params)))
+        return [self._receive(i) for i in ids]
+
+    def cursor(self):
+        return Cursor(self)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Cursor:
+    arraysize = 1
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self.result = None
+        self._rows = []
+        self._pos = 0
+
+    def execute(self, sql, params=None):
+        self._load(self.connection.execute(sql, params=params))
+        return self
+
+    def executemany(self, statements, seq_of_params=None):
+        """Pipeline a list of statements, or one statement over many parameter sets."""
+        if seq_of_params is not None:
+            statements = [(statements, params) for params in seq_of_params]
+        total = 0
+        for response in self.connection.pipeline(list(statements)):
+            self._load(response)
+            total += max(self.rowcount, 0)
+        self.rowcount = total
+        return self
+
+    def _load(self, response):
+        if not response.get("ok"):
+            raise DatabaseError(response.get("error", "Unknown error"))
+        result = response.get("result")
+        self.result = result
+        self._pos = 0
+        if isinstance(result, list):
+            self._rows = result
+            self.rowcount = len(result)
+            columns = list(result[0].keys()) if result else []
+            self.description = tuple((c, None, None, None, None, None, None) for c in columns)
+            return
+        self._rows = []
+        self.description = None
+        if isinstance(result, dict) and "deleted" in result:
+            self.rowcount = result["deleted"]
+        elif isinstance(result, dict) and "updated" in result:
+            self.rowcount = 1 if result["updated"] else 0
+        elif isinstance(result, dict) and "row" in result:
+            self.rowcount = 1
+        else:
+            self.rowcount = -1
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def close(self):
+        self._rows = []
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class ConnectionPool:
+    """Thread-safe pool that keeps up to `size` warm connections to one server."""
+
+    def __init__(self, size=4, **connect_kwargs):
+        self.size = size
+        self._connect_kwargs = connect_kwargs
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                self._cond.wait()
+        try:
+            return Connection(**self._connect_kwargs)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, broken=False):
+        with self._cond:
+            if broken or conn.closed:
+                conn.close()
+                self._open -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except (OSError, ProtocolError):
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def execute(self, sql, params=None, metrics=False):
+        with self.connection() as conn:
+            return conn.execute(sql, params=params, metrics=metrics)
+
+    def metrics(self):
+        with self.connection() as conn:
+            return conn.metrics()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+
+
+def _params(params):
+    return dict(params) if isinstance(params, dict) else list(params)
+
+
+def connect(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, timeout=None):
+    return Connection(host=host, port=port, path=path, timeout=timeout)
@@ -0,0 +1,82 @@
+# rdbms/codecs.py
+"""Compression codecs for table blocks.
+
+A codec is any object with a `name` and `compress(bytes)`/`decompress(bytes)`;
+register_codec() makes it available to `CREATE TABLE ... WITH (compression=name)`.
+"""
+import zlib
+
+try:
+    import lzma
+except ImportError:  # Python built without liblzma
+    lzma = None
+
+
+class Codec:
+    name = None
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def decompress(self, data):
+        raise NotImplementedError
+
+
+class NullCodec(Codec):
+    name = "none"
+
+    def compress(self, data):
+        return data
+
+    def decompress(self, data):
+        return data
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class LzmaCodec(Codec):
+    name = "lzma"
+
+    def __init__(self, preset=6):
+        self.preset = preset
+
+    def compress(self, data):
+        return lzma.compress(data, preset=self.preset)
+
+    def decompress(self, data):
+        return lzma.decompress(data)
+
+
+_CODECS = {}
+
+
+def register_codec(codec):
+    _CODECS[codec.name] = codec
+
+
+def get_codec(name):
+    codec = _CODECS.get(str(name).lower())
+    if codec is None:
+        raise ValueError(f"Unknown compression codec '{name}' (available: {', '.join(available_codecs())})")
+    return codec
+
+
+def available_codecs():
+    return sorted(_CODECS)
+
+
+register_codec(NullCodec())
+register_codec(ZlibCodec())
+if lzma is not None:
+    register_codec(LzmaCodec())
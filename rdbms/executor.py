@@ -1,26 +1,74 @@
 import os
-import re
-import json
+import time
 import logging
+import operator
+import itertools
+import threading
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
 
-# Ensure these are imported from your project
+from rdbms import bulk, advisor, metrics as _metrics
 from rdbms.storage import Storage
-from rdbms.catalog import Catalog
-from rdbms.index import Index
-# from config import DATA_DIR
+from rdbms.blocks import storage_options
+from rdbms.catalog import Catalog, COERCERS
+from rdbms.index import Index, build_entries, write_index, drop_index_files
+from rdbms.profiling import SlowQueryLog, Profiler
+from rdbms.prepared import PreparedStatement, StatementCache
+from rdbms.resultcache import ResultCache, param_key
+from rdbms.recovery import Checkpointer
+from rdbms.partition import Partitioning
+from rdbms.synopsis import Probe
+from rdbms.joins import TableStats, JOIN_BATCH, order as order_joins
+from rdbms.expressions import predicate, conjuncts, leaves, is_condition, rename
+from rdbms.rows import as_dicts, column
 
-# If DATA_DIR isn't defined elsewhere, set a default
-DATA_DIR = os.environ.get("MINIRDBMS_DATA_DIR", ".")
+WRITE_ACTIONS = frozenset({
+    "create_table", "insert", "update", "delete", "drop_table", "vacuum",
+    "create_view", "refresh_view", "drop_view", "create_index", "drop_index",
+})
+CACHEABLE_ACTIONS = frozenset({"select", "select_join"})
+DEFAULT_VACUUM_RATIO = 0.5
+
+COMPARE = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def _divide(a, b):
+    if b == 0:
+        raise ValueError("Division by zero")
+    if isinstance(a, int) and isinstance(b, int):
+        return abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+    return a / b
+
+
+ARITHMETIC = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": _divide}
 
 
 class Executor:
-    def __init__(self):
+    def __init__(self, statement_cache_size=256):
+        # Repair torn files and stale indexes before anything reads them
+        self.checkpointer = Checkpointer()
+        self.recovery = self.checkpointer.recover()
+        self.checkpoint_every = Checkpointer.checkpoint_every_from_env()
+        self._writes_since_checkpoint = 0
         self.catalog = Catalog()
         self.storage = Storage()
+        self.metrics = _metrics.MetricsRegistry()
+        self.slow_log = SlowQueryLog.from_env()
+        self.profiler = Profiler.from_env()
+        self.statements = StatementCache(statement_cache_size)
+        self.set_result_cache(ResultCache.from_env())
+        # Per-table write counters that result cache entries are validated against
+        self.table_versions = {}
+        # Fraction of dead row versions in a segment that triggers compaction (0 = VACUUM only)
+        self.vacuum_ratio = float(os.environ.get("MINIRDBMS_VACUUM_RATIO", DEFAULT_VACUUM_RATIO))
+        self._local = threading.local()
+        # Unindexed scans seen so far, for ADVISE INDEXES and automatic indexing
+        self.workload = advisor.Workload()
+        self.auto_index = advisor.AutoIndex.from_env()
+        self._refresh_stale_views()
+        self.checkpoint()
         self._dispatch = {
             "create_table": self._create_table,
             "insert": self._insert,
@@ -28,18 +76,179 @@ class Executor:
             "select_join": self._select_join,
             "update": self._update,
             "delete": self._delete,
-            "drop_table": self._drop_table, 
+            "drop_table": self._drop_table,
+            "vacuum": self._vacuum,
+            "create_view": self._create_view,
+            "refresh_view": self._refresh_view,
+            "drop_view": self._drop_view,
+            "create_index": self._create_index,
+            "drop_index": self._drop_index,
+            "advise_indexes": self._advise_indexes,
         }
 
-    def execute(self, ast):
+    def prepare(self, sql):
+        """Parse `sql` (with `?` or `:name` placeholders) once and return a reusable handle."""
+        return self.statements.get(self, sql)
+
+    def execute(self, ast, metrics=False, params=None):
+        """Run a parsed AST, SQL text or PreparedStatement.
+
+        SQL text goes through the statement cache, and `params` (a sequence
+        for `?`, a dict for `:name`) are bound into its placeholders.
+        With metrics=True the response also carries a "metrics" dict with
+        parse/plan/exec timings, rows scanned vs returned, index probes,
+        bytes read/written and files touched.
+        """
+        stmt = _metrics.StatementMetrics()
+        profiler = self.profiler
+        sampled = profiler is not None and profiler.sample()
+        if sampled and profiler.mode == "spans":
+            stmt.spans = {}
+        token = _metrics.bind(stmt)
+        try:
+            if sampled and profiler.mode == "cprofile":
+                response = profiler.run(stmt, self._execute, ast, stmt, params)
+            else:
+                response = self._execute(ast, stmt, params)
+        finally:
+            _metrics.unbind(token)
+        self.metrics.observe(stmt, response["ok"])
+        if self._dirty:
+            self._auto_vacuum()
+        if self.auto_index is not None and self.auto_index.due(self.workload):
+            self.run_auto_index()
+        if response["ok"] and stmt.action in WRITE_ACTIONS and self.checkpoint_every:
+            self._writes_since_checkpoint += 1
+            if self._writes_since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+        if self.slow_log is not None:
+            sql = ast if isinstance(ast, str) else getattr(ast, "sql", None)
+            self.slow_log.record(sql, stmt, response)
+        if metrics:
+            response["metrics"] = stmt.as_dict()
+        return response
+
+    def checkpoint(self, clean=False):
+        """Fsync all table/index/catalog files and publish a new manifest generation."""
+        self._writes_since_checkpoint = 0
+        return self.checkpointer.checkpoint(self.catalog.tables, clean=clean)
+
+    def close(self):
+        """Checkpoint and mark the shutdown clean."""
+        return self.checkpoint(clean=True)
+
+    def set_slow_query_log(self, threshold_ms, path=None):
+        """Log statements slower than threshold_ms as JSON lines; None turns it off."""
+        self.slow_log = None if threshold_ms is None else SlowQueryLog(threshold_ms, path)
+
+    def set_profiling(self, rate, mode="cprofile", out_dir=None):
+        """Profile a `rate` fraction of statements; 0 or None turns it off."""
+        self.profiler = Profiler(rate, mode, out_dir) if rate else None
+
+    def import_file(self, path, table, format=None, workers=None):
+        """Bulk-load a .csv or .jsonl file into `table` (see rdbms.bulk)."""
+        return bulk.import_file(self, path, table, format, workers)
+
+    def export_table(self, table, path, format=None):
+        """Write `table` to a .csv or .jsonl file (see rdbms.bulk)."""
+        return bulk.export_table(self, table, path, format)
+
+    def set_result_cache(self, budget_bytes):
+        """Cache SELECT results within `budget_bytes` (or a ResultCache); 0 or None turns it off."""
+        cache = budget_bytes
+        if cache is not None and not isinstance(cache, ResultCache):
+            cache = ResultCache(budget_bytes) if budget_bytes else None
+        self.result_cache = cache
+        self.metrics.register("result_cache", cache.stats if cache is not None else None)
+
+    def set_auto_index(self, budget_bytes, min_savings=advisor.AUTO_MIN_SAVINGS):
+        """Create advised indexes as the workload runs, within `budget_bytes`
+        (see rdbms.advisor); 0 or None turns it off."""
+        self.auto_index = advisor.AutoIndex(budget_bytes, min_savings) if budget_bytes else None
+
+    def run_auto_index(self, policy=None):
+        """Create the indexes automatic mode (or `policy`) allows now; returns their names."""
+        policy = policy or self.auto_index
+        self.workload.take_pending()
+        try:
+            created = advisor.apply(self, advisor.advise(self, policy.min_savings), policy.budget)
+        except ValueError as e:
+            logger.warning("Automatic indexing failed: %s", e)
+            return []
+        for name in created:
+            logger.info("Created index '%s' for the recorded workload", name)
+        return created
+
+    @property
+    def _dirty(self):
+        """(table, segment) pairs written since the last auto-vacuum. Kept per thread,
+        so statements running side by side (see rdbms.asyncexecutor) only ever
+        compact the segments they wrote themselves."""
+        dirty = getattr(self._local, "dirty", None)
+        if dirty is None:
+            dirty = self._local.dirty = set()
+        return dirty
+
+    @_dirty.setter
+    def _dirty(self, value):
+        self._local.dirty = value
+
+    def _execute(self, ast, stmt, params=None):
+        prepared = None
+        if isinstance(ast, str):
+            t0 = time.perf_counter()
+            try:
+                prepared = self.prepare(ast)
+            except ValueError as ve:
+                return {"ok": False, "error": str(ve)}
+            finally:
+                stmt.parse_ms = (time.perf_counter() - t0) * 1000
+        elif isinstance(ast, PreparedStatement):
+            prepared = ast
+        elif params is not None:
+            return {"ok": False, "error": "Parameters require SQL text or a prepared statement"}
+        if prepared is not None:
+            try:
+                ast = prepared.bind(params)
+            except ValueError as ve:
+                return {"ok": False, "error": str(ve)}
         if not isinstance(ast, dict) or "action" not in ast:
             return {"ok": False, "error": "Invalid AST: missing 'action'"}
         action = ast["action"]
+        stmt.action = action
         handler = self._dispatch.get(action)
         if handler is None:
             return {"ok": False, "error": f"Unknown action: {action}"}
         try:
-            result = handler(ast)
+            cache_key = None
+            if self.result_cache is not None and prepared is not None and action in CACHEABLE_ACTIONS:
+                cache_key = (prepared.sql, param_key(prepared, params))
+                cached = self.result_cache.get(cache_key, self.table_versions)
+                if cached is not None:
+                    stmt.plan = {"action": action, "access": "result_cache"}
+                    stmt.counters["rows_returned"] = len(cached)
+                    return {"ok": True, "result": cached}
+                tables = [ast["table"]] if action == "select" else ast["tables"]
+                read = {t: self.table_versions.get(t, 0) for t in tables}
+            t0 = time.perf_counter()
+            if prepared is not None and prepared.catalog_version == self.catalog.version:
+                plan = prepared.plan
+            else:
+                plan = self._plan(ast)
+                if prepared is not None:
+                    prepared.plan, prepared.catalog_version = plan, self.catalog.version
+            t1 = time.perf_counter()
+            stmt.plan = plan
+            stmt.plan_ms = (t1 - t0) * 1000
+            try:
+                result = handler(ast, plan)
+            finally:
+                stmt.exec_ms = (time.perf_counter() - t1) * 1000
+            stmt.counters["rows_returned"] = _rows_returned(result)
+            if action in ("insert", "update", "delete"):
+                self.workload.record_write(ast["table"])
+            if cache_key is not None:
+                self.result_cache.put(cache_key, read, result)
             return {"ok": True, "result": result}
         except ValueError as ve:
             logger.warning("Value error: %s", ve)
@@ -48,344 +257,1095 @@ class Executor:
             logger.exception("Unexpected error executing AST")
             return {"ok": False, "error": "internal error"}
 
+    def _plan(self, ast):
+        """Pick the access path for the statement's target table. UPDATE and
+        DELETE find their rows the way SELECT * would."""
+        action = ast["action"]
+        plan = {"action": action}
+        if action in ("select", "update", "delete"):
+            ts = self.catalog.get_table(ast["table"])
+            condition = ast.get("condition")
+            if not condition:
+                plan["access"] = "full_scan"
+            elif ts is not None and self._index_columns(ts, condition):
+                # Answered from the index alone when it covers every column involved
+                covering = False
+                if action == "select":
+                    needed = self._projection(ts, ast["columns"])[1] if "columns" in ast else ts.visible
+                    covering = self._covering_index(ts, condition, needed)
+                plan["access"] = "index_only" if covering else "index"
+                plan["index"] = ", ".join(f"{ast['table']}.{c}" for c in self._index_columns(ts, condition))
+            else:
+                plan["access"] = "filter_scan"
+        elif action == "select_join":
+            # Join order and methods are chosen per execution from current table sizes
+            plan["access"] = "join"
+        return plan
+
     # -------------------------
     # DDL / DML handlers
     # -------------------------
-    def _create_table(self, ast):
+    def _create_table(self, ast, plan=None):
         table = ast["table"]
         columns = ast["columns"]
         table_constraints = ast.get("table_constraints", [])
-        self.catalog.create_table(table, {
-            "columns": columns,
-            "table_constraints": table_constraints
-        })
+
+        for col, meta in columns.items():
+            ref = meta.get("references")
+            if not ref:
+                continue
+            if ref["table"] == table:
+                parent_columns = columns
+            else:
+                parent_schema = self.catalog.get_schema(ref["table"])
+                if not parent_schema:
+                    raise ValueError(f"Referenced table '{ref['table']}' does not exist")
+                parent_columns = parent_schema["columns"]
+            parent_meta = parent_columns.get(ref["column"])
+            if not parent_meta or not (parent_meta.get("primary_key") or parent_meta.get("unique")):
+                raise ValueError(
+                    f"Referenced column '{ref['table']}.{ref['column']}' must be PRIMARY KEY or UNIQUE"
+                )
+
+        options = storage_options(ast.get("options"))
+        schema = {"columns": columns, "table_constraints": table_constraints}
+        partition = ast.get("partition")
+        if partition:
+            coerce = COERCERS.get(columns[partition["column"]]["type"].upper(), str)
+            schema["partition"] = Partitioning.validate(partition, columns, coerce)
+        if options:
+            schema["storage"] = options
+        self.catalog.create_table(table, schema)
+        self._bump(table)
+
+        # Start from empty index files, even if a stale one was left behind
+        ts = self.catalog.get_table(table)
+        for segment in ts.segments:
+            self.storage.create_table(segment, list(columns), options)
+            for col in ts.indexed:
+                write_index(segment, col, {}, col in ts.hashed)
         logger.info("Table '%s' created with columns: %s", table, list(columns.keys()))
         return None
 
-    def _insert(self, ast):
+    def _insert(self, ast, plan=None):
         table = ast["table"]
         row = ast["row"]  # parser returns unquoted raw strings or numeric strings
-        schema = self.catalog.get_schema(table)
-        if not schema:
-            raise ValueError(f"Table '{table}' does not exist")
+        ts = self._table(table)
+        self._check_writable(ts)
+        self._check_columns(ts, row)
 
-        rows = self.storage.read_all(table)  # snapshot before insert
+        rows = self._read(ts)  # snapshot before insert
 
         # Constraints and types
-        self._enforce_primary_key(schema, rows, row, table)
-        self._enforce_unique(schema, rows, row, table)
-        self._enforce_composite_unique(schema, rows, row, table)
-        self._enforce_types(schema, row)
+        with _metrics.span("constraints"):
+            self._enforce_primary_key(ts, rows, row)
+            self._enforce_unique(ts, rows, row)
+            self._enforce_composite_unique(ts, rows, row)
+            ts.validate(row)
+            self._enforce_foreign_keys(ts, row)
 
         # Persist
-        new_row_index = len(rows)
-        self.storage.insert(table, row)
-
-        logger.debug("Inserted row into %s: %s", table, json.dumps(row))
+        segment = ts.segment_of(row)
+        new_row_index = self._append(ts, segment, row)
 
-        # Index maintenance
-        for col, meta in schema["columns"].items():
-            if meta.get("primary_key") or meta.get("unique"):
-                idx = Index(table, col)
-                idx.add(row.get(col), str(new_row_index))
+        logger.debug("Inserted row into %s: %s", segment, row)
 
-        return {"inserted_row_index": new_row_index, "row": row}
+        result = {"inserted_row_index": new_row_index, "row": row}
+        if ts.partitioning is not None:
+            result["partition"] = segment
+        return result
 
-    def _select(self, ast):
+    def _select(self, ast, plan=None):
         table = ast["table"]
         condition = ast.get("condition")
-        schema = self.catalog.get_schema(table)
-        if not schema:
-            raise ValueError(f"Table '{table}' does not exist")
+        ts = self._table(table)
 
-        rows = self.storage.read_all(table)
+        output, needed = self._projection(ts, ast["columns"]) if "columns" in ast else (None, None)
+        if needed is not None:
+            # Only what the select list and WHERE clause read leaves storage
+            read = needed | {leaf["column"] for leaf in leaves(condition)} if condition else needed
+            needed = [c for c in ts.columns if c in read]
         if not condition:
-            return rows
-
-        col, val = condition["column"], condition["value"]
-        if col not in schema["columns"]:
-            raise ValueError(f"Column '{col}' does not exist in table '{table}'")
-
-        # Try index first
-        idx_path = os.path.join(DATA_DIR, f"{table}_{col}.idx")
-        matched_rows = []
-        if os.path.exists(idx_path):
-            idx = Index(table, col)
-            row_ids = idx.lookup(val)
-            if not row_ids:
-                return []
-            for i, r in enumerate(rows):
-                if str(i) in row_ids:
-                    matched_rows.append(r)
+            rows = self._read(ts, needed)
         else:
-            for r in rows:
-                # exact equality on stored value (both are raw strings)
-                if r.get(col) == val:
-                    matched_rows.append(r)
-        return matched_rows
-
-    def _select_join(self, ast):
-        left_table = ast["left_table"]
-        right_table = ast["right_table"]
-        on_left = ast["on"]["left"]
-        on_right = ast["on"]["right"]
-        select_cols = ast["columns"]
-        condition = ast.get("condition")
+            access = (plan or self._plan(ast)).get("access")
+            rows = self._index_only(ts, condition) if access == "index_only" else None
+            if rows is None:
+                rows = [r for _, _, r in self._matching(ts, condition, access in ("index", "index_only"), needed)]
+        if output is not None:
+            return [{name: get(r) for name, get in output} for r in rows]
+        if ts.hidden:
+            return [{c: r.get(c) for c in ts.visible} for r in rows]
+        return as_dicts(rows)
 
-        left_schema = self.catalog.get_schema(left_table)
-        right_schema = self.catalog.get_schema(right_table)
-        if not left_schema:
-            raise ValueError(f"Table '{left_table}' does not exist")
-        if not right_schema:
-            raise ValueError(f"Table '{right_table}' does not exist")
+    def _select_join(self, ast, plan=None):
+        join = self._join_setup(ast)
+        return [{name: tup[t].get(c) for name, t, c in join["output"]} for tup in self._join_tuples(join, plan)]
 
-        try:
-            lt, lcol = on_left.split(".")
-            rt, rcol = on_right.split(".")
-        except ValueError:
-            raise ValueError("JOIN ON must be of form left.col = right.col")
-
-        if lt != left_table or rt != right_table:
-            raise ValueError("JOIN ON table qualifiers must match FROM and JOIN tables")
-
-        if lcol not in left_schema["columns"]:
-            raise ValueError(f"Column '{lcol}' does not exist in table '{left_table}'")
-        if rcol not in right_schema["columns"]:
-            raise ValueError(f"Column '{rcol}' does not exist in table '{right_table}'")
-
-        left_rows = self.storage.read_all(left_table)
-        right_rows = self.storage.read_all(right_table)
-
-        results = []
-        for lrow in left_rows:
-            lv = lrow.get(lcol)
-            for rrow in right_rows:
-                rv = rrow.get(rcol)
-                if lv == rv:
-                    combined = {}
-                    for col in select_cols:
-                        if "." not in col:
-                            raise ValueError(f"Selected column '{col}' must be qualified as table.column")
-                        tname, cname = col.split(".")
-                        if tname == left_table:
-                            combined[col] = lrow.get(cname)
-                        elif tname == right_table:
-                            combined[col] = rrow.get(cname)
-                        else:
-                            raise ValueError(f"Unknown table qualifier '{tname}' in column '{col}'")
-                    if condition:
-                        cond_col = condition["column"]
-                        cond_val = condition["value"]
-                        if "." in cond_col:
-                            if combined.get(cond_col) != cond_val:
-                                continue
-                        else:
-                            if lrow.get(cond_col) != cond_val and rrow.get(cond_col) != cond_val:
-                                continue
-                    results.append(combined)
-        return results
-
-    def _update(self, ast):
+    def _update(self, ast, plan=None):
         table = ast["table"]
         set_clause = ast["set"]      # dict of column -> new unquoted value
         condition = ast["condition"]
+        ts = self._table(table)
+        self._check_writable(ts)
+        self._check_columns(ts, set_clause)
+        # Without a plan (internal calls) _matching picks its own access path
+        use_index = plan.get("access") == "index" if plan else None
 
-        schema = self.catalog.get_schema(table)
-        if not schema:
-            raise ValueError(f"Table '{table}' does not exist")
+        # Every target row and its new version is checked before anything is written
+        targets = []  # (segment, row id, row, candidate)
+        for segment, row_id, r in self._matching(ts, condition, use_index):
+            candidate = r.copy()
+            # apply all assignments from set_clause (values are raw strings)
+            candidate.update(set_clause)
+            with _metrics.span("constraints"):
+                ts.validate(candidate)
+                self._enforce_foreign_keys(ts, candidate)
 
-        rows = self.storage.read_all(table)
-        updated = False
-        new_rows = []
-
-        for i, r in enumerate(rows):
-            if r.get(condition["column"]) == condition["value"]:
-                candidate = r.copy()
-                # apply all assignments from set_clause (values are raw strings)
-                for k, v in set_clause.items():
-                    candidate[k] = v
-
-                # Constraints against candidate (skip comparing to itself by index)
-                self._enforce_types(schema, candidate)
-                self._enforce_primary_key(schema, rows, candidate, table, skip_index=i)
-                self._enforce_unique(schema, rows, candidate, table, skip_index=i)
-                self._enforce_composite_unique(schema, rows, candidate, table, skip_index=i)
-
-                # Index maintenance: update only if value changed
-                for col, meta in schema["columns"].items():
-                    if meta.get("primary_key") or meta.get("unique"):
-                        old_val = r.get(col)
-                        new_val = candidate.get(col)
-                        if old_val != new_val:
-                            idx = Index(table, col)
-                            idx.remove(old_val, str(i))
-                            idx.add(new_val, str(i))
-
-                r = candidate
-                updated = True
-            new_rows.append(r)
-
-        # Atomically rewrite table file
-        file = self.storage._table_file(table)
-        tmp = file + ".tmp"
-        with open(tmp, "w") as f:
-            for row in new_rows:
-                f.write(json.dumps(row) + "\n")
-        os.replace(tmp, file)
-
-        if updated:
-            return {"updated": True, "where": condition}
-        return {"updated": False, "where": condition}
-
-    def _delete(self, ast):
+            # Referenced keys cannot change while child rows still point at them
+            for child, child_col, ref in self.catalog.get_references_to(table):
+                old_key = r.get(ref["column"])
+                if old_key != candidate.get(ref["column"]) and self._lookup(child, child_col, old_key):
+                    raise ValueError(
+                        f"Cannot change '{table}.{ref['column']}={old_key}': referenced by '{child}.{child_col}'"
+                    )
+            targets.append((segment, row_id, r, candidate))
+        with _metrics.span("constraints"):
+            self._enforce_changed_keys(ts, targets)
+
+        by_segment = {}
+        for target in targets:
+            by_segment.setdefault(target[0], []).append(target[1:])
+        moved = []  # (segment, row) for rows whose partition key changed
+        for segment, rows in by_segment.items():
+            changes = []
+            removed, added = [], []  # (col, value, row_id) index maintenance
+            for row_id, r, candidate in rows:
+                target = ts.segment_of(candidate)
+                if target != segment:
+                    changes.append((row_id, None))
+                    removed.extend((col, r.get(col), str(row_id)) for col in ts.indexed)
+                    moved.append((target, candidate))
+                    continue
+                changes.append((row_id, candidate))
+                # Index maintenance: update only if the value (or a covered one) changed
+                for col in ts.indexed:
+                    if ts.index_changed(col, r, candidate):
+                        removed.append((col, r.get(col), str(row_id)))
+                        added.append(ts.index_entry(col, candidate, row_id))
+
+            # One delta append per segment; row ids do not move
+            self._log_changes(ts, segment, changes)
+            self._update_indexes(segment, removed, added)
+
+        for segment, row in moved:
+            self._append(ts, segment, row)
+
+        return {"updated": bool(targets), "where": condition}
+
+    def _delete(self, ast, plan=None):
         table = ast["table"]
         condition = ast["condition"]
+        ts = self._table(table)
+        self._check_writable(ts)
+        use_index = plan.get("access") == "index" if plan else None
 
-        schema = self.catalog.get_schema(table)
-        if not schema:
-            raise ValueError(f"Table '{table}' does not exist")
+        doomed = {}
+        for segment, row_id, r in self._matching(ts, condition, use_index):
+            doomed.setdefault(segment, []).append((row_id, r))
+        self._enforce_delete_restrict(table, [r for hits in doomed.values() for _, r in hits])
 
-        rows = self.storage.read_all(table)
-        new_rows = []
         deleted_count = 0
-
-        for i, r in enumerate(rows):
-            if r.get(condition["column"]) == condition["value"]:
-                for col, meta in schema["columns"].items():
-                    if meta.get("primary_key") or meta.get("unique"):
-                        idx = Index(table, col)
-                        idx.remove(r.get(col), str(i))
-                deleted_count += 1
-                continue
-            new_rows.append(r)
-
-        file = self.storage._table_file(table)
-        tmp = file + ".tmp"
-        with open(tmp, "w") as f:
-            for row in new_rows:
-                f.write(json.dumps(row) + "\n")
-        os.replace(tmp, file)
+        for segment, hits in doomed.items():
+            deleted_count += len(hits)
+            self._log_changes(ts, segment, [(row_id, None) for row_id, _ in hits])
+            self._update_indexes(segment, [(col, r.get(col), str(row_id)) for row_id, r in hits for col in ts.indexed])
 
         if deleted_count > 0:
-            self._remap_index_ids_after_compaction(table, schema, new_rows)
+            with _metrics.span("fk.cascade"):
+                self._cascade_delete(table, [r for hits in doomed.values() for _, r in hits])
             return {"deleted": deleted_count}
         return {"deleted": 0}
 
-    def _drop_table(self, ast):
+    def _vacuum(self, ast, plan=None):
+        tables = [ast["table"]] if ast.get("table") else self.catalog.list_tables()
+        vacuumed = {}
+        for table in tables:
+            ts = self._table(table)
+            for segment in ts.segments:
+                dead = self._compact(ts, segment)
+                if dead:
+                    vacuumed[segment] = dead
+        return {"vacuumed": vacuumed}
+
+    def _drop_table(self, ast, plan=None):
         table = ast["table"]
-        schema = self.catalog.get_schema(table)
-        if not schema:
-            raise ValueError(f"Table '{table}' does not exist")
+        ts = self._table(table)
+        if ts.view:
+            raise ValueError(f"'{table}' is a materialized view; use DROP MATERIALIZED VIEW")
+
+        children = sorted({child for child, _, _ in self.catalog.get_references_to(table) if child != table})
+        if children:
+            raise ValueError(f"Table '{table}' is referenced by: {', '.join(children)}")
+        views = self.catalog.get_views_on(table)
+        if views:
+            raise ValueError(f"Table '{table}' is used by materialized view(s): {', '.join(views)}")
+        return self._remove(ts)
 
+    def _remove(self, ts):
+        """Drop a table or view from the catalog and delete its files."""
+        table = ts.name
         # Remove from catalog
         self.catalog.drop_table(table)
+        self._bump(table)
+        self.workload.forget(table)
 
-        # Remove storage files
-        self.storage.drop_table(table)
+        for segment in ts.segments:
+            # Remove storage files
+            self.storage.drop_table(segment)
 
-        # Remove index files
-        for col, meta in schema["columns"].items():
-            if meta.get("primary_key") or meta.get("unique"):
-                idx = Index(table, col)
-                if os.path.exists(idx.file):
-                    os.remove(idx.file)
+            # Remove index files
+            for col in ts.indexed:
+                drop_index_files(segment, col)
 
         return {"dropped": table}
 
+    def _create_view(self, ast, plan=None):
+        name, query = ast["view"], ast["query"]
+        if query["action"] == "select":
+            table, columns = query["table"], query.get("columns", ["*"])
+            if any(not isinstance(c, str) for c in columns):
+                raise ValueError("A materialized view cannot compute expressions or rename columns")
+            if columns != ["*"]:
+                columns = [c if "." in c else f"{table}.{c}" for c in columns]
+            query = {"action": "select_join", "columns": columns, "tables": [table],
+                     "joins": [], "condition": query.get("condition")}
+        join = self._join_setup(query)
+        if any(ts.view for ts in join["schemas"].values()):
+            raise ValueError("A materialized view cannot read another materialized view")
+
+        # Bare column names, qualified as table_column where two tables share one
+        names = [col for _, _, col in join["output"]]
+        columns, output = {}, []
+        for _, table, col in join["output"]:
+            column = col if names.count(col) == 1 else f"{table}_{col}"
+            columns[column] = {"type": join["schemas"][table].types[col]}
+            output.append([column, table, col])
+        # Where each view row came from, so base table changes can find the rows they affect
+        for table in query["tables"]:
+            columns[_lineage_column(table)] = {"type": "TEXT", "hidden": True, "index": True}
+        if len(columns) != len(output) + len(query["tables"]):
+            raise ValueError(f"Materialized view '{name}' would have duplicate column names")
+
+        schema = {"columns": columns, "table_constraints": [], "view": {"query": query, "output": output}}
+        self.catalog.create_table(name, schema)
+        self._bump(name)
+        view = self.catalog.get_table(name)
+        self.storage.create_table(name, list(columns))
+        try:
+            rows = self._rematerialize(view)
+        except ValueError:
+            self._remove(view)
+            raise
+        logger.info("Materialized view '%s' created with %d rows", name, rows)
+        return {"view": name, "rows": rows}
+
+    def _refresh_view(self, ast, plan=None):
+        view = self._view(ast["view"])
+        return {"refreshed": view.name, "rows": self._rematerialize(view)}
+
+    def _drop_view(self, ast, plan=None):
+        return self._remove(self._view(ast["view"]))
+
+    def _create_index(self, ast, plan=None):
+        name, table, col = ast["index"], ast["table"], ast["column"]
+        include = list(dict.fromkeys(ast.get("include", [])))
+        ts = self._table(table)
+        self._check_columns(ts, [col, *include])
+        if col in include:
+            raise ValueError(f"Index '{name}' cannot INCLUDE its key column '{col}'")
+        for other, spec in ts.indexes.items():
+            if spec["column"] == col:
+                raise ValueError(f"Column '{table}.{col}' already has index '{other}'")
+        spec = {"column": col, "include": include}
+        if ast.get("using"):
+            spec["using"] = ast["using"]
+        self.catalog.create_index(table, name, spec)
+        ts = self._table(table)
+        for segment in ts.segments:
+            self._rebuild_indexes(segment, ts, [col])
+        self._bump(table)
+        return {"created_index": name, "table": table, "column": col, "include": include,
+                **({"using": spec["using"]} if "using" in spec else {})}
+
+    def _advise_indexes(self, ast, plan=None):
+        candidates = advisor.advise(self)
+        if ast.get("apply"):
+            advisor.apply(self, candidates, self.auto_index.budget if self.auto_index else None)
+        return candidates
+
+    def _drop_index(self, ast, plan=None):
+        name = ast["index"]
+        table = self.catalog.find_index(name)
+        if table is None:
+            raise ValueError(f"Index '{name}' does not exist")
+        col = self._table(table).indexes[name]["column"]
+        self.catalog.drop_index(name)
+        ts = self._table(table)
+        for segment in ts.segments:
+            if col in ts.indexed:
+                # Still needed for a key or constraint: keep it as a plain index
+                self._rebuild_indexes(segment, ts, [col])
+            else:
+                drop_index_files(segment, col)
+        self._bump(table)
+        return {"dropped_index": name}
+
 
     def drop_all_tables(self):
-        schema = self.catalog.list_tables()
-        for table in schema:
-            try:
-                self._drop_table({"table": table})
-            except Exception:
-                pass
+        # Referencing tables must go first, so keep sweeping while progress is made
+        remaining = self.catalog.list_tables()
+        while remaining:
+            for table in remaining:
+                try:
+                    if self.catalog.get_table(table).view:
+                        self._drop_view({"view": table})
+                    else:
+                        self._drop_table({"table": table})
+                except Exception:
+                    pass
+            left = self.catalog.list_tables()
+            if len(left) == len(remaining):
+                break
+            remaining = left
         return {"dropped_all": True}
 
 
     # -----------------------------
     # Helpers: constraints & types
     # -----------------------------
-    def _enforce_primary_key(self, schema, rows, row, table, skip_index=None):
-        pk_cols = [c for c, meta in schema["columns"].items() if meta.get("primary_key")]
-        for pk in pk_cols:
-            for i, r in enumerate(rows):
-                if skip_index is not None and i == skip_index:
+    def _table(self, table):
+        ts = self.catalog.get_table(table)
+        if ts is None:
+            raise ValueError(f"Table '{table}' does not exist")
+        return ts
+
+    def _view(self, name):
+        ts = self._table(name)
+        if not ts.view:
+            raise ValueError(f"'{name}' is not a materialized view")
+        return ts
+
+    def _check_writable(self, ts):
+        if ts.view:
+            raise ValueError(f"'{ts.name}' is a materialized view; it only changes with the tables it reads")
+
+    def _read(self, ts, columns=None):
+        """Every row of the table as Records (see rdbms.rows) of `columns`
+        (default: all of them), segment by segment."""
+        columns = ts.columns if columns is None else columns
+        rows = []
+        for segment in ts.segments:
+            rows.extend(self.storage.read_all(segment, columns))
+        return rows
+
+    def _matching(self, ts, condition, use_index=None, columns=None):
+        """(segment, row id, row) for every row matching `condition` (every row without one).
+        Index probes narrow the candidates when use_index (by default whenever an
+        index applies); the predicate rechecks what they cannot decide. Rows are
+        Records of `columns` (default: all), which must include those the condition reads."""
+        columns = ts.columns if columns is None else columns
+        if not condition:
+            for segment in ts.segments:
+                for row_id, r in self.storage.scan(segment, columns=columns):
+                    yield segment, row_id, r
+            return
+        match = self._predicate(ts, condition)
+        segments = self._prune(ts, condition)
+        if use_index is None:
+            use_index = self._index_columns(ts, condition) is not None
+        if use_index:
+            for segment in segments:
+                row_ids = self._candidates(ts, segment, condition)
+                if row_ids:
+                    for row_id, r in self.storage.fetch_pairs(segment, row_ids, columns):
+                        if match(r):
+                            yield segment, row_id, r
+        else:
+            probe = self._probe(ts, condition)
+            scanned = matched = 0
+            for segment in segments:
+                pairs = self.storage.scan(segment, probe, columns)
+                scanned += len(pairs)
+                for row_id, r in pairs:
+                    if match(r):
+                        matched += 1
+                        yield segment, row_id, r
+            unindexed = advisor.unindexed_filters(ts, condition, len(segments))
+            if unindexed:
+                self.workload.record(ts.name, unindexed, "filter", scanned, matched)
+
+    def _prune(self, ts, condition):
+        segments = ts.prune(condition)
+        _metrics.add("partitions_pruned", len(ts.segments) - len(segments))
+        return segments
+
+    def _predicate(self, ts, condition):
+        """Row filter for a WHERE tree on one table (see rdbms.expressions)."""
+        def resolve(col):
+            if not ts.has_column(col):
+                raise ValueError(f"Column '{col}' does not exist in table '{ts.name}'")
+            return ts, col, lambda r: r.get(col)
+        return self._compile(condition, resolve)
+
+    def _compile(self, condition, resolve):
+        """Compile a WHERE tree; resolve(column) -> (TableSchema, column, getter).
+        `=` and IN compare raw values, the other operators compare in the
+        column's natural order."""
+        def leaf(cond):
+            ts, col, get = resolve(cond["column"])
+            op = cond.get("op", "=")
+            if op == "=":
+                val = cond["value"]
+                test = lambda v: v == val
+            elif op == "in":
+                test = set(cond["values"]).__contains__
+            else:
+                coerce, compare = ts.coercers[col], COMPARE[op]
+                try:
+                    key = coerce(cond["value"])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Cannot compare column '{col}' ({ts.types[col]}) with '{cond['value']}'")
+                test = lambda v: compare(coerce(v), key)
+
+            def match(r):
+                v = get(r)
+                return None if v is None else test(v)
+            return match
+        return predicate(condition, leaf)
+
+    def _index_columns(self, ts, expr):
+        """Indexed columns whose probes can narrow `expr` down, or None if it needs a scan:
+        `=`/IN on an indexed column, an AND with any such part, an OR made only of them."""
+        if "and" in expr:
+            parts = [self._index_columns(ts, e) for e in expr["and"]]
+            columns = [c for part in parts if part for c in part]
+        elif "or" in expr:
+            parts = [self._index_columns(ts, e) for e in expr["or"]]
+            columns = [c for part in parts for c in part] if all(parts) else None
+        elif "not" in expr:
+            return None
+        else:
+            indexable = expr["column"] in ts.indexed and expr.get("op", "=") in ("=", "in")
+            columns = [expr["column"]] if indexable else None
+        return list(dict.fromkeys(columns)) if columns else None
+
+    def _candidates(self, ts, segment, expr):
+        """Row ids in `segment` that may satisfy `expr` according to its indexes,
+        or None where the indexes cannot tell (see _index_columns)."""
+        if "and" in expr:
+            found = None
+            for part in expr["and"]:
+                if self._index_columns(ts, part) is None:
                     continue
-                if r.get(pk) == row.get(pk):
-                    raise ValueError(f"Duplicate primary key '{pk}={row.get(pk)}' in table '{table}'")
-
-    def _enforce_unique(self, schema, rows, row, table, skip_index=None):
-        unique_cols = [c for c, meta in schema["columns"].items() if meta.get("unique")]
-        for uc in unique_cols:
-            for i, r in enumerate(rows):
-                if skip_index is not None and i == skip_index:
+                ids = self._candidates(ts, segment, part)
+                found = ids if found is None else found & ids
+                if not found:
+                    break
+            return found
+        if "or" in expr:
+            if self._index_columns(ts, expr) is None:
+                return None
+            return set().union(*(self._candidates(ts, segment, part) for part in expr["or"]))
+        if self._index_columns(ts, expr) is None:
+            return None
+        values = [expr["value"]] if expr.get("op", "=") == "=" else expr["values"]
+        hits = Index(segment, expr["column"]).lookup_many(values)
+        return {row_id for ids in hits.values() for row_id in ids}
+
+    def _covering_index(self, ts, condition, needed):
+        """The column whose index alone narrows `condition` and holds every column
+        it and the `needed` output read (see CREATE INDEX ... INCLUDE), or None."""
+        columns = self._index_columns(ts, condition)
+        if columns is None or len(columns) != 1:
+            return None
+        col = columns[0]
+        read = set(needed) | {leaf["column"] for leaf in leaves(condition)}
+        return col if read <= {col, *ts.includes.get(col, ())} else None
+
+    def _index_only(self, ts, condition):
+        """Rows matching `condition` rebuilt from the entries of its covering index,
+        in row id order per segment; None if a probed value could be a NULL's key."""
+        col = self._index_columns(ts, condition)[0]
+        values = self._index_values(ts, condition)
+        if "None" in values:
+            return None
+        include = ts.includes.get(col, [])
+        match = self._predicate(ts, condition)
+        rows = []
+        for segment in self._prune(ts, condition):
+            found = []
+            for key, entries in Index(segment, col).lookup_entries(values).items():
+                for row_id, *included in entries:
+                    row = {c: v for c, v in zip(include, included) if v is not None}
+                    row[col] = key
+                    if match(row):
+                        found.append((int(row_id), {c: row[c] for c in ts.columns if c in row}))
+            found.sort(key=lambda pair: pair[0])
+            rows.extend(row for _, row in found)
+        return rows
+
+    def _index_values(self, ts, expr):
+        """Index keys the probes for `expr` look up, where they all probe one column."""
+        if "and" in expr:
+            parts = [self._index_values(ts, e) for e in expr["and"] if self._index_columns(ts, e)]
+            return set.intersection(*parts)
+        if "or" in expr:
+            return set().union(*(self._index_values(ts, e) for e in expr["or"]))
+        return {str(v) for v in ([expr["value"]] if expr.get("op", "=") == "=" else expr["values"])}
+
+    def _projection(self, ts, items):
+        """([(output name, getter)], columns read) for a single-table select list:
+        columns (bare or table.column, renamed by AS) and arithmetic trees (see
+        parser._parse_select_item) over INTEGER/FLOAT columns and numbers.
+        Arithmetic on NULL is NULL; integer division truncates toward zero."""
+        def column(ref):
+            table, _, col = ref.rpartition(".")
+            if table and table != ts.name or not ts.has_column(col) or col in ts.hidden:
+                raise ValueError(f"Column '{ref}' does not exist in table '{ts.name}'")
+            read.add(col)
+            return col
+
+        def compile(expr):
+            if "column" in expr:
+                col = column(expr["column"])
+                coerce = ts.coercers[col]
+                if coerce not in (int, float):
+                    raise ValueError(f"Column '{col}' ({ts.types[col]}) cannot be used in arithmetic")
+                return lambda r: None if r.get(col) is None else coerce(r[col])
+            if "value" in expr:
+                num = _number(expr["value"])
+                return lambda r: num
+            args = [compile(arg) for arg in expr["args"]]
+            if expr["op"] == "neg":
+                return lambda r: None if (v := args[0](r)) is None else -v
+            fn = ARITHMETIC[expr["op"]]
+            left, right = args
+
+            def apply(r):
+                a, b = left(r), right(r)
+                return None if a is None or b is None else fn(a, b)
+            return apply
+
+        read, output = set(), []
+        for item in items:
+            if isinstance(item, str):
+                item = {"expr": {"column": item}, "name": item}
+            if list(item["expr"]) == ["column"]:
+                col = column(item["expr"]["column"])
+                output.append((item["name"], lambda r, col=col: r.get(col)))
+            else:
+                fn = compile(item["expr"])
+                output.append((item["name"], lambda r, fn=fn: None if (v := fn(r)) is None else str(v)))
+        names = [name for name, _ in output]
+        if len(set(names)) != len(names):
+            raise ValueError("Selected column names must be unique; use AS to rename one")
+        return output, read
+
+    def _probe(self, ts, condition):
+        """Block-skipping probe for `condition`, or None where synopses cannot judge it.
+        For an AND, any one part's probe is safe to skip by."""
+        if "and" in condition:
+            probes = (self._probe(ts, part) for part in condition["and"])
+            return next((probe for probe in probes if probe is not None), None)
+        if not is_condition(condition):
+            return None
+        col, op = condition["column"], condition.get("op", "=")
+        if op == "in" or not ts.has_column(col):
+            return None
+        coerce = ts.coercers[col]
+        if op != "=" and coerce not in (int, float, str):
+            return None
+        return Probe(col, op, condition["value"], numeric=coerce in (int, float))
+
+    def _join_column(self, schemas, ref):
+        """(table, column) for a `table.column` or unambiguous bare column of a join."""
+        if "." in ref:
+            table, col = ref.split(".")
+            if table not in schemas:
+                raise ValueError(f"Unknown table qualifier '{table}' in column '{ref}'")
+            if not schemas[table].has_column(col):
+                raise ValueError(f"Column '{col}' does not exist in table '{table}'")
+            return table, col
+        owners = [t for t, ts in schemas.items() if ts.has_column(ref)]
+        if not owners:
+            raise ValueError(f"Column '{ref}' does not exist in any joined table")
+        if len(owners) > 1:
+            raise ValueError(f"Column '{ref}' is ambiguous; qualify it as table.column")
+        return owners[0], ref
+
+    def _tuple_column(self, schemas, ref):
+        """_compile() resolver for columns of joined {table: row} tuples."""
+        table, col = self._join_column(schemas, ref)
+        return schemas[table], col, lambda tup: tup[table].get(col)
+
+    def _join_edge(self, schemas, earlier, join):
+        """(table, column, table, column) for `JOIN table ON a.x = b.y`, earlier side first."""
+        table = join["table"]
+        (a, ac), (b, bc) = (self._join_column(schemas, join[side]) for side in ("left", "right"))
+        if a == table:
+            (a, ac), (b, bc) = (b, bc), (a, ac)
+        if b != table or a not in earlier:
+            raise ValueError(f"JOIN {table} ON must compare a column of '{table}' with one of an earlier table")
+        return a, ac, b, bc
+
+    def _join_setup(self, ast):
+        """Validate a select_join AST and split its WHERE clause: AND parts that
+        read one table are pushed down to it, the others filter joined tuples
+        as soon as all their tables are in."""
+        tables = ast["tables"]
+        schemas = {t: self._table(t) for t in tables}
+        if len(schemas) != len(tables):
+            raise ValueError("A table can only appear once in a join")
+        edges = [self._join_edge(schemas, tables[:i], join) for i, join in enumerate(ast["joins"], 1)]
+
+        pushed, residual = {}, []
+        condition = ast.get("condition")
+        for part in conjuncts(condition) if condition else []:
+            owners = {self._join_column(schemas, c["column"])[0] for c in leaves(part)}
+            if len(owners) == 1:
+                bare = rename(part, lambda ref: self._join_column(schemas, ref)[1])
+                pushed.setdefault(owners.pop(), []).append(bare)
+            else:
+                residual.append((owners, part))
+
+        if ast["columns"] == ["*"]:
+            output = [(f"{t}.{c}", t, c) for t in tables for c in schemas[t].visible]
+        else:
+            output = []
+            for ref in ast["columns"]:
+                if "." not in ref:
+                    raise ValueError(f"Selected column '{ref}' must be qualified as table.column")
+                output.append((ref, *self._join_column(schemas, ref)))
+        return {"schemas": schemas, "edges": edges, "pushed": pushed, "residual": residual, "output": output}
+
+    def _join_tuples(self, join, plan=None, lineage=False, seed=None):
+        """Lazily join the tables of a _join_setup() result into {table: row} tuples.
+        With lineage, tuples also map ("rid", table) to the "segment:row id" the
+        table's row came from; `seed` = (table, [(lineage, row), ...]) joins just
+        those rows in place of that table's contents."""
+        schemas, pushed = join["schemas"], join["pushed"]
+        filters = {t: parts[0] if len(parts) == 1 else {"and": parts} for t, parts in pushed.items()}
+        lineage = lineage or seed is not None
+
+        stats = {}
+        for table, ts in schemas.items():
+            unique = ts.unique + (ts.primary_key if len(ts.primary_key) == 1 else [])
+            if seed is not None and table == seed[0]:
+                # No indexes: the seeded rows are not the ones the table's indexes point at
+                stats[table] = TableStats(table, len(seed[1]), unique)
+            else:
+                rows = sum(self.storage.garbage(segment)[1] for segment in ts.segments)
+                stats[table] = TableStats(table, rows, unique, ts.indexed)
+            for part in pushed.get(table, ()):
+                if is_condition(part):
+                    op = part.get("op", "=")
+                    stats[table].restrict(part["column"], op, len(part["values"]) if op == "in" else 1)
+                else:
+                    stats[table].restrict(None, None)
+        steps = order_joins(stats, join["edges"])
+        if seed is None:
+            self._record_join_scans(join, stats, steps)
+        stmt = _metrics.current()
+        if stmt is not None and plan is not None:
+            stmt.plan = dict(plan, join_order=[[table, method] for table, method, _ in steps])
+
+        def source(table):
+            condition = filters.get(table)
+            if seed is None or table != seed[0]:
+                return self._join_input(table, condition, lineage)
+            match = self._predicate(schemas[table], condition) if condition else None
+            return [(rid, row) for rid, row in seed[1] if match is None or match(row)]
+
+        # Each step consumes the previous one's tuples lazily
+        residual = list(join["residual"])
+        first = steps[0][0]
+        tuples = (_joined({}, first, rid, row) for rid, row in source(first))
+        joined = set()
+        for table, method, keys in steps:
+            if method == "index":
+                tuples = self._index_join(tuples, schemas[table], keys, filters.get(table), lineage)
+            elif method == "hash":
+                tuples = self._hash_join(tuples, table, keys, lambda table=table: source(table))
+            joined.add(table)
+            for owners, part in [r for r in residual if r[0] <= joined]:
+                residual.remove((owners, part))
+                tuples = filter(self._compile(part, lambda ref: self._tuple_column(schemas, ref)), tuples)
+        return tuples
+
+    def _record_join_scans(self, join, stats, steps):
+        """Report join inputs read in full on a join column without an index to
+        the advisor, with the optimizer's estimates of what index lookups from
+        the other side would have read instead."""
+        for table, method, _ in steps:
+            s, ts = stats[table], join["schemas"][table]
+            if method == "index" or ts.view or s.access_cost < s.base_rows:
+                continue
+            for a, ac, b, bc in join["edges"]:
+                if table not in (a, b):
+                    continue
+                col, other = (ac, b) if a == table else (bc, a)
+                if col in ts.indexed:
                     continue
-                if r.get(uc) == row.get(uc):
-                    raise ValueError(f"Duplicate unique value '{uc}={row.get(uc)}' in table '{table}'")
-
-    def _enforce_composite_unique(self, schema, rows, row, table, skip_index=None):
-        for c in schema.get("table_constraints", []):
-            if c.get("type") == "unique":
-                cols = c.get("columns", [])
-                for i, r in enumerate(rows):
-                    if skip_index is not None and i == skip_index:
+                lookups = max(1, round(stats[other].rows))
+                matched = round(min(s.rows, lookups * s.rows / s.distinct(col)))
+                self.workload.record(table, {col: lookups * len(ts.segments)}, "join", round(s.access_cost), matched)
+
+    def _join_input(self, table, condition, lineage=False):
+        """(lineage, row) for the rows of one join input with its pushed-down WHERE
+        condition applied; lineage is "segment:row id" if asked for, else None."""
+        ts = self._table(table)
+        return [(f"{segment}:{row_id}" if lineage else None, row)
+                for segment, row_id, row in self._matching(ts, condition)]
+
+    def _hash_join(self, tuples, table, keys, load):
+        """Join `tuples` with the (lineage, row) pairs load() returns, hashed on `keys`."""
+        built = {}
+        with _metrics.span("join.hash_build"):
+            for rid, row in load():
+                key = _inner_key(row, keys)
+                if key is not None:
+                    built.setdefault(key, []).append((rid, row))
+        for tup in tuples:
+            for rid, row in built.get(_outer_key(tup, keys), ()):
+                yield _joined(tup, table, rid, row)
+
+    def _index_join(self, tuples, ts, keys, condition, lineage=False):
+        """Probe the index of the first indexed join column, JOIN_BATCH outer tuples at a time."""
+        outer, outer_col, col = next(k for k in keys if k[2] in ts.indexed)
+        match = self._predicate(ts, condition) if condition else None
+        while True:
+            batch = list(itertools.islice(tuples, JOIN_BATCH))
+            if not batch:
+                return
+            values = {str(tup[outer][outer_col]) for tup in batch if tup[outer].get(outer_col) is not None}
+            wanted = {s for v in values for s in ts.prune({"column": col, "value": v})}
+            found = {}
+            with _metrics.span("join.index_lookup"):
+                for segment in ts.segments:
+                    if segment not in wanted:
                         continue
-                    if all(r.get(col) == row.get(col) for col in cols):
-                        raise ValueError(
-                            f"Duplicate composite unique ({', '.join(cols)}) in table '{table}'"
-                        )
+                    hits = Index(segment, col).lookup_many(values)
+                    row_ids = [i for ids in hits.values() for i in ids]
+                    for row_id, row in self.storage.fetch_pairs(segment, row_ids, ts.columns) if row_ids else ():
+                        if match is None or match(row):
+                            rid = f"{segment}:{row_id}" if lineage else None
+                            found.setdefault(_inner_key(row, keys), []).append((rid, row))
+            for tup in batch:
+                for rid, row in found.get(_outer_key(tup, keys), ()):
+                    yield _joined(tup, ts.name, rid, row)
+
+    def _lookup(self, table, col, val):
+        """[(segment, row_ids)] for the segments whose `col` index holds `val`."""
+        ts = self._table(table)
+        hits = []
+        for segment in ts.prune({"column": col, "value": val}):
+            row_ids = Index(segment, col).lookup(val)
+            if row_ids:
+                hits.append((segment, row_ids))
+        return hits
+
+    def _append(self, ts, segment, row):
+        """Append `row` to `segment` and index it; returns its row id."""
+        row_id = self.storage.insert(segment, row)
+        self._bump(ts.name)
+        for col in ts.indexed:
+            _, value, row_id_str, included = ts.index_entry(col, row, row_id)
+            Index(segment, col).add(value, row_id_str, included)
+        if self.catalog.get_views_on(ts.name):
+            self._maintain_views(ts, segment, added=[(row_id, row)])
+        return row_id
+
+    def _check_columns(self, ts, row):
+        for col in row:
+            if not ts.has_column(col):
+                raise ValueError(f"Column '{col}' does not exist in table '{ts.name}'")
+
+    def _enforce_primary_key(self, ts, rows, row, skip_index=None):
+        for pk in ts.primary_key:
+            if row.get(pk) in _others(column(rows, pk), skip_index):
+                raise ValueError(f"Duplicate primary key '{pk}={row.get(pk)}' in table '{ts.name}'")
+
+    def _enforce_unique(self, ts, rows, row, skip_index=None):
+        for uc in ts.unique:
+            if row.get(uc) in _others(column(rows, uc), skip_index):
+                raise ValueError(f"Duplicate unique value '{uc}={row.get(uc)}' in table '{ts.name}'")
+
+    def _enforce_composite_unique(self, ts, rows, row, skip_index=None):
+        for cols in ts.composite_unique:
+            keys = list(zip(*(column(rows, col) for col in cols)))
+            if tuple(row.get(col) for col in cols) in _others(keys, skip_index):
+                raise ValueError(
+                    f"Duplicate composite unique ({', '.join(cols)}) in table '{ts.name}'"
+                )
 
-    def _enforce_types(self, schema, row):
-        for col, meta in schema["columns"].items():
+    def _enforce_changed_keys(self, ts, targets):
+        """PRIMARY KEY and UNIQUE checks for UPDATE targets [(segment, row id, row,
+        new row)]. Only keys a row changes can clash: each new key is checked
+        against the rows as they were (single columns through their indexes,
+        composite keys by reading just their columns) and against the other
+        targets' new keys."""
+        groups = [([c], "primary key") for c in ts.primary_key]
+        groups += [([c], "unique value") for c in ts.unique if c not in ts.primary_key]
+        groups += [(cols, None) for cols in ts.composite_unique]
+        for cols, kind in groups:
+            changed = [(segment, str(row_id), new) for segment, row_id, old, new in targets
+                       if any(old.get(c) != new.get(c) for c in cols)]
+            if not changed:
+                continue
+            holders = {}  # key -> {(segment, row id), ...} before the update
+            if kind:
+                col = cols[0]
+                key = lambda row: str(row.get(col))
+                values = {key(new) for _, _, new in changed}
+                for segment in ts.segments:
+                    for value, ids in Index(segment, col).lookup_many(values).items():
+                        holders.setdefault(value, set()).update((segment, i) for i in ids)
+            else:
+                key = lambda row: tuple(row.get(c) for c in cols)
+                for segment in ts.segments:
+                    for row_id, r in self.storage.scan(segment, columns=cols):
+                        holders.setdefault(key(r), set()).add((segment, str(row_id)))
+            seen = set()
+            for segment, row_id, new in changed:
+                k = key(new)
+                if k in seen or holders.get(k, set()) - {(segment, row_id)}:
+                    if kind:
+                        raise ValueError(f"Duplicate {kind} '{cols[0]}={new.get(cols[0])}' in table '{ts.name}'")
+                    raise ValueError(f"Duplicate composite unique ({', '.join(cols)}) in table '{ts.name}'")
+                seen.add(k)
+
+    def _enforce_foreign_keys(self, ts, row):
+        for col, ref in ts.foreign_keys:
             val = row.get(col)
             if val is None:
                 continue
-            col_type = meta["type"].upper()
+            if ref["table"] == ts.name and row.get(ref["column"]) == val:
+                continue  # self-referencing row
+            # Referenced columns are always PK/UNIQUE, so this is a single index probe
+            if not self._lookup(ref["table"], ref["column"], val):
+                raise ValueError(
+                    f"Foreign key violation: '{col}={val}' not found in '{ref['table']}.{ref['column']}'"
+                )
 
-            if col_type == "INTEGER":
-                if not str(val).isdigit():
-                    raise ValueError(f"Column '{col}' expects INTEGER, got '{val}'")
-            elif col_type == "FLOAT":
-                try:
-                    float(val)
-                except Exception:
-                    raise ValueError(f"Column '{col}' expects FLOAT, got '{val}'")
-            elif col_type == "BOOLEAN":
-                if str(val).upper() not in ["TRUE", "FALSE"]:
-                    raise ValueError(f"Column '{col}' expects BOOLEAN (TRUE/FALSE), got '{val}'")
-            elif col_type == "DATE":
-                if not re.match(r"^\d{4}-\d{2}-\d{2}$", str(val)):
-                    raise ValueError(f"Column '{col}' expects DATE (YYYY-MM-DD), got '{val}'")
-            # TEXT accepts anything
+    def _enforce_delete_restrict(self, table, rows, seen=None):
+        """Fail before any mutation if deleting `rows` would orphan RESTRICT children."""
+        seen = seen if seen is not None else set()
+        for child, col, ref in self.catalog.get_references_to(table):
+            for r in rows:
+                key = r.get(ref["column"])
+                if key is None or (child, col, str(key)) in seen:
+                    continue
+                seen.add((child, col, str(key)))
+                hits = self._lookup(child, col, key)
+                if not hits:
+                    continue
+                if ref["on_delete"] != "cascade":
+                    raise ValueError(
+                        f"Cannot delete '{table}.{ref['column']}={key}': referenced by '{child}.{col}'"
+                    )
+                # Cascaded rows must be deletable themselves
+                child_rows = [r for segment, row_ids in hits for r in self.storage.fetch(segment, row_ids)]
+                self._enforce_delete_restrict(child, child_rows, seen)
+
+    def _cascade_delete(self, table, deleted_rows):
+        for child, col, ref in self.catalog.get_references_to(table):
+            if ref["on_delete"] != "cascade":
+                continue
+            for r in deleted_rows:
+                key = r.get(ref["column"])
+                if key is not None and self._lookup(child, col, key):
+                    self._delete({"table": child, "condition": {"column": col, "value": key}})
 
     # -----------------------------
     # Helpers: index maintenance
     # -----------------------------
-    def _rebuild_indexes(self, table, schema):
-        indexed_cols = [c for c, m in schema["columns"].items() if m.get("primary_key") or m.get("unique")]
-        if not indexed_cols:
+    def _rebuild_indexes(self, segment, ts, columns=None):
+        """Rewrite every index of `segment` (or those on `columns`) from its stored rows in one pass."""
+        columns = ts.indexed if columns is None else columns
+        if not columns:
             return
+        for col, entries in build_entries(self.storage.scan(segment), columns, ts.includes).items():
+            write_index(segment, col, entries, col in ts.hashed)
 
-        rows = self.storage.read_all(table)
+    def _update_indexes(self, segment, removed=(), added=()):
+        """Apply (col, value, row_id) removals and (col, value, row_id[, included values])
+        additions (see TableSchema.index_entry), one load/save per index."""
+        by_col = {}
+        for col, value, row_id in removed:
+            by_col.setdefault(col, ([], []))[0].append((value, row_id))
+        for col, *entry in added:
+            by_col.setdefault(col, ([], []))[1].append(entry)
+        for col, (rem, add) in by_col.items():
+            Index(segment, col).update(rem, add)
 
-        for col in indexed_cols:
-            idx = Index(table, col)
-            # Reset index file
-            with open(idx.file, "w") as f:
-                json.dump({}, f)
-            # Rebuild mappings
-            for i, r in enumerate(rows):
-                idx.add(r.get(col), str(i))
+    # -----------------------------
+    # Helpers: delta log & compaction
+    # -----------------------------
+    def _log_changes(self, ts, segment, changes):
+        if changes:
+            self.storage.write_deltas(segment, changes)
+            self._dirty.add((ts.name, segment))
+            self._bump(ts.name)
+            if self.catalog.get_views_on(ts.name):
+                self._maintain_views(ts, segment, [row_id for row_id, _ in changes],
+                                     [(row_id, r) for row_id, r in changes if r is not None])
+
+    def _bump(self, table):
+        """Invalidate cached results that read `table`. Every insert, update,
+        delete (cascades included) and DDL goes through here."""
+        self.table_versions[table] = self.table_versions.get(table, 0) + 1
+
+    def _compact(self, ts, segment):
+        """Fold `segment`'s deltas into a new base and renumber its indexes."""
+        dead = self.storage.compact(segment)
+        if dead:
+            # Row ids are positions, so compaction renumbers every index entry
+            with _metrics.span("index.remap"):
+                self._rebuild_indexes(segment, ts)
+            # ...and views record row ids as lineage, so they are recomputed
+            for name in self.catalog.get_views_on(ts.name):
+                self._rematerialize(self._table(name))
+        return dead
 
-    def _remap_index_ids_after_compaction(self, table, schema, rows):
-        indexed_cols = [c for c, m in schema["columns"].items() if m.get("primary_key") or m.get("unique")]
-        if not indexed_cols:
+    def _auto_vacuum(self):
+        """Compact segments written by the last statement once garbage reaches vacuum_ratio."""
+        dirty, self._dirty = self._dirty, set()
+        if not self.vacuum_ratio:
             return
+        for table, segment in dirty:
+            ts = self.catalog.get_table(table)
+            if ts is None or segment not in ts.segments:
+                continue
+            dead, live = self.storage.garbage(segment)
+            if dead and dead >= self.vacuum_ratio * (dead + live):
+                self._compact(ts, segment)
+
+    # -----------------------------
+    # Helpers: materialized views
+    # -----------------------------
+    def _view_rows(self, view, seed=None):
+        """Rows of `view` computed from its tables; with a join seed, only those
+        the seeded rows produce (see _join_tuples)."""
+        definition = view.view
+        tables = definition["query"]["tables"]
+        rows = []
+        for tup in self._join_tuples(self._join_setup(definition["query"]), lineage=True, seed=seed):
+            row = {column: tup[t].get(c) for column, t, c in definition["output"]}
+            for t in tables:
+                row[_lineage_column(t)] = tup[("rid", t)]
+            rows.append(row)
+        return rows
+
+    def _rematerialize(self, view):
+        """Replace `view`'s rows with a fresh computation; returns the row count."""
+        with _metrics.span("view.refresh"):
+            rows = self._view_rows(view)
+            self.storage.rewrite(view.name, rows)
+            self._rebuild_indexes(view.name, view)
+        self._bump(view.name)
+        return len(rows)
+
+    def _maintain_views(self, ts, segment, removed=(), added=()):
+        """Carry a change to `segment` of `ts` into the views over it: drop the view
+        rows derived from the `removed` row ids, then add the rows that the `added`
+        (row id, row) pairs produce joined with the other tables as they are now."""
+        for name in self.catalog.get_views_on(ts.name):
+            view = self._table(name)
+            index_removed, index_added = [], []
+            with _metrics.span("view.maintain"):
+                if removed:
+                    lineage = Index(name, _lineage_column(ts.name))
+                    hits = lineage.lookup_many([f"{segment}:{row_id}" for row_id in removed])
+                    row_ids = [i for ids in hits.values() for i in ids]
+                    gone = self.storage.fetch_pairs(name, row_ids) if row_ids else []
+                    index_removed = [(c, r.get(c), str(i)) for i, r in gone for c in view.indexed]
+                    self._log_changes(view, name, [(i, None) for i, _ in gone])
+                if added:
+                    seed = (ts.name, [(f"{segment}:{row_id}", r) for row_id, r in added])
+                    for row in self._view_rows(view, seed):
+                        row_id = self.storage.insert(name, row)
+                        index_added.extend(view.index_entry(c, row, row_id) for c in view.indexed)
+                    if index_added:
+                        self._bump(name)
+                if index_removed or index_added:
+                    self._update_indexes(name, index_removed, index_added)
+
+    def _refresh_stale_views(self):
+        """Recompute views that, or whose tables, changed since the last checkpoint:
+        a crash may have come between a table write and its views' maintenance."""
+        changed = set(self.recovery.get("changed", ()))
+        for name in self.catalog.list_tables():
+            view = self.catalog.get_table(name)
+            if not view.view or not changed:
+                continue
+            tables = [view] + [self.catalog.get_table(t) for t in view.view["query"]["tables"]]
+            if any(segment in changed for ts in tables if ts is not None for segment in ts.segments):
+                self._rematerialize(view)
+
+
+def _lineage_column(table):
+    """View column holding the "segment:row id" of the `table` row each view row came from."""
+    return f"_rid_{table}"
+
+
+def _joined(tup, table, rid, row):
+    """Join tuple `tup` extended with `table`'s `row` (and its lineage unless None)."""
+    out = {**tup, table: row}
+    if rid is not None:
+        out[("rid", table)] = rid
+    return out
+
+
+def _outer_key(tup, keys):
+    """Join key of a partial join tuple; None if any part is null (nulls never match)."""
+    key = tuple(tup[t].get(c) for t, c, _ in keys)
+    return None if None in key else tuple(map(str, key))
+
+
+def _inner_key(row, keys):
+    key = tuple(row.get(col) for _, _, col in keys)
+    return None if None in key else tuple(map(str, key))
+
+
+def _number(value):
+    """A numeric literal of a select list expression as int or float."""
+    for coerce in (int, float):
+        try:
+            return coerce(value)
+        except (TypeError, ValueError):
+            pass
+    raise ValueError(f"'{value}' is not a number and cannot be used in arithmetic")
+
+
+def _others(values, skip_index):
+    """`values` without the one at `skip_index` (the row being checked against the rest)."""
+    if skip_index is not None:
+        values[skip_index] = _SKIPPED
+    return values
+
+
+_SKIPPED = object()
+
 
-        for col in indexed_cols:
-            idx = Index(table, col)
-            with open(idx.file, "w") as f:
-                json.dump({}, f)
-            for i, r in enumerate(rows):
-                idx.add(r.get(col), str(i))
\ No newline at end of file
+def _rows_returned(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        if "row" in result:
+            return 1
+        if "deleted" in result:
+            return result["deleted"]
+        if "updated" in result:
+            return result.get("count", int(bool(result["updated"])))
+    return 0
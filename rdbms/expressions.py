@@ -0,0 +1,69 @@
+# rdbms/expressions.py
+"""WHERE clause trees as the parser produces them.
+
+    {"column": c, "value": v}                     c = v
+    {"column": c, "value": v, "op": "<"}          also <=, >, >=
+    {"column": c, "op": "in", "values": [...]}    c IN (...)
+    {"and": [e, ...]}  {"or": [e, ...]}  {"not": e}
+
+Predicates follow SQL's three-valued logic: a condition on a NULL column
+is unknown (None) rather than false, NOT unknown stays unknown, and a row
+only matches when the whole tree is True.
+"""
+
+
+def is_condition(expr):
+    return "column" in expr
+
+
+def leaves(expr):
+    """Every condition in the tree, left to right."""
+    if is_condition(expr):
+        yield expr
+        return
+    for child in expr.get("and") or expr.get("or") or [expr["not"]]:
+        yield from leaves(child)
+
+
+def conjuncts(expr):
+    """The parts of a top-level AND (nested ANDs flattened); [expr] otherwise."""
+    if "and" not in expr:
+        return [expr]
+    return [part for child in expr["and"] for part in conjuncts(child)]
+
+
+def predicate(expr, leaf):
+    """Predicate for `expr`, returning True, False or None (unknown);
+    `leaf(condition)` compiles a single condition the same way."""
+    if is_condition(expr):
+        return leaf(expr)
+    if "not" in expr:
+        inner = predicate(expr["not"], leaf)
+
+        def negate(row):
+            result = inner(row)
+            return None if result is None else not result
+        return negate
+    parts = [predicate(child, leaf) for child in expr.get("and") or expr["or"]]
+    decisive = "and" not in expr  # the value that settles the result early: False for AND, True for OR
+
+    def combine(row):
+        result = not decisive
+        for part in parts:
+            value = part(row)
+            if value is decisive:
+                return decisive
+            if value is None:
+                result = None
+        return result
+    return combine
+
+
+def rename(expr, column):
+    """Copy of `expr` with every condition's column mapped through `column`."""
+    if is_condition(expr):
+        return dict(expr, column=column(expr["column"]))
+    if "not" in expr:
+        return {"not": rename(expr["not"], column)}
+    key = "and" if "and" in expr else "or"
+    return {key: [rename(child, column) for child in expr[key]]}
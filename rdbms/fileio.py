@@ -0,0 +1,125 @@
+# rdbms/fileio.py
+"""Data directory location and crash-safe file primitives."""
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DATA_DIR = os.environ.get("MINIRDBMS_DATA_DIR", os.path.join(BASE_DIR, "data"))
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# path -> ((inode, size, mtime), lines) so appends need not recount a file;
+# dropped whenever the file is replaced or removed
+_LINE_COUNTS = {}
+# Read size for append_file()
+COPY_CHUNK = 1 << 20
+
+
+def fsync_dir(path):
+    """Persist a rename/create in directory `path` (no-op where unsupported)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, durable=False):
+    """Replace `path` with `data` via tmp file + rename, so readers never see a torn file.
+
+    durable=True also fsyncs the file and its directory before returning.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(data)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    forget_lines(path)
+    if durable:
+        fsync_dir(os.path.dirname(path) or ".")
+
+
+def truncate_torn_tail(path):
+    """Cut a final row that was only partly appended; returns the bytes removed."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return 0
+        # Walk back to the last complete line
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            nl = block.rfind(b"\n")
+            if nl != -1:
+                pos = pos - step + nl + 1
+                break
+            pos -= step
+        f.truncate(pos)
+        f.flush()
+        os.fsync(f.fileno())
+    forget_lines(path)
+    return size - pos
+
+
+def remove_file(path):
+    """Remove `path` if it exists."""
+    if os.path.exists(path):
+        os.remove(path)
+    forget_lines(path)
+
+
+def forget_lines(path):
+    """Drop the cached line count of a file that was replaced or removed."""
+    _LINE_COUNTS.pop(path, None)
+
+
+def count_lines(path):
+    """Number of complete lines in `path` (0 if missing), cached by inode, size and mtime."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0
+    cached = _LINE_COUNTS.get(path)
+    if cached and cached[0] == (st.st_ino, st.st_size, st.st_mtime_ns):
+        return cached[1]
+    with open(path, "rb") as f:
+        count = f.read().count(b"\n")
+    _LINE_COUNTS[path] = ((st.st_ino, st.st_size, st.st_mtime_ns), count)
+    return count
+
+
+def append_lines(path, data):
+    """Append `data` (whole lines) to `path`; returns how many lines preceded it."""
+    count = count_lines(path)
+    with open(path, "a") as f:
+        f.write(data)
+        f.flush()
+        st = os.fstat(f.fileno())
+    _LINE_COUNTS[path] = ((st.st_ino, st.st_size, st.st_mtime_ns), count + data.count("\n"))
+    return count
+
+
+def append_file(path, source):
+    """Append the whole lines of the file `source` to `path` in large sequential
+    writes; returns (lines that preceded them, lines appended, bytes appended)."""
+    count = count_lines(path)
+    lines = size = 0
+    with open(source, "rb") as src, open(path, "ab") as dst:
+        for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+            dst.write(chunk)
+            lines += chunk.count(b"\n")
+            size += len(chunk)
+        dst.flush()
+        st = os.fstat(dst.fileno())
+    _LINE_COUNTS[path] = ((st.st_ino, st.st_size, st.st_mtime_ns), count + lines)
+    return count, lines, size
@@ -1,38 +1,425 @@
 # rdbms/index.py
-import os, json
+import os, json, mmap, struct, threading, zlib
+from array import array
 
-DATA_DIR = "data"
+from rdbms import metrics
+from rdbms.storage import DATA_DIR, atomic_write
+
+# index path -> ((inode, size, mtime), entries), so probes skip re-parsing an unchanged file
+_LOADED = {}
+
+def index_file(table, column, hashed=False):
+    return os.path.join(DATA_DIR, f"{table}_{column}.{'hidx' if hashed else 'idx'}")
+
+def write_index(table, column, entries, hashed=False):
+    """Replace the index on `column` of `table` with {value: entries}, as a
+    HashIndex if `hashed`, removing any file of the other kind."""
+    stale = index_file(table, column, not hashed)
+    if os.path.exists(stale):
+        os.remove(stale)
+        _forget(stale)
+    (HashIndex if hashed else Index)(table, column)._save(entries)
+
+def drop_index_files(table, column):
+    for hashed in (False, True):
+        path = index_file(table, column, hashed)
+        if os.path.exists(path):
+            os.remove(path)
+        _forget(path)
+
+def _forget(path):
+    _LOADED.pop(path, None)
+    _MAPS.pop(path, None)
+
+def build_entries(pairs, columns, includes=None):
+    """Entries for every index on `columns`, built in a single pass over
+    (row id, row) pairs such as Storage.scan() returns. `includes` maps a
+    column to the columns its index covers (see Index)."""
+    includes = includes or {}
+    built = {col: {} for col in columns}
+    for i, row in pairs:
+        row_id = str(i)
+        for col, entries in built.items():
+            include = includes.get(col)
+            included = [row.get(c) for c in include] if include else None
+            entries.setdefault(str(row.get(col)), []).append(_entry(row_id, included))
+    return built
+
+def _entry(row_id, included):
+    return [row_id] + list(included) if included is not None else row_id
+
+def _ids(entries):
+    """Row ids of an index value's entries, covering or not."""
+    return entries if not entries or isinstance(entries[0], str) else [e[0] for e in entries]
 
 class Index:
+    """{str(value): [row id, ...]} for one column of a table segment, in
+    `<segment>_<column>.idx`. A covering index (CREATE INDEX ... INCLUDE)
+    stores [row id, included value, ...] per row instead, so queries that
+    only need those columns are answered from the index alone.
+
+    Index(table, column) opens a HashIndex instead when the column has one
+    (CREATE INDEX ... USING HASH); both answer the same calls."""
+
+    def __new__(cls, table, column):
+        if cls is Index and os.path.exists(index_file(table, column, hashed=True)):
+            cls = HashIndex
+        return super().__new__(cls)
+
     def __init__(self, table, column):
         self.table = table
         self.column = column
-        self.file = os.path.join(DATA_DIR, f"{table}_{column}.idx")
+        self.file = index_file(table, column)
         if not os.path.exists(self.file):
-            with open(self.file, "w") as f:
-                json.dump({}, f)
+            atomic_write(self.file, "{}")
 
     def _load(self):
+        """The entries, parsed again only when the file changed. Callers that
+        modify them must _save() them."""
+        st = os.stat(self.file)
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        metrics.touch(self.file)
+        cached = _LOADED.get(self.file)
+        if cached and cached[0] == key:
+            return cached[1]
         with open(self.file, "r") as f:
-            return json.load(f)
+            idx = json.load(f)
+        metrics.add("bytes_read", st.st_size)
+        _LOADED[self.file] = (key, idx)
+        return idx
 
     def _save(self, idx):
-        with open(self.file, "w") as f:
-            json.dump(idx, f)
+        data = json.dumps(idx)
+        atomic_write(self.file, data)
+        st = os.stat(self.file)
+        _LOADED[self.file] = ((st.st_ino, st.st_size, st.st_mtime_ns), idx)
+        metrics.add("bytes_written", len(data))
+        metrics.touch(self.file)
 
-    def add(self, value, row_id):
-        idx = self._load()
-        idx.setdefault(str(value), []).append(row_id)
-        self._save(idx)
+    def add(self, value, row_id, included=None):
+        self.update(added=[(value, row_id, included)])
 
     def remove(self, value, row_id):
+        self.update(removed=[(value, row_id)])
+
+    def update(self, removed=(), added=()):
+        """Apply (value, row_id) removals then (value, row_id[, included values])
+        additions with one load and save."""
         idx = self._load()
-        if str(value) in idx and row_id in idx[str(value)]:
-            idx[str(value)].remove(row_id)
-            if not idx[str(value)]:
-                del idx[str(value)]
+        for value, row_id in removed:
+            entries = idx.get(str(value))
+            if entries and row_id in _ids(entries):
+                del entries[_ids(entries).index(row_id)]
+                if not entries:
+                    del idx[str(value)]
+        for value, row_id, *included in added:
+            idx.setdefault(str(value), []).append(_entry(row_id, included[0] if included else None))
         self._save(idx)
 
-    def lookup(self, value):
+    def _get(self, values):
+        """{str value: entries} for the values present."""
         idx = self._load()
-        return idx.get(str(value), [])
\ No newline at end of file
+        return {v: idx[v] for v in map(str, values) if v in idx}
+
+    def lookup(self, value):
+        metrics.add("index_probes")
+        with metrics.span("index.lookup"):
+            return list(_ids(self._get([value]).get(str(value), [])))
+
+    def lookup_many(self, values):
+        """{value: row ids} for every value present, with a single load."""
+        metrics.add("index_probes", len(values))
+        with metrics.span("index.lookup"):
+            return {v: list(_ids(entries)) for v, entries in self._get(values).items()}
+
+    def lookup_entries(self, values):
+        """{value: [[row id, included value, ...], ...]} for every value present,
+        plain indexes giving just [row id]."""
+        metrics.add("index_probes", len(values))
+        with metrics.span("index.lookup"):
+            return {v: [[e] if isinstance(e, str) else e for e in entries]
+                    for v, entries in self._get(values).items()}
+
+
+# -----------------------------
+# Extendible hash index
+# -----------------------------
+HASH_MAGIC = b"RDBHASH1"
+PAGE_SIZE = 4096
+# magic, page size, global depth, pages in the file, first directory page, directory pages
+_HEADER = struct.Struct("=8sIIIII")
+# local depth, payload bytes on this page, next page of the bucket (0: none)
+_BUCKET = struct.Struct("=HHI")
+_SLOT = struct.Struct("=I")
+_CAPACITY = PAGE_SIZE - _BUCKET.size
+# Deepest directory (2**20 slots, 4 MB); fuller buckets chain overflow pages instead
+MAX_DEPTH = 20
+# A rebuilt index starts with buckets about this full, leaving room to grow before splitting
+_BUILD_FILL = 0.5
+
+# index path -> ((inode, size), read-only mmap of the file)
+_MAPS = {}
+_MAPS_LOCK = threading.Lock()
+
+def hash_index_size(payload):
+    """Bytes of a hash index built from `payload` bytes of bucket lines."""
+    depth = _build_depth(payload)
+    return PAGE_SIZE * (1 + (1 << depth) + -(-(4 << depth) // PAGE_SIZE))
+
+def _build_depth(payload):
+    depth = 0
+    while payload >> depth > _CAPACITY * _BUILD_FILL and depth < MAX_DEPTH:
+        depth += 1
+    return depth
+
+def _key(value):
+    """A value as bucket pages store it: its index key, JSON-encoded."""
+    return json.dumps(str(value)).encode()
+
+def _hash(key):
+    return zlib.crc32(key)
+
+def _read_bucket(mm, page):
+    """(local depth, payload, pages) of the bucket starting at `page`."""
+    depth, parts, pages = None, [], []
+    while page:
+        offset = page * PAGE_SIZE
+        local, used, following = _BUCKET.unpack_from(mm, offset)
+        if depth is None:
+            depth = local
+        parts.append(mm[offset + _BUCKET.size:offset + _BUCKET.size + used])
+        pages.append(page)
+        page = following
+    return depth, b"".join(parts), pages
+
+def _find(payload, key):
+    """The JSON entries stored for `key` in a bucket payload, or None."""
+    if payload.startswith(key + b"\t"):
+        start = len(key) + 1
+    else:
+        start = payload.find(b"\n" + key + b"\t")
+        if start < 0:
+            return None
+        start += len(key) + 2
+    return payload[start:payload.index(b"\n", start)]
+
+def _parse_bucket(payload):
+    """{key: raw JSON entries} of a bucket payload."""
+    entries = {}
+    for line in payload.splitlines():
+        key, _, raw = line.partition(b"\t")
+        entries[key] = raw
+    return entries
+
+
+class HashIndex(Index):
+    """The same mapping as Index, kept as an extendible hash table of
+    PAGE_SIZE pages in `<segment>_<column>.hidx` (CREATE INDEX ... USING HASH).
+
+    Page 0 is a header; the directory holds 2**depth bucket page numbers,
+    slot = crc32(key) mod 2**depth. A bucket page holds `key<TAB>entries`
+    JSON lines. A bucket that outgrows its page splits on its next hash bit
+    (doubling the directory first when it is as deep as the directory), and
+    a bucket that cannot split continues on overflow pages. A point lookup
+    reads one directory slot and one bucket page through a shared mmap and
+    decodes only the entries it wants, whatever the size of the table; an
+    update rewrites only the pages it changes."""
+
+    def __init__(self, table, column):
+        self.table = table
+        self.column = column
+        self.file = index_file(table, column, hashed=True)
+        if not os.path.exists(self.file):
+            self._save({})
+
+    def _map(self):
+        st = os.stat(self.file)
+        key = (st.st_ino, st.st_size)
+        metrics.touch(self.file)
+        with _MAPS_LOCK:
+            cached = _MAPS.get(self.file)
+            if cached and cached[0] == key:
+                return cached[1]
+            with open(self.file, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if _HEADER.unpack_from(mm, 0)[:2] != (HASH_MAGIC, PAGE_SIZE):
+                raise ValueError(f"'{self.file}' is not a hash index")
+            _MAPS[self.file] = (key, mm)
+            return mm
+
+    def _get(self, values):
+        mm = self._map()
+        _, _, depth, _, dir_page, _ = _HEADER.unpack_from(mm, 0)
+        directory, mask = dir_page * PAGE_SIZE, (1 << depth) - 1
+        found, pages = {}, 0
+        for v in map(str, values):
+            key = _key(v)
+            page, = _SLOT.unpack_from(mm, directory + 4 * (_hash(key) & mask))
+            _, payload, read = _read_bucket(mm, page)
+            pages += len(read)
+            raw = _find(payload, key)
+            if raw is not None:
+                found[v] = json.loads(raw)
+        metrics.add("bytes_read", pages * PAGE_SIZE)
+        return found
+
+    def _load(self):
+        """All {value: entries}, read page by page (for rebuilds and key scans)."""
+        mm = self._map()
+        pages = _Pages(self.file, mm)
+        idx = {}
+        for page in sorted(set(pages.directory)):
+            for key, raw in _parse_bucket(_read_bucket(mm, page)[1]).items():
+                idx[json.loads(key)] = json.loads(raw)
+        metrics.add("bytes_read", len(mm))
+        return idx
+
+    def _save(self, idx):
+        """Rebuild the file from {value: entries}, swapped in atomically."""
+        lines = {_key(v): json.dumps(entries, separators=(",", ":")).encode() for v, entries in idx.items()}
+        depth = _build_depth(sum(len(k) + len(raw) + 2 for k, raw in lines.items()))
+        pages = _Pages(self.file, depth=depth)
+        for key, raw in lines.items():
+            pages.bucket(key)[1][key] = raw
+        tmp = self.file + ".tmp"
+        with open(tmp, "w+b") as f:
+            written = pages.flush(f)
+        os.replace(tmp, self.file)
+        _MAPS.pop(self.file, None)
+        metrics.add("bytes_written", written)
+        metrics.touch(self.file)
+
+    def update(self, removed=(), added=()):
+        """Apply changes in place, rewriting only the pages they touch."""
+        pages = _Pages(self.file, self._map())
+        for value, row_id in removed:
+            pages.remove(_key(value), row_id)
+        for value, row_id, *included in added:
+            pages.add(_key(value), _entry(row_id, included[0] if included else None))
+        with open(self.file, "r+b") as f:
+            written = pages.flush(f)
+        metrics.add("bytes_written", written)
+
+
+class _Pages:
+    """Working copy of a hash index file for one batch of changes. Buckets
+    are read on first use; flush() splits the ones that no longer fit and
+    writes back the changed pages, the directory if it changed and, last,
+    the header."""
+
+    def __init__(self, path, mm=None, depth=0):
+        self.path = path
+        self.mm = mm
+        self.buckets = {}  # first page -> [local depth, {key: raw or parsed entries}, pages]
+        self.dirty = set()
+        if mm is None:
+            # A new file: one bucket per directory slot
+            self.depth, self.dir_page, self.dir_pages = depth, 0, 0
+            self.directory = array("I", range(1, (1 << depth) + 1))
+            self.pages = len(self.directory) + 1
+            for page in self.directory:
+                self.buckets[page] = [depth, {}, [page]]
+            self.dirty.update(self.directory)
+            self.resized = True
+        else:
+            _, _, self.depth, self.pages, self.dir_page, self.dir_pages = _HEADER.unpack_from(mm, 0)
+            start = self.dir_page * PAGE_SIZE
+            self.directory = array("I", mm[start:start + 4 * (1 << self.depth)])
+            self.resized = False
+
+    def bucket(self, key):
+        """The bucket `key` hashes to, marked as changed."""
+        page = self.directory[_hash(key) & ((1 << self.depth) - 1)]
+        bucket = self.buckets.get(page)
+        if bucket is None:
+            depth, payload, pages = _read_bucket(self.mm, page)
+            bucket = self.buckets[page] = [depth, _parse_bucket(payload), pages]
+        self.dirty.add(page)
+        return bucket
+
+    def _entries(self, key):
+        entries = self.bucket(key)[1]
+        found = entries.get(key)
+        if isinstance(found, bytes):
+            found = entries[key] = json.loads(found)
+        return entries, found
+
+    def add(self, key, entry):
+        entries, found = self._entries(key)
+        if found is None:
+            entries[key] = [entry]
+        else:
+            found.append(entry)
+
+    def remove(self, key, row_id):
+        entries, found = self._entries(key)
+        if found and row_id in _ids(found):
+            del found[_ids(found).index(row_id)]
+            if not found:
+                del entries[key]
+
+    def allocate(self):
+        self.pages += 1
+        return self.pages - 1
+
+    def split(self, page):
+        """Move the keys with the next hash bit set to a new bucket; returns its page."""
+        depth, entries, _ = self.buckets[page]
+        if depth == self.depth:
+            self.directory.extend(self.directory)
+            self.depth += 1
+        bit = 1 << depth
+        low = _hash(next(iter(entries))) & (bit - 1)
+        moved = {k: v for k, v in entries.items() if _hash(k) & bit}
+        for k in moved:
+            del entries[k]
+        new = self.allocate()
+        self.buckets[page][0] = depth + 1
+        self.buckets[new] = [depth + 1, moved, [new]]
+        for slot in range(low | bit, len(self.directory), bit << 1):
+            self.directory[slot] = new
+        self.dirty.add(new)
+        self.resized = True
+        return new
+
+    def flush(self, f):
+        """Write the changes to `f`; returns the bytes written."""
+        encoded, queue = {}, list(self.dirty)
+        while queue:
+            page = queue.pop()
+            depth, entries, _ = self.buckets[page]
+            data = b"".join(k + b"\t" + (v if isinstance(v, bytes) else
+                                         json.dumps(v, separators=(",", ":")).encode()) + b"\n"
+                            for k, v in entries.items())
+            if len(data) > _CAPACITY and len(entries) > 1 and depth < MAX_DEPTH:
+                queue.extend((page, self.split(page)))
+                continue
+            encoded[page] = data
+
+        written = 0
+        for page, data in encoded.items():
+            depth, _, pages = self.buckets[page]
+            chunks = [data[i:i + _CAPACITY] for i in range(0, len(data), _CAPACITY)] or [b""]
+            while len(pages) < len(chunks):
+                pages.append(self.allocate())
+            # Overflow pages a shrunken bucket no longer needs stay unused until the next rebuild
+            del pages[len(chunks):]
+            for i, chunk in enumerate(chunks):
+                following = pages[i + 1] if i + 1 < len(chunks) else 0
+                f.seek(pages[i] * PAGE_SIZE)
+                f.write(_BUCKET.pack(depth, len(chunk), following) + chunk.ljust(_CAPACITY, b"\0"))
+                written += PAGE_SIZE
+        if self.resized:
+            data = self.directory.tobytes()
+            needed = -(-len(data) // PAGE_SIZE)
+            if needed > self.dir_pages:
+                # The directory moves to the end of the file; its old pages go unused
+                self.dir_page, self.dir_pages = self.allocate(), needed
+                self.pages += needed - 1
+            f.seek(self.dir_page * PAGE_SIZE)
+            f.write(data.ljust(needed * PAGE_SIZE, b"\0"))
+            written += needed * PAGE_SIZE
+        f.truncate(self.pages * PAGE_SIZE)
+        f.seek(0)
+        f.write(_HEADER.pack(HASH_MAGIC, PAGE_SIZE, self.depth, self.pages, self.dir_page, self.dir_pages))
+        return written + _HEADER.size
@@ -0,0 +1,130 @@
+# rdbms/joins.py
+"""Join graphs, cardinality estimates and join ordering for N-way joins.
+
+    SELECT ... FROM a JOIN b ON a.x = b.y JOIN c ON b.z = c.w [WHERE ...]
+
+The tables are the vertices of a join graph and every ON clause is an
+edge `(table, column, table, column)`. order() returns a left-deep plan:
+exhaustive dynamic programming over connected subsets for up to
+DP_TABLES tables, greedy (cheapest next step) beyond that. Estimates are
+the textbook ones:
+
+    |R join S| = |R| * |S| / max(V(R, a), V(S, b))
+
+where V is a column's number of distinct values: every row for PRIMARY
+KEY / UNIQUE columns, |T| / DUPLICATES otherwise. Each table after the
+first joins either by building a hash table on its rows ("hash") or,
+when its join column is indexed and few outer rows are expected, by
+index lookups ("index"); the cost of a plan is the rows it reads, the
+rows it holds in hash tables and the intermediate rows it produces, so
+hash joins build on the smaller side.
+"""
+
+DP_TABLES = 8
+DUPLICATES = 10
+RANGE_SELECTIVITY = 1 / 3
+# An index lookup (load + fetch) costs about this many rows of a scan
+INDEX_LOOKUP_COST = 4
+# Outer tuples collected per round of index lookups
+JOIN_BATCH = 256
+
+
+class TableStats:
+    """Row estimate for one join input, after its WHERE filter."""
+
+    def __init__(self, name, rows, unique=(), indexed=()):
+        self.name = name
+        self.base_rows = max(0, rows)
+        self.rows = float(self.base_rows)
+        self.unique = set(unique)
+        self.indexed = set(indexed)
+        # Rows read to produce this input on its own (a scan unless restrict() says otherwise)
+        self.access_cost = float(self.base_rows)
+
+    def distinct(self, column):
+        if column in self.unique:
+            return max(1.0, self.rows)
+        return max(1.0, min(self.rows, self.base_rows / DUPLICATES))
+
+    def restrict(self, column, op, values=1):
+        """Account for a `column <op> value` filter on this input (`values`
+        items for IN); restrict(None, None) for any other kind of filter."""
+        if op in ("=", "in"):
+            self.rows *= min(1.0, values / self.distinct(column))
+            if column in self.indexed:
+                self.access_cost = INDEX_LOOKUP_COST * values + self.rows
+        else:
+            self.rows *= RANGE_SELECTIVITY
+
+
+def _keys(edges, joined, table):
+    """[(outer table, outer column, column of `table`)] for edges linking `table` to `joined`."""
+    keys = []
+    for a, ac, b, bc in edges:
+        if b == table and a in joined:
+            keys.append((a, ac, bc))
+        elif a == table and b in joined:
+            keys.append((b, bc, ac))
+    return keys
+
+
+def _step(stats, joined, rows, table, keys):
+    """(cost, output rows, method) of joining `table` to `rows` rows of `joined`."""
+    s = stats[table]
+    out = rows * s.rows
+    for outer, outer_col, col in keys:
+        outer_distinct = min(rows, stats[outer].distinct(outer_col))
+        out /= max(1.0, outer_distinct, s.distinct(col))
+    method, read = "hash", s.access_cost + s.rows
+    if any(col in s.indexed for _, _, col in keys) and rows * INDEX_LOOKUP_COST < read:
+        method, read = "index", rows * INDEX_LOOKUP_COST
+    return read + out, out, method
+
+
+def order(stats, edges):
+    """Left-deep join order for `stats` ({table: TableStats}) joined along
+    `edges`: [(table, method, keys)], where the first method is "scan"
+    and keys are the step's (outer table, outer column, column) pairs."""
+    if len(stats) <= DP_TABLES:
+        return _dynamic(stats, edges)
+    return _greedy(stats, edges)
+
+
+def _dynamic(stats, edges):
+    # subset -> (cost, rows, steps); only connected subsets are ever built
+    best = {frozenset([t]): (s.access_cost, s.rows, [(t, "scan", [])]) for t, s in stats.items()}
+    for size in range(1, len(stats)):
+        for joined, (cost, rows, steps) in [(k, v) for k, v in best.items() if len(k) == size]:
+            for table in stats:
+                if table in joined:
+                    continue
+                keys = _keys(edges, joined, table)
+                if not keys:
+                    continue
+                step_cost, out, method = _step(stats, joined, rows, table, keys)
+                key = joined | {table}
+                if key not in best or cost + step_cost < best[key][0]:
+                    best[key] = (cost + step_cost, out, steps + [(table, method, keys)])
+    everything = frozenset(stats)
+    if everything not in best:
+        raise ValueError("Every joined table must be connected by an ON condition")
+    return best[everything][2]
+
+
+def _greedy(stats, edges):
+    first = min(stats, key=lambda t: (stats[t].rows, t))
+    joined, rows = {first}, stats[first].rows
+    steps = [(first, "scan", [])]
+    while len(joined) < len(stats):
+        choices = []
+        for table in sorted(stats):
+            keys = _keys(edges, joined, table) if table not in joined else None
+            if keys:
+                cost, out, method = _step(stats, joined, rows, table, keys)
+                choices.append((cost, table, out, method, keys))
+        if not choices:
+            raise ValueError("Every joined table must be connected by an ON condition")
+        _, table, rows, method, keys = min(choices, key=lambda c: (c[0], c[1]))
+        joined.add(table)
+        steps.append((table, method, keys))
+    return steps
@@ -0,0 +1,184 @@
+# rdbms/metrics.py
+"""Per-statement execution metrics and in-process aggregation.
+
+Storage and Index report what they do through `add()`/`touch()`; those
+calls land on whichever StatementMetrics the executor bound for the
+statement running in the current thread, and are no-ops otherwise.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+COUNTERS = ("rows_scanned", "rows_returned", "index_probes", "bytes_read", "bytes_written", "blocks_read",
+            "blocks_skipped", "partitions_pruned")
+
+# Seconds; Prometheus-style cumulative buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("rdbms_statement_metrics", default=None)
+
+
+class StatementMetrics:
+    def __init__(self):
+        self.action = None
+        self.plan = None
+        self.parse_ms = 0.0
+        self.plan_ms = 0.0
+        self.exec_ms = 0.0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.files = set()
+        # Per-operator timings; only allocated when the statement is sampled for tracing
+        self.spans = None
+        self.profile_path = None
+
+    @property
+    def total_ms(self):
+        return self.parse_ms + self.plan_ms + self.exec_ms
+
+    def as_dict(self):
+        out = {
+            "action": self.action,
+            "plan": self.plan,
+            "parse_ms": round(self.parse_ms, 4),
+            "plan_ms": round(self.plan_ms, 4),
+            "exec_ms": round(self.exec_ms, 4),
+            "total_ms": round(self.total_ms, 4),
+            **self.counters,
+            "files_touched": len(self.files),
+        }
+        if self.spans is not None:
+            out["spans_ms"] = {name: round(ms, 4) for name, ms in self.spans.items()}
+        if self.profile_path:
+            out["profile"] = self.profile_path
+        return out
+
+
+def bind(stmt):
+    return _current.set(stmt)
+
+
+def unbind(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def add(counter, n=1):
+    stmt = _current.get()
+    if stmt is not None:
+        stmt.counters[counter] += n
+
+
+def touch(path):
+    stmt = _current.get()
+    if stmt is not None:
+        stmt.files.add(path)
+
+
+@contextmanager
+def span(name):
+    """Time a block as operator `name` when the current statement is traced."""
+    stmt = _current.get()
+    if stmt is None or stmt.spans is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stmt.spans[name] = stmt.spans.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+
+class MetricsRegistry:
+    """Thread-safe counters and latency histograms, keyed by statement action."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> callable returning a stats dict, rendered as minirdbms_<name>_<key>
+        self._sources = {}
+        self.reset()
+
+    def register(self, name, stats):
+        """Expose `stats()` (a dict of numbers) with the metrics; None unregisters."""
+        with self._lock:
+            if stats is None:
+                self._sources.pop(name, None)
+            else:
+                self._sources[name] = stats
+
+    def reset(self):
+        with self._lock:
+            self._actions = {}
+
+    def _entry(self, action):
+        entry = self._actions.get(action)
+        if entry is None:
+            entry = {
+                "ok": 0,
+                "error": 0,
+                "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                "seconds": 0.0,
+                "files_touched": 0,
+                **dict.fromkeys(COUNTERS, 0),
+            }
+            self._actions[action] = entry
+        return entry
+
+    def observe(self, stmt, ok):
+        seconds = stmt.total_ms / 1000.0
+        with self._lock:
+            entry = self._entry(stmt.action or "unknown")
+            entry["ok" if ok else "error"] += 1
+            entry["buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            entry["seconds"] += seconds
+            entry["files_touched"] += len(stmt.files)
+            for name in COUNTERS:
+                entry[name] += stmt.counters[name]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                action: {**entry, "buckets": list(entry["buckets"])}
+                for action, entry in self._actions.items()
+            }
+
+    def render_prometheus(self):
+        snap = self.snapshot()
+        lines = [
+            "# HELP minirdbms_statements_total Statements executed, by action and outcome.",
+            "# TYPE minirdbms_statements_total counter",
+        ]
+        for action, entry in sorted(snap.items()):
+            for status in ("ok", "error"):
+                lines.append(f'minirdbms_statements_total{{action="{action}",status="{status}"}} {entry[status]}')
+
+        lines += [
+            "# HELP minirdbms_statement_duration_seconds Parse + plan + execution time per statement.",
+            "# TYPE minirdbms_statement_duration_seconds histogram",
+        ]
+        for action, entry in sorted(snap.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+                cumulative += count
+                lines.append(f'minirdbms_statement_duration_seconds_bucket{{action="{action}",le="{bound}"}} {cumulative}')
+            cumulative += entry["buckets"][-1]
+            lines.append(f'minirdbms_statement_duration_seconds_bucket{{action="{action}",le="+Inf"}} {cumulative}')
+            lines.append(f'minirdbms_statement_duration_seconds_sum{{action="{action}"}} {entry["seconds"]:.6f}')
+            lines.append(f'minirdbms_statement_duration_seconds_count{{action="{action}"}} {cumulative}')
+
+        for name in COUNTERS + ("files_touched",):
+            lines.append(f"# TYPE minirdbms_{name}_total counter")
+            for action, entry in sorted(snap.items()):
+                lines.append(f'minirdbms_{name}_total{{action="{action}"}} {entry[name]}')
+
+        with self._lock:
+            sources = sorted(self._sources.items())
+        for source, stats in sources:
+            for key, value in stats().items():
+                lines.append(f"# TYPE minirdbms_{source}_{key} gauge")
+                lines.append(f"minirdbms_{source}_{key} {value}")
+        return "\n".join(lines) + "\n"
@@ -1,241 +1,519 @@
+"""SQL front end: a single-pass lexer and a recursive-descent parser.
+
+The lexer is one regex sweep that splits the statement into lexemes:
+quoted strings, punctuation (including the `?` placeholder) and bare
+words (keywords, identifiers, numbers, `:name` placeholders). The parser
+walks them left to right without backtracking, classifying each token by
+its upper-cased form, so parsing is linear in the statement length.
+Token offsets are only recomputed when a ParseError needs a position.
+"""
 import re
 
-def parse(sql):
-    sql = sql.strip().rstrip(";")
-    tokens = sql.split()
-    if not tokens:
-        return {"action": "unknown", "raw": sql}
-    command = tokens[0].upper()
-
-    if command == "CREATE":
-        return _parse_create(sql)
-    elif command == "INSERT":
-        return _parse_insert(sql)
-    elif command == "SELECT":
-        return _parse_select(sql)
-    elif command == "UPDATE":
-        return _parse_update(sql)
-    elif command == "DELETE":
-        return _parse_delete(sql)
-    elif command == "DROP":
-        return _parse_drop(sql)
-    else:
-        return {"action": "unknown", "raw": sql}
-
-def _split_top_level(defs: str):
-    """Split by commas that are not inside parentheses."""
-    parts, buf, depth = [], "", 0
-    for ch in defs:
-        if ch == "(":
-            depth += 1
-            buf += ch
-        elif ch == ")":
-            depth = max(0, depth - 1)
-            buf += ch
-        elif ch == "," and depth == 0:
-            parts.append(buf.strip())
-            buf = ""
-        else:
-            buf += ch
-    if buf.strip():
-        parts.append(buf.strip())
-    return parts
+# Reserved words: never accepted as identifiers or bare values
+KEYWORDS = frozenset({
+    "CREATE", "TABLE", "DROP", "INSERT", "INTO", "VALUES", "SELECT", "FROM", "WHERE",
+    "UPDATE", "SET", "DELETE", "INNER", "JOIN", "ON", "PRIMARY", "KEY", "UNIQUE",
+    "FOREIGN", "REFERENCES", "WITH", "PARTITION", "VACUUM", "AND", "OR", "NOT", "IN",
+})
 
-def _parse_create(sql):
-    match = re.match(r"CREATE TABLE (\w+)\s*\((.+)\)$", sql.strip(), re.IGNORECASE)
-    if not match:
-        raise ValueError("Invalid CREATE TABLE syntax")
+PUNCTUATION = frozenset("(),=;*?<>+-/")
+COMPARISONS = frozenset({"=", "<", "<=", ">", ">="})
 
-    table_name = match.group(1)
-    cols_def = match.group(2)
+# A lone `\S` match can only be the quote of an unterminated string
+_TOKEN_RE = re.compile(r"'[^']*(?:''[^']*)*'|[<>]=?|[(),=;*?+\-/]|[^\s'(),=;*?<>+\-/]+|\S")
+_NUMBER_RE = re.compile(r"\d+(\.\d*)?|\.\d+")
+
+
+class ParseError(ValueError):
+    def __init__(self, message, position):
+        super().__init__(message)
+        self.position = position
 
-    columns = {}
-    table_constraints = []
 
-    for col_def in _split_top_level(cols_def):
-        col_def = col_def.strip()
+class Param:
+    """Placeholder for a value bound at execution time: `?` (positional) or `:name`."""
+    __slots__ = ("key",)
 
-        uniq_match = re.match(r"^UNIQUE\s*\((.+)\)$", col_def, re.IGNORECASE)
-        if uniq_match:
-            cols = [c.strip() for c in uniq_match.group(1).split(",")]
-            if not cols or any(not c for c in cols):
-                raise ValueError(f"Invalid UNIQUE constraint: {col_def}")
-            table_constraints.append({"type": "unique", "columns": cols})
-            continue
+    def __init__(self, key):
+        self.key = key  # int position for `?`, str for `:name`
 
-        parts = col_def.split()
-        if len(parts) < 2:
-            raise ValueError(f"Invalid column definition: {col_def}")
+    def __eq__(self, other):
+        return isinstance(other, Param) and other.key == self.key
 
-        col_name = parts[0]
-        col_type = parts[1].upper()
-        constraints = {"primary_key": False, "unique": False}
+    def __hash__(self):
+        return hash(("param", self.key))
 
-        upper_parts = [p.upper() for p in parts[2:]]
-        if "PRIMARY" in upper_parts and "KEY" in upper_parts:
-            constraints["primary_key"] = True
-        if "UNIQUE" in upper_parts:
-            constraints["unique"] = True
+    def __repr__(self):
+        return f":{self.key}" if isinstance(self.key, str) else f"?{self.key}"
 
-        columns[col_name] = {"type": col_type, **constraints}
+
+def tokenize(sql):
+    """Return the statement's lexemes in order."""
+    return _TOKEN_RE.findall(sql)
+
+
+def token_positions(sql):
+    """Character offset of each token returned by tokenize(sql)."""
+    return [m.start() for m in _TOKEN_RE.finditer(sql)]
+
+
+def parse(sql):
+    sql = sql.strip()
+    p = _Parser(sql)
+    handler = _STATEMENTS.get(p.peek())
+    if handler is None:
+        return {"action": "unknown", "raw": sql.rstrip(";")}
+    p.statement = p.peek()
+    ast = handler(p)
+    p.accept(";")
+    if p.peek() != "":
+        p.error("end of statement")
+    return ast
+
+
+# -----------------------------
+# Token cursor
+# -----------------------------
+class _Parser:
+    def __init__(self, sql):
+        self.sql = sql
+        self.texts = tokenize(sql)
+        self.texts.append("")  # end-of-input sentinel
+        self.uppers = list(map(str.upper, self.texts))
+        self.i = 0
+        self.statement = None  # names the statement in error messages
+        self.positional = 0    # next `?` position
+
+    def peek(self):
+        """Upper-cased current token ("" at end of input)."""
+        return self.uppers[self.i]
+
+    def advance(self):
+        text = self.texts[self.i]
+        if text:
+            self.i += 1
+        return text
+
+    def accept(self, token):
+        if self.uppers[self.i] == token:
+            return self.advance()
+        return None
+
+    def expect(self, token, what=None):
+        if self.uppers[self.i] != token:
+            self.error(what or token)
+        return self.advance()
+
+    def position(self, index=None):
+        index = self.i if index is None else index
+        positions = token_positions(self.sql)
+        return positions[index] if index < len(positions) else len(self.sql)
+
+    def fail(self, message, index=None):
+        pos = self.position(index)
+        raise ParseError(f"Invalid {self.statement} syntax at position {pos}: {message}", pos)
+
+    def error(self, expected):
+        text = self.texts[self.i]
+        if text == "'":
+            self.fail("unterminated string literal")
+        self.fail(f"expected {expected}, got {repr(text) if text else 'end of input'}")
+
+    def identifier(self, what="identifier"):
+        text = self.texts[self.i]
+        if not text.isidentifier() or self.uppers[self.i] in KEYWORDS:
+            self.error(what)
+        self.i += 1
+        return text
+
+    def column(self, qualified=False, what="column name"):
+        """A column name; `qualified` allows `table.col`, "required" demands it."""
+        text = self.texts[self.i]
+        parts = text.split(".")
+        ok = len(parts) == 1 and qualified != "required" or len(parts) == 2 and qualified
+        if not ok or not all(part.isidentifier() for part in parts) or self.uppers[self.i] in KEYWORDS:
+            self.error(what)
+        self.i += 1
+        return text
+
+    def column_list(self):
+        self.expect("(")
+        columns = [self.column()]
+        while self.accept(","):
+            columns.append(self.column())
+        self.expect(")", "',' or ')'")
+        return columns
+
+    def value(self):
+        text = self.texts[self.i]
+        first = text[:1]
+        if first == "'" and len(text) > 1:
+            self.i += 1
+            return text[1:-1].replace("''", "'")
+        if text == "?":
+            self.i += 1
+            self.positional += 1
+            return Param(self.positional - 1)
+        if text == "-" and _NUMBER_RE.fullmatch(self.texts[self.i + 1]):
+            self.i += 2
+            return "-" + self.texts[self.i - 1]
+        if first == ":" and text[1:].isidentifier():
+            self.i += 1
+            return Param(text[1:])
+        if not text or first in PUNCTUATION or first in "':" or self.uppers[self.i] in KEYWORDS:
+            self.error("a value")
+        self.i += 1
+        return text
+
+    def condition(self, qualified=False):
+        """`col <op> value` or `col [NOT] IN (v, ...)`; "op" is only present in
+        the AST when it is not `=`, and IN lists carry "values" instead of "value"."""
+        column = self.column(qualified)
+        negated = self.accept("NOT")
+        if negated or self.peek() == "IN":
+            self.expect("IN")
+            self.expect("(")
+            values = [self.value()]
+            while self.accept(","):
+                values.append(self.value())
+            self.expect(")", "',' or ')'")
+            condition = {"column": column, "op": "in", "values": values}
+            return {"not": condition} if negated else condition
+        op = self.texts[self.i]
+        if op not in COMPARISONS:
+            self.error("a comparison (=, <, <=, >, >=, IN)")
+        self.i += 1
+        condition = {"column": column, "value": self.value()}
+        if op != "=":
+            condition["op"] = op
+        return condition
+
+    def expression(self, qualified=False):
+        """A WHERE clause: conditions combined with NOT, AND, OR (binding in
+        that order) and parentheses. A lone condition stays a plain condition
+        dict; compound ones nest as {"and": [...]}, {"or": [...]}, {"not": e}."""
+        terms = [self._conjunction(qualified)]
+        while self.accept("OR"):
+            terms.append(self._conjunction(qualified))
+        return terms[0] if len(terms) == 1 else {"or": terms}
+
+    def _conjunction(self, qualified):
+        factors = [self._factor(qualified)]
+        while self.accept("AND"):
+            factors.append(self._factor(qualified))
+        return factors[0] if len(factors) == 1 else {"and": factors}
+
+    def _factor(self, qualified):
+        if self.accept("NOT"):
+            return {"not": self._factor(qualified)}
+        if self.accept("("):
+            expr = self.expression(qualified)
+            self.expect(")", "')'")
+            return expr
+        return self.condition(qualified)
+
+
+# -----------------------------
+# Statements
+# -----------------------------
+def _parse_create(p):
+    p.expect("CREATE")
+    if p.accept("MATERIALIZED"):
+        return _parse_create_view(p)
+    if p.accept("INDEX"):
+        return _parse_create_index(p)
+    p.expect("TABLE", "TABLE, INDEX or MATERIALIZED VIEW")
+    table_name = p.identifier("table name")
+    p.expect("(")
+
+    columns = {}
+    table_constraints = []
+    while True:
+        start = p.i
+        if p.accept("UNIQUE"):
+            table_constraints.append({"type": "unique", "columns": p.column_list()})
+        elif p.accept("FOREIGN"):
+            p.expect("KEY")
+            cols = p.column_list()
+            if len(cols) != 1:
+                p.fail("FOREIGN KEY takes exactly one column", start)
+            if cols[0] not in columns:
+                p.fail(f"FOREIGN KEY on unknown column: {cols[0]}", start)
+            columns[cols[0]]["references"] = _parse_references(p)
+        else:
+            col_name = p.identifier("column definition")
+            if col_name in columns:
+                p.fail(f"duplicate column {col_name}", start)
+            columns[col_name] = _parse_column_def(p)
+        if not p.accept(","):
+            break
+    p.expect(")", "',' or ')'")
+    partition = _parse_partition(p, columns) if p.peek() == "PARTITION" else None
 
     return {
         "action": "create_table",
         "table": table_name,
         "columns": columns,
-        "table_constraints": table_constraints
+        "table_constraints": table_constraints,
+        "partition": partition,
+        "options": _parse_table_options(p) if p.accept("WITH") else {},
     }
 
-def _parse_insert(sql):
-    match = re.match(r"INSERT INTO (\w+)\s*\((.+)\)\s*VALUES\s*\((.+)\)$", sql.strip(), re.IGNORECASE)
-    if not match:
-        raise ValueError("Invalid INSERT syntax")
-
-    table_name = match.group(1)
-    cols = [c.strip() for c in match.group(2).split(",")]
-    vals_raw = match.group(3)
-
-    vals = _tokenize_top_level(vals_raw, sep=",")
-    vals = [_strip_quotes(v) for v in vals]
-
-    row = dict(zip(cols, vals))
-    return {"action": "insert", "table": table_name, "row": row}
-
-def _parse_select(sql):
-    sql = re.sub(r"\s+", " ", sql.strip())
-
-    join_match = re.match(
-        r"SELECT\s+(.+)\s+FROM\s+(\w+)\s+INNER\s+JOIN\s+(\w+)\s+ON\s+(\w+\.\w+)\s*=\s*(\w+\.\w+)(?:\s+WHERE\s+(.+))?$",
-        sql, re.IGNORECASE
-    )
-    if join_match:
-        cols_raw = join_match.group(1)
-        left_table = join_match.group(2)
-        right_table = join_match.group(3)
-        left_on = join_match.group(4)
-        right_on = join_match.group(5)
-        where_clause = join_match.group(6)
-
-        columns = [c.strip() for c in cols_raw.split(",")]
-
-        condition = None
-        if where_clause:
-            cond_match = re.match(r"(\w+(?:\.\w+)?)\s*=\s*'?(.*?)'?$", where_clause.strip())
-            if not cond_match:
-                raise ValueError("Only simple WHERE col=value supported")
-            condition = {"column": cond_match.group(1), "value": cond_match.group(2)}
-
+def _parse_create_view(p):
+    """`CREATE MATERIALIZED VIEW name AS SELECT ...`: a stored, incrementally maintained query."""
+    p.expect("VIEW")
+    view_name = p.identifier("view name")
+    p.expect("AS")
+    return {"action": "create_view", "view": view_name, "query": _parse_select(p)}
+
+def _parse_create_index(p):
+    """`CREATE INDEX name ON table [USING HASH] (col) [INCLUDE (col, ...)]`:
+    INCLUDE columns are stored in the index so queries needing only them skip
+    the table; USING HASH keeps it as an on-disk extendible hash table."""
+    index_name = p.identifier("index name")
+    p.expect("ON")
+    table_name = p.identifier("table name")
+    using = None
+    if p.accept("USING"):
+        start = p.i
+        using = p.identifier("index method").lower()
+        if using != "hash":
+            p.fail(f"unknown index method {using}; only HASH is supported", start)
+    start = p.i
+    columns = p.column_list()
+    if len(columns) != 1:
+        p.fail("an index has exactly one key column", start)
+    include = p.column_list() if p.accept("INCLUDE") else []
+    ast = {"action": "create_index", "index": index_name, "table": table_name,
+           "column": columns[0], "include": include}
+    if using:
+        ast["using"] = using
+    return ast
+
+def _parse_partition(p, columns):
+    """`PARTITION BY HASH(col) PARTITIONS n` or `PARTITION BY RANGE(col) (bound, ...)`."""
+    p.expect("PARTITION")
+    p.expect("BY")
+    if p.peek() not in ("HASH", "RANGE"):
+        p.error("HASH or RANGE")
+    method = p.advance().lower()
+    p.expect("(")
+    start = p.i
+    column = p.identifier("partition column")
+    if column not in columns:
+        p.fail(f"PARTITION BY on unknown column: {column}", start)
+    p.expect(")")
+    if method == "hash":
+        p.expect("PARTITIONS")
+        return {"method": "hash", "column": column, "partitions": p.value()}
+    p.expect("(", "'(' and range bounds")
+    bounds = [p.value()]
+    while p.accept(","):
+        bounds.append(p.value())
+    p.expect(")", "',' or ')'")
+    return {"method": "range", "column": column, "bounds": bounds}
+
+def _parse_table_options(p):
+    """`WITH (name = value, ...)` storage options, keys lower-cased."""
+    p.expect("(")
+    options = {}
+    while True:
+        start = p.i
+        name = p.identifier("option name").lower()
+        if name in options:
+            p.fail(f"duplicate option {name}", start)
+        p.expect("=")
+        options[name] = p.value()
+        if not p.accept(","):
+            break
+    p.expect(")", "',' or ')'")
+    return options
+
+def _parse_column_def(p):
+    meta = {"type": p.identifier("column type").upper(), "primary_key": False, "unique": False}
+    while True:
+        if p.accept("PRIMARY"):
+            p.expect("KEY")
+            meta["primary_key"] = True
+        elif p.accept("UNIQUE"):
+            meta["unique"] = True
+        elif p.peek() == "REFERENCES":
+            meta["references"] = _parse_references(p)
+        else:
+            return meta
+
+def _parse_references(p):
+    """`REFERENCES table(col) [ON DELETE RESTRICT|CASCADE]`."""
+    p.expect("REFERENCES")
+    table = p.identifier("referenced table")
+    p.expect("(")
+    column = p.identifier("referenced column")
+    p.expect(")")
+    on_delete = "restrict"
+    if p.accept("ON"):
+        p.expect("DELETE")
+        if p.peek() not in ("RESTRICT", "CASCADE"):
+            p.error("RESTRICT or CASCADE")
+        on_delete = p.advance().lower()
+    return {"table": table, "column": column, "on_delete": on_delete}
+
+def _parse_insert(p):
+    p.expect("INSERT")
+    p.expect("INTO")
+    table_name = p.identifier("table name")
+    cols = p.column_list()
+    p.expect("VALUES")
+    start = p.i
+    p.expect("(")
+    vals = [p.value()]
+    while p.accept(","):
+        vals.append(p.value())
+    p.expect(")", "',' or ')'")
+    if len(vals) != len(cols):
+        p.fail(f"{len(cols)} columns but {len(vals)} values", start)
+    return {"action": "insert", "table": table_name, "row": dict(zip(cols, vals))}
+
+def _parse_select(p):
+    p.expect("SELECT")
+    first = p.i
+    if p.accept("*"):
+        columns = ["*"]
+    else:
+        columns = [_parse_select_item(p)]
+        while p.accept(","):
+            columns.append(_parse_select_item(p))
+    p.expect("FROM")
+    table_name = p.identifier("table name")
+
+    if p.peek() in ("INNER", "JOIN"):
+        if any(not isinstance(c, str) for c in columns):
+            p.fail("expressions and aliases are only supported in single-table SELECT", first)
+        tables, joins = [table_name], []
+        while p.peek() in ("INNER", "JOIN"):
+            p.accept("INNER")
+            p.expect("JOIN")
+            right_table = p.identifier("table name")
+            p.expect("ON")
+            left_on = p.column("required", "table.column")
+            p.expect("=")
+            right_on = p.column("required", "table.column")
+            tables.append(right_table)
+            joins.append({"table": right_table, "left": left_on, "right": right_on})
+        condition = p.expression(qualified=True) if p.accept("WHERE") else None
         return {
             "action": "select_join",
             "columns": columns,
-            "left_table": left_table,
-            "right_table": right_table,
-            "on": {"left": left_on, "right": right_on},
+            "tables": tables,
+            "joins": joins,
             "condition": condition
         }
 
-    match = re.match(r"SELECT\s+\*\s+FROM\s+(\w+)(?:\s+WHERE\s+(.+))?$", sql, re.IGNORECASE)
-    if not match:
-        raise ValueError("Invalid SELECT syntax")
-
-    table_name = match.group(1)
-    where_clause = match.group(2)
-
-    condition = None
-    if where_clause:
-        cond_match = re.match(r"(\w+)\s*=\s*'?(.*?)'?$", where_clause.strip())
-        if not cond_match:
-            raise ValueError("Only simple WHERE col=value supported")
-        condition = {"column": cond_match.group(1), "value": cond_match.group(2)}
-
-    return {"action": "select", "table": table_name, "condition": condition}
-
-def _parse_update(sql):
-    m = re.match(r"UPDATE\s+(\w+)\s+SET\s+(.+?)\s+WHERE\s+(.+)$", sql.strip(), re.IGNORECASE)
-    if not m:
-        raise ValueError("Invalid UPDATE syntax")
-
-    table_name = m.group(1)
-    set_clause = m.group(2).strip()
-    where_clause = m.group(3).strip()
-
-    assignments = _tokenize_top_level(set_clause, sep=",")
+    condition = p.expression() if p.accept("WHERE") else None
+    ast = {"action": "select", "table": table_name, "condition": condition}
+    if columns != ["*"]:
+        ast["columns"] = columns
+    return ast
+
+def _parse_select_item(p):
+    """A select list entry: a column name, or {"expr": tree, "name": output name}
+    for arithmetic or an alias (`expr AS name`). Trees are {"column": c},
+    {"value": v} and {"op": "+", "-", "*", "/" or "neg", "args": [...]}."""
+    start = p.i
+    expr = _parse_sum(p)
+    if p.accept("AS"):
+        return {"expr": expr, "name": p.identifier("column alias")}
+    if list(expr) == ["column"]:
+        return expr["column"]
+    last = p.i - 1
+    return {"expr": expr, "name": p.sql[p.position(start):p.position(last) + len(p.texts[last])]}
+
+def _parse_sum(p):
+    expr = _parse_product(p)
+    while p.peek() in ("+", "-"):
+        op = p.advance()
+        expr = {"op": op, "args": [expr, _parse_product(p)]}
+    return expr
+
+def _parse_product(p):
+    expr = _parse_operand(p)
+    while p.peek() in ("*", "/"):
+        op = p.advance()
+        expr = {"op": op, "args": [expr, _parse_operand(p)]}
+    return expr
+
+def _parse_operand(p):
+    if p.accept("("):
+        expr = _parse_sum(p)
+        p.expect(")", "')'")
+        return expr
+    if p.peek() == "-" and not _NUMBER_RE.fullmatch(p.texts[p.i + 1]):
+        p.advance()
+        return {"op": "neg", "args": [_parse_operand(p)]}
+    text = p.texts[p.i]
+    if text[:1].isalpha() or text[:1] == "_":
+        return {"column": p.column(True, "column or expression")}
+    return {"value": p.value()}
+
+def _parse_update(p):
+    p.expect("UPDATE")
+    table_name = p.identifier("table name")
+    p.expect("SET")
     set_map = {}
-    for a in assignments:
-        if "=" not in a:
-            raise ValueError(f"Invalid assignment in SET: {a}")
-        col, val = a.split("=", 1)
-        set_map[col.strip()] = _strip_quotes(val.strip())
-
-    where_match = re.match(r"(\w+)\s*=\s*(.+)$", where_clause)
-    if not where_match:
-        raise ValueError("Only simple WHERE col=value supported")
-    where_col = where_match.group(1)
-    where_val = _strip_quotes(where_match.group(2).strip())
-
-    return {"action": "update", "table": table_name, "set": set_map,
-            "condition": {"column": where_col, "value": where_val}}
-
-def _parse_delete(sql):
-    match = re.match(r"DELETE\s+FROM\s+(\w+)\s+WHERE\s+(\w+)\s*=\s*'?(.*?)'?$", sql.strip(), re.IGNORECASE)
-    if not match:
-        raise ValueError("Invalid DELETE syntax")
-
-    table_name = match.group(1)
-    where_col = match.group(2)
-    where_val = match.group(3)
-
-    return {"action": "delete", "table": table_name,
-            "condition": {"column": where_col, "value": where_val}}
-
-def _parse_drop(sql):
-    match = re.match(r"DROP TABLE (\w+)$", sql.strip(), re.IGNORECASE)
-    if not match:
-        raise ValueError("Invalid DROP TABLE syntax")
-    table_name = match.group(1)
-    return {"action": "drop_table", "table": table_name}
-
-# Helpers
-def _tokenize_top_level(s: str, sep=","):
-    parts, buf, depth, in_quotes = [], [], 0, False
-    i = 0
-    while i < len(s):
-        ch = s[i]
-        if ch == "'" and not in_quotes:
-            in_quotes = True
-            buf.append(ch)
-            i += 1
-            while i < len(s):
-                buf.append(s[i])
-                if s[i] == "'" and i + 1 < len(s) and s[i+1] == "'":
-                    buf.append(s[i+1])
-                    i += 2
-                    continue
-                if s[i] == "'":
-                    i += 1
-                    break
-                i += 1
-            in_quotes = False
-            continue
-        if ch == "(":
-            depth += 1
-            buf.append(ch)
-        elif ch == ")":
-            depth = max(0, depth - 1)
-            buf.append(ch)
-        elif ch == sep and depth == 0 and not in_quotes:
-            parts.append("".join(buf).strip())
-            buf = []
-        else:
-            buf.append(ch)
-        i += 1
-    if buf:
-        parts.append("".join(buf).strip())
-    return parts
-
-def _strip_quotes(val: str):
-    val = val.strip()
-    if len(val) >= 2 and val[0] == "'" and val[-1] == "'":
-        inner = val[1:-1]
-        return inner.replace("''", "'")
-    return val
\ No newline at end of file
+    while True:
+        col = p.column()
+        p.expect("=")
+        set_map[col] = p.value()
+        if not p.accept(","):
+            break
+    p.expect("WHERE")
+    return {"action": "update", "table": table_name, "set": set_map, "condition": p.expression()}
+
+def _parse_delete(p):
+    p.expect("DELETE")
+    p.expect("FROM")
+    table_name = p.identifier("table name")
+    p.expect("WHERE")
+    return {"action": "delete", "table": table_name, "condition": p.expression()}
+
+def _parse_drop(p):
+    p.expect("DROP")
+    if p.accept("MATERIALIZED"):
+        p.expect("VIEW")
+        return {"action": "drop_view", "view": p.identifier("view name")}
+    if p.accept("INDEX"):
+        return {"action": "drop_index", "index": p.identifier("index name")}
+    p.expect("TABLE", "TABLE, INDEX or MATERIALIZED VIEW")
+    return {"action": "drop_table", "table": p.identifier("table name")}
+
+def _parse_refresh(p):
+    """`REFRESH MATERIALIZED VIEW name`: recompute the view from its tables."""
+    p.expect("REFRESH")
+    p.expect("MATERIALIZED")
+    p.expect("VIEW")
+    return {"action": "refresh_view", "view": p.identifier("view name")}
+
+def _parse_vacuum(p):
+    """`VACUUM [table]`: fold delta logs into new base files."""
+    p.expect("VACUUM")
+    table = p.identifier("table name") if p.peek() not in ("", ";") else None
+    return {"action": "vacuum", "table": table}
+
+def _parse_advise(p):
+    """`ADVISE INDEXES [APPLY]`: rank candidate indexes for the workload seen
+    so far (see rdbms.advisor); APPLY also creates them."""
+    p.expect("ADVISE")
+    p.expect("INDEXES")
+    return {"action": "advise_indexes", "apply": bool(p.accept("APPLY"))}
+
+
+_STATEMENTS = {
+    "CREATE": _parse_create,
+    "INSERT": _parse_insert,
+    "SELECT": _parse_select,
+    "UPDATE": _parse_update,
+    "DELETE": _parse_delete,
+    "DROP": _parse_drop,
+    "VACUUM": _parse_vacuum,
+    "REFRESH": _parse_refresh,
+    "ADVISE": _parse_advise,
+}
@@ -0,0 +1,89 @@
+# rdbms/partition.py
+"""Hash and range partitioning of a table into segments.
+
+A partitioned table `t` is stored as segments `t.p0`, `t.p1`, ... Each
+segment has its own row file(s) and indexes, and row ids are positions
+within their segment. An unpartitioned table is its own single segment.
+
+    PARTITION BY HASH(col) PARTITIONS n      crc32(value) % n
+    PARTITION BY RANGE(col) (b1, b2, ...)    p0: < b1, p1: [b1, b2), ..., pN: >= bN
+
+Range bounds compare in the column's natural order (see catalog.COERCERS).
+"""
+import zlib
+import bisect
+
+MAX_PARTITIONS = 1024
+
+
+def segment_name(table, number):
+    return f"{table}.p{number}"
+
+
+class Partitioning:
+    def __init__(self, spec, coerce=str):
+        self.method = spec["method"]
+        self.column = spec["column"]
+        self.coerce = coerce
+        if self.method == "hash":
+            self.count = int(spec["partitions"])
+            self.bounds = []
+        elif self.method == "range":
+            self.bounds = [coerce(b) for b in spec["bounds"]]
+            self.count = len(self.bounds) + 1
+        else:
+            raise ValueError(f"Unknown partitioning method '{self.method}'")
+
+    @classmethod
+    def validate(cls, spec, columns, coerce):
+        """Check a parsed PARTITION BY clause against the table's columns."""
+        col = spec["column"]
+        if col not in columns:
+            raise ValueError(f"Partition column '{col}' does not exist")
+        if spec["method"] == "hash":
+            count = spec["partitions"]
+            if not str(count).isdigit() or not 1 <= int(count) <= MAX_PARTITIONS:
+                raise ValueError(f"PARTITIONS must be between 1 and {MAX_PARTITIONS}")
+            return {"method": "hash", "column": col, "partitions": int(count)}
+        bounds = spec["bounds"]
+        try:
+            keys = [coerce(b) for b in bounds]
+        except (TypeError, ValueError):
+            raise ValueError(f"Range bounds must be valid values of column '{col}'")
+        if any(a >= b for a, b in zip(keys, keys[1:])):
+            raise ValueError("Range bounds must be strictly increasing")
+        if len(bounds) + 1 > MAX_PARTITIONS:
+            raise ValueError(f"At most {MAX_PARTITIONS} partitions are supported")
+        return {"method": "range", "column": col, "bounds": list(bounds)}
+
+    def segments(self, table):
+        return [segment_name(table, i) for i in range(self.count)]
+
+    def locate(self, value):
+        """Partition number for a row whose partition column holds `value`."""
+        if self.method == "hash":
+            return zlib.crc32(str(value).encode()) % self.count
+        if value is None:
+            return 0
+        return bisect.bisect_right(self.bounds, self.coerce(value))
+
+    def prune(self, op, value):
+        """Partition numbers that can hold rows with `column <op> value`."""
+        everything = list(range(self.count))
+        if self.method == "hash":
+            return [self.locate(value)] if op == "=" else everything
+        try:
+            key = self.coerce(value)
+        except (TypeError, ValueError):
+            # No stored value can equal it; range comparisons report the error themselves
+            return [] if op == "=" else everything
+        at = bisect.bisect_right(self.bounds, key)
+        if op == "=":
+            return [at]
+        if op == "<":
+            return everything[:bisect.bisect_left(self.bounds, key) + 1]
+        if op == "<=":
+            return everything[:at + 1]
+        if op in (">", ">="):
+            return everything[at:]
+        return everything
@@ -0,0 +1,126 @@
+# rdbms/prepared.py
+"""Prepared statements and the executor's parsed-plan cache.
+
+    stmt = executor.prepare("SELECT * FROM users WHERE id=?")
+    stmt.execute([5])
+    executor.execute("UPDATE users SET name=:name WHERE id=:id", params={"name": "Ann", "id": 5})
+
+Statements are cached by normalized SQL text together with their chosen
+plan, so repeated shapes skip both parsing and planning. Plans are
+recomputed after DDL (tracked through Catalog.version).
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from rdbms.parser import parse, Param
+
+_NORMALIZE_RE = re.compile(r"'(?:[^']|'')*'|\s+")
+
+
+def normalize_sql(sql):
+    """Collapse whitespace outside string literals and drop the trailing `;`."""
+    sql = sql.strip().rstrip(";").strip()
+    return _NORMALIZE_RE.sub(lambda m: m.group(0) if m.group(0)[0] == "'" else " ", sql)
+
+
+def to_sql_value(value):
+    """Convert a Python parameter to the engine's raw value representation."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    raise ValueError(f"Unsupported parameter type: {type(value).__name__}")
+
+
+def _collect_params(node, found):
+    values = node.values() if isinstance(node, dict) else node
+    for v in values:
+        if isinstance(v, Param):
+            found.append(v.key)
+        elif isinstance(v, (dict, list)):
+            _collect_params(v, found)
+    return found
+
+
+class PreparedStatement:
+    def __init__(self, executor, sql, ast):
+        self.executor = executor
+        self.sql = sql
+        self.ast = ast
+        keys = _collect_params(ast, [])
+        self.positional = sorted(k for k in keys if isinstance(k, int))
+        self.named = sorted({k for k in keys if isinstance(k, str)})
+        if self.positional and self.named:
+            raise ValueError("Cannot mix positional (?) and named (:name) parameters")
+        self.param_count = len(self.positional) or len(self.named)
+        # Filled in lazily by the executor, per catalog version
+        self.plan = None
+        self.catalog_version = None
+
+    def bind(self, params=None):
+        """Return a fresh AST with every placeholder replaced by its value."""
+        if self.named:
+            if not isinstance(params, dict):
+                raise ValueError(f"Statement expects named parameters: {', '.join(self.named)}")
+            missing = [k for k in self.named if k not in params]
+            if missing:
+                raise ValueError(f"Missing parameter(s): {', '.join(missing)}")
+            lookup = params
+        else:
+            params = list(params or [])
+            if len(params) != len(self.positional):
+                raise ValueError(f"Statement expects {len(self.positional)} parameter(s), got {len(params)}")
+            lookup = params
+        return _substitute(self.ast, lookup)
+
+    def execute(self, params=None, metrics=False):
+        return self.executor.execute(self, params=params, metrics=metrics)
+
+
+def _substitute(node, params):
+    if isinstance(node, dict):
+        return {k: _substitute(v, params) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_substitute(v, params) for v in node]
+    if isinstance(node, Param):
+        return to_sql_value(params[node.key])
+    return node
+
+
+class StatementCache:
+    """Thread-safe LRU of PreparedStatement objects keyed by normalized SQL."""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, executor, sql):
+        key = normalize_sql(sql)
+        with self._lock:
+            stmt = self._entries.get(key)
+            if stmt is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return stmt
+            self.misses += 1
+        stmt = PreparedStatement(executor, key, parse(key))
+        if self.capacity > 0:
+            with self._lock:
+                self._entries[key] = stmt
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return stmt
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,98 @@
+# rdbms/profiling.py
+"""Slow-query log and sampling profiler hooks for Executor.execute.
+
+Both can be configured at startup through the environment and switched
+on/off at runtime (REPL `.slowlog` / `.profile`, or the Executor setters):
+
+    MINIRDBMS_SLOW_QUERY_MS=50                 log statements slower than 50 ms
+    MINIRDBMS_SLOW_QUERY_LOG=/path/slow.jsonl  default: <data dir>/slow_queries.jsonl
+    MINIRDBMS_PROFILE_RATE=0.01                profile 1% of statements
+    MINIRDBMS_PROFILE_MODE=cprofile|spans      default: cprofile
+    MINIRDBMS_PROFILE_DIR=/path/profiles       default: <data dir>/profiles
+"""
+import os
+import json
+import time
+import random
+import cProfile
+import itertools
+import threading
+
+from rdbms.storage import DATA_DIR
+
+DEFAULT_SLOW_LOG = os.path.join(DATA_DIR, "slow_queries.jsonl")
+DEFAULT_PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_MODES = ("cprofile", "spans")
+
+
+class SlowQueryLog:
+    """Append one JSON line per statement slower than `threshold_ms`."""
+
+    def __init__(self, threshold_ms, path=None):
+        self.threshold_ms = float(threshold_ms)
+        self.path = path or DEFAULT_SLOW_LOG
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        threshold = os.environ.get("MINIRDBMS_SLOW_QUERY_MS")
+        if not threshold:
+            return None
+        return cls(threshold, os.environ.get("MINIRDBMS_SLOW_QUERY_LOG"))
+
+    def record(self, sql, stmt, response):
+        if stmt.total_ms < self.threshold_ms:
+            return False
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sql": sql,
+            "ok": response.get("ok"),
+            **stmt.as_dict(),
+        }
+        if not response.get("ok"):
+            entry["error"] = response.get("error")
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+        return True
+
+
+class Profiler:
+    """Profile a random `rate` fraction of statements.
+
+    mode="cprofile" runs the statement under cProfile and dumps a .pstats
+    file per sample; mode="spans" records per-operator timings instead,
+    which show up in the statement metrics and the slow-query log.
+    """
+
+    def __init__(self, rate, mode="cprofile", out_dir=None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (expected one of: {', '.join(PROFILE_MODES)})")
+        self.rate = float(rate)
+        self.mode = mode
+        self.out_dir = out_dir or DEFAULT_PROFILE_DIR
+        self._seq = itertools.count(1)
+
+    @classmethod
+    def from_env(cls):
+        rate = os.environ.get("MINIRDBMS_PROFILE_RATE")
+        if not rate or float(rate) <= 0:
+            return None
+        return cls(rate, os.environ.get("MINIRDBMS_PROFILE_MODE", "cprofile"), os.environ.get("MINIRDBMS_PROFILE_DIR"))
+
+    def sample(self):
+        return self.rate >= 1 or random.random() < self.rate
+
+    def run(self, stmt, fn, *args):
+        """Call fn(*args) under cProfile and attach the dump path to `stmt`."""
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            profile.disable()
+            os.makedirs(self.out_dir, exist_ok=True)
+            name = f"{int(time.time() * 1000)}-{os.getpid()}-{next(self._seq)}-{stmt.action or 'unknown'}.pstats"
+            stmt.profile_path = os.path.join(self.out_dir, name)
+            profile.dump_stats(stmt.profile_path)
@@ -0,0 +1,84 @@
+# rdbms/protocol.py
+"""Length-prefixed JSON framing shared by rdbms.server and rdbms.client.
+
+Every message is a 4-byte big-endian payload length followed by that many
+bytes of UTF-8 JSON.
+
+    request:  {"id": 1, "sql": "SELECT * FROM users WHERE id=?;", "params": [1], "metrics": false}
+    response: {"id": 1, "ok": true, "result": [...]}
+
+    request:  {"id": 2, "op": "metrics"}
+    response: {"id": 2, "ok": true, "result": "<Prometheus text>"}
+
+Responses come back in request order, so a client may pipeline several
+requests before reading any response.
+"""
+import json
+import struct
+import asyncio
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5433
+
+HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def encode_frame(message):
+    payload = json.dumps(message).encode("utf-8")
+    if len(payload) > MAX_FRAME:
+        raise ProtocolError(f"Frame of {len(payload)} bytes exceeds limit of {MAX_FRAME}")
+    return HEADER.pack(len(payload)) + payload
+
+
+def decode_payload(payload):
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ProtocolError(f"Malformed frame: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("Frame must contain a JSON object")
+    return message
+
+
+def _check_length(length):
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame of {length} bytes exceeds limit of {MAX_FRAME}")
+    return length
+
+
+async def read_frame(reader):
+    """Read one message from an asyncio StreamReader, or None on clean EOF."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ProtocolError("Connection closed mid-frame")
+    (length,) = HEADER.unpack(header)
+    try:
+        payload = await reader.readexactly(_check_length(length))
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Connection closed mid-frame")
+    return decode_payload(payload)
+
+
+def _recv_exactly(sock, n):
+    chunks, remaining = [], n
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by server")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """Blocking counterpart of read_frame for plain sockets."""
+    (length,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return decode_payload(_recv_exactly(sock, _check_length(length)))
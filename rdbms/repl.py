@@ -1,12 +1,33 @@
 # rdbms/repl.py
 import os
+import time
 import shutil
 
-from rdbms.parser import parse
 from rdbms.executor import Executor
 from rdbms.catalog import Catalog
+from rdbms.storage import DATA_DIR
 
-DATA_DIR = "data"
+def print_stats(snapshot):
+    if not snapshot:
+        print("No statements executed yet.")
+        return
+    print(f"{'action':<12} {'ok':>6} {'err':>5} {'avg ms':>9} {'scanned':>9} {'returned':>9} "
+          f"{'probes':>7} {'read B':>10} {'written B':>10}")
+    for action, e in sorted(snapshot.items()):
+        count = e["ok"] + e["error"]
+        avg_ms = e["seconds"] * 1000 / count if count else 0.0
+        print(f"{action:<12} {e['ok']:>6} {e['error']:>5} {avg_ms:>9.3f} {e['rows_scanned']:>9} "
+              f"{e['rows_returned']:>9} {e['index_probes']:>7} {e['bytes_read']:>10} {e['bytes_written']:>10}")
+
+def print_advice(candidates):
+    if not candidates:
+        print("No index would pay off for the workload seen so far.")
+        return
+    print(f"{'index':<32} {'filters':>7} {'joins':>6} {'scanned':>10} {'writes':>7} {'saves rows':>11} {'est. bytes':>11}")
+    for c in candidates:
+        created = {True: "  created", False: "  over budget"}.get(c.get("created"), "")
+        print(f"{c['table'] + '.' + c['column']:<32} {c['filter_scans']:>7} {c['join_scans']:>6} "
+              f"{c['rows_scanned']:>10} {c['writes']:>7} {c['estimated_savings']:>11} {c['estimated_bytes']:>11}{created}")
 
 def run_repl():
     exec = Executor()
@@ -21,7 +42,9 @@ def run_repl():
             # Meta commands
             if line.startswith("."):
                 if line == ".help":
-                    print("Commands: .help, .tables, .schema [table], .quit")
+                    print("Commands: .help, .tables, .schema [table], .stats [reset], "
+                          ".slowlog [ms [path] | off], .profile [rate [cprofile|spans [dir]] | off], .cache [bytes | off], "
+                          ".import file table, .export table file, .advise [apply | reset | auto bytes | off], .checkpoint, .quit")
                 elif line == ".tables":
                     tables = catalog.list_tables()
                     if tables:
@@ -45,6 +68,92 @@ def run_repl():
                             print(f"No such table: {table}")
                     else:
                         print("Usage: .schema [table]")
+                elif line.startswith(".stats"):
+                    if line.split()[1:] == ["reset"]:
+                        exec.metrics.reset()
+                        exec.statements.hits = exec.statements.misses = 0
+                        if exec.result_cache is not None:
+                            exec.result_cache.reset_stats()
+                        print("Statistics reset.")
+                    else:
+                        print_stats(exec.metrics.snapshot())
+                        cache = exec.statements.stats()
+                        print(f"Statement cache: {cache['size']}/{cache['capacity']} entries, "
+                              f"{cache['hits']} hits, {cache['misses']} misses")
+                        if exec.result_cache is not None:
+                            rc = exec.result_cache.stats()
+                            print(f"Result cache: {rc['entries']} entries, {rc['bytes']:,}/{rc['budget']:,} bytes, "
+                                  f"{rc['hits']} hits, {rc['misses']} misses, {rc['invalidations']} invalidated, "
+                                  f"{rc['evictions']} evicted")
+                elif line.startswith(".slowlog"):
+                    parts = line.split()
+                    if len(parts) == 1:
+                        log = exec.slow_log
+                        print(f"Slow-query log: >= {log.threshold_ms} ms -> {log.path}" if log else "Slow-query log is off.")
+                    elif parts[1] == "off":
+                        exec.set_slow_query_log(None)
+                        print("Slow-query log disabled.")
+                    else:
+                        exec.set_slow_query_log(float(parts[1]), parts[2] if len(parts) > 2 else None)
+                        print(f"Logging statements >= {exec.slow_log.threshold_ms} ms to {exec.slow_log.path}")
+                elif line.startswith(".profile"):
+                    parts = line.split()
+                    if len(parts) == 1:
+                        prof = exec.profiler
+                        print(f"Profiling {prof.rate:.0%} of statements ({prof.mode}) -> {prof.out_dir}" if prof else "Profiling is off.")
+                    elif parts[1] == "off":
+                        exec.set_profiling(None)
+                        print("Profiling disabled.")
+                    else:
+                        mode = parts[2] if len(parts) > 2 else "cprofile"
+                        exec.set_profiling(float(parts[1]), mode, parts[3] if len(parts) > 3 else None)
+                        print(f"Profiling {exec.profiler.rate:.0%} of statements ({mode})")
+                elif line.startswith(".cache"):
+                    parts = line.split()
+                    if len(parts) == 1:
+                        rc = exec.result_cache
+                        print(f"Result cache: {rc.budget:,} bytes" if rc else "Result cache is off.")
+                    elif parts[1] == "off":
+                        exec.set_result_cache(None)
+                        print("Result cache disabled.")
+                    else:
+                        exec.set_result_cache(int(parts[1]))
+                        print(f"Caching up to {exec.result_cache.budget:,} bytes of SELECT results")
+                elif line.startswith(".import") or line.startswith(".export"):
+                    parts = line.split()
+                    if len(parts) != 3:
+                        print("Usage: .import file.csv|file.jsonl table  /  .export table file.csv|file.jsonl")
+                        continue
+                    t0 = time.perf_counter()
+                    if parts[0] == ".import":
+                        res = exec.import_file(parts[1], parts[2])
+                        rows, verb = res["imported"], "Imported"
+                    else:
+                        res = exec.export_table(parts[1], parts[2])
+                        rows, verb = res["exported"], "Exported"
+                    elapsed = time.perf_counter() - t0
+                    print(f"{verb} {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+                elif line.startswith(".advise"):
+                    parts = line.split()
+                    if len(parts) == 1 or parts[1] == "apply":
+                        res = exec.execute("ADVISE INDEXES APPLY;" if len(parts) > 1 else "ADVISE INDEXES;")
+                        if res["ok"]:
+                            print_advice(res["result"])
+                        else:
+                            print(f"Error: {res['error']}")
+                    elif parts[1] == "reset":
+                        exec.workload.reset()
+                        print("Recorded workload cleared.")
+                    elif parts[1] == "off":
+                        exec.set_auto_index(None)
+                        print("Automatic indexing disabled.")
+                    elif parts[1] == "auto" and len(parts) == 3:
+                        exec.set_auto_index(int(parts[2]))
+                        print(f"Creating advised indexes automatically within {exec.auto_index.budget:,} bytes")
+                    else:
+                        print("Usage: .advise [apply | reset | auto bytes | off]")
+                elif line == ".checkpoint":
+                    print(f"Checkpoint generation {exec.checkpoint()} written.")
                 elif line == ".reset":
                     if os.path.exists(DATA_DIR):
                         shutil.rmtree(DATA_DIR)
@@ -60,14 +169,15 @@ def run_repl():
                 continue
 
             # SQL execution
-            ast = parse(line)
-            exec.execute(ast)
+            exec.execute(line)
 
         except (EOFError, KeyboardInterrupt):
             print("\nBye.")
             break
         except Exception as e:
             print(f"Error: {e}")
+    if os.path.exists(DATA_DIR):
+        exec.close()
 
 if __name__ == "__main__":
     run_repl()
\ No newline at end of file
@@ -0,0 +1,116 @@
+# rdbms/resultcache.py
+"""Opt-in cache of SELECT results for Executor.execute.
+
+    MINIRDBMS_RESULT_CACHE_BYTES=16777216    keep up to ~16 MB of results
+    executor.set_result_cache(16 << 20)      the same at runtime; None turns it off
+
+Entries are keyed by normalized SQL plus the bound parameter values and record
+the version of every table the statement read. The executor bumps a
+table's version on every write to it, so an entry is only served while
+all of its tables are unchanged. Least recently used entries are evicted
+to keep the estimated size of the cached rows within the byte budget.
+
+Writes made by other processes sharing the data directory are not seen:
+enable it where one executor owns the data (e.g. behind rdbms.server).
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from rdbms.prepared import to_sql_value
+
+
+def estimate_size(rows):
+    """Approximate bytes held by a list of row dicts (keys are shared between rows)."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(map(sys.getsizeof, row.values()))
+    return size
+
+
+def param_key(stmt, params):
+    """The values `params` binds into prepared statement `stmt`, in placeholder
+    order. These are what the statement runs with: 1, 1.0 and True are equal
+    Python keys but bind as "1", "1.0" and "TRUE"."""
+    if stmt.named:
+        return tuple(to_sql_value(params[k]) for k in stmt.named)
+    params = list(params or [])
+    return tuple(to_sql_value(params[i]) for i in stmt.positional)
+
+
+class ResultCache:
+    """Thread-safe LRU of query results with a byte budget."""
+
+    def __init__(self, budget_bytes):
+        self.budget = int(budget_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (table versions, rows, size)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        budget = os.environ.get("MINIRDBMS_RESULT_CACHE_BYTES")
+        if not budget or int(budget) <= 0:
+            return None
+        return cls(budget)
+
+    def get(self, key, versions):
+        """A copy of the rows cached for `key`, or None if missing or stale
+        according to `versions` ({table: current version})."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                read, rows, size = entry
+                if all(versions.get(t, 0) == v for t, v in read.items()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return [dict(r) for r in rows]
+                del self._entries[key]
+                self.bytes -= size
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, read, rows):
+        """Cache `rows`, valid while the tables in `read` ({table: version}) keep those versions."""
+        size = estimate_size(rows)
+        if size > self.budget:
+            return False
+        entry = (dict(read), [dict(r) for r in rows], size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.budget:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
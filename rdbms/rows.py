@@ -0,0 +1,115 @@
+# rdbms/rows.py
+"""Compact in-memory rows.
+
+A dict per row repeats every column name (json.loads makes fresh key
+strings for each line) and carries a hash table, which costs hundreds of
+bytes per row before any value is stored. Rows the engine reads in bulk
+are instead Records: tuples of values in column order, whose class (one
+per column layout, shared by every row of a table) knows the names.
+
+Records answer the read-only mapping calls the engine makes on rows
+(get, [], in, keys, items, len) exactly as the equivalent dict would:
+a NULL column is absent. copy() and as_dict() give plain dicts, for
+writes and for results handed out of the engine.
+"""
+import operator
+import itertools
+
+_CLASSES = {}
+
+
+class Record(tuple):
+    __slots__ = ()
+    columns = ()
+    ordinals = {}
+
+    def get(self, col, default=None):
+        i = self.ordinals.get(col)
+        value = None if i is None else tuple.__getitem__(self, i)
+        return default if value is None else value
+
+    def __getitem__(self, col):
+        value = self.get(col)
+        if value is None:
+            raise KeyError(col)
+        return value
+
+    def __contains__(self, col):
+        return self.get(col) is not None
+
+    def keys(self):
+        return [c for c, v in zip(self.columns, tuple.__iter__(self)) if v is not None]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.columns) - tuple.count(self, None)
+
+    def items(self):
+        return [(c, v) for c, v in zip(self.columns, tuple.__iter__(self)) if v is not None]
+
+    def values(self):
+        return [v for v in tuple.__iter__(self) if v is not None]
+
+    def as_dict(self):
+        return {c: v for c, v in zip(self.columns, tuple.__iter__(self)) if v is not None}
+
+    copy = as_dict
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.as_dict()
+        return isinstance(other, dict) and self.as_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Record({self.as_dict()!r})"
+
+
+def record_class(columns):
+    """The Record class for rows laid out as `columns` (cached per layout)."""
+    columns = tuple(columns)
+    cls = _CLASSES.get(columns)
+    if cls is None:
+        cls = _CLASSES[columns] = type("Record", (Record,), {
+            "__slots__": (), "columns": columns, "ordinals": {c: i for i, c in enumerate(columns)}})
+    return cls
+
+
+def from_dicts(cls, rows):
+    """Records of `cls` for row dicts."""
+    new, columns = tuple.__new__, cls.columns
+    return [new(cls, map(row.get, columns)) for row in rows]
+
+
+def from_arrays(cls, source, arrays):
+    """Records of `cls` from value arrays laid out as the `source` columns."""
+    new = tuple.__new__
+    if tuple(source) == cls.columns:
+        return [new(cls, values) for values in arrays]
+    positions = [list(source).index(c) if c in source else None for c in cls.columns]
+    if None not in positions and len(positions) > 1:
+        pick = operator.itemgetter(*positions)
+        return [new(cls, pick(values)) for values in arrays]
+    return [new(cls, [None if i is None else values[i] for i in positions]) for values in arrays]
+
+
+def column(rows, col):
+    """The `col` value (None for NULL) of every row in a list of row dicts or
+    of Records sharing one layout, read straight from the tuples for Records."""
+    if rows and isinstance(rows[0], Record):
+        i = rows[0].ordinals.get(col)
+        if i is None:
+            return [None] * len(rows)
+        return list(map(tuple.__getitem__, rows, itertools.repeat(i, len(rows))))
+    return [r.get(col) for r in rows]
+
+
+def as_dicts(rows):
+    """Plain dicts for rows that may be Records."""
+    return [r.as_dict() if isinstance(r, Record) else r for r in rows]
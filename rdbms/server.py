@@ -0,0 +1,147 @@
+# rdbms/server.py
+"""Serve a single Executor to many clients over TCP or a Unix socket.
+
+    python -m rdbms.server --host 127.0.0.1 --port 5433
+    python -m rdbms.server --unix /tmp/minirdbms.sock
+
+Statements from all connections run one at a time on a dedicated worker
+thread, so the event loop keeps reading (and clients keep pipelining)
+while the engine is busy with file I/O.
+"""
+import os
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from rdbms.executor import Executor
+from rdbms.protocol import encode_frame, read_frame, ProtocolError, DEFAULT_HOST, DEFAULT_PORT
+
+logger = logging.getLogger(__name__)
+
+
+class Server:
+    def __init__(self, executor=None, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        self.executor = executor or Executor()
+        self.host = host
+        self.port = port
+        self.path = path
+        self._server = None
+        # One worker: the engine is not thread-safe, and this also gives a global statement order
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rdbms-engine")
+
+    @property
+    def address(self):
+        if self.path:
+            return self.path
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        if self.path:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info("Serving on %s", self.address)
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._worker.shutdown(wait=True)
+        self.executor.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def _handle(self, reader, writer):
+        # Requests are submitted as soon as they are read; responses are
+        # written strictly in request order by a separate task.
+        pending = asyncio.Queue()
+        responder = asyncio.ensure_future(self._respond(pending, writer))
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except ProtocolError as e:
+                    pending.put_nowait((None, _done(loop, {"id": None, "ok": False, "error": str(e)})))
+                    break
+                except ConnectionError:
+                    break
+                if request is None:
+                    break
+                request_id = request.get("id") if isinstance(request, dict) else None
+                pending.put_nowait((request_id, loop.run_in_executor(self._worker, self._run, request)))
+        finally:
+            pending.put_nowait(None)
+            await responder
+            writer.close()
+
+    async def _respond(self, pending, writer):
+        broken = False
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            request_id, future = item
+            try:
+                response = await future
+            except Exception as e:
+                # Answer it and keep going: later requests on the connection still need responses
+                logger.exception("Request %r failed", request_id)
+                response = {"id": request_id, "ok": False, "error": str(e)}
+            if broken:
+                continue
+            try:
+                writer.write(encode_frame(response))
+                await writer.drain()
+            except ConnectionError:
+                broken = True
+
+    def _run(self, request):
+        request_id = request.get("id")
+        if request.get("op") == "metrics":
+            return {"id": request_id, "ok": True, "result": self.executor.metrics.render_prometheus()}
+        sql = request.get("sql")
+        if not isinstance(sql, str):
+            return {"id": request_id, "ok": False, "error": "Request must carry a 'sql' string"}
+        params = request.get("params")
+        if params is not None and not isinstance(params, (list, dict)):
+            return {"id": request_id, "ok": False, "error": "'params' must be a list or an object"}
+        response = self.executor.execute(sql, metrics=bool(request.get("metrics")), params=params)
+        return {"id": request_id, **response}
+
+
+def _done(loop, value):
+    future = loop.create_future()
+    future.set_result(value)
+    return future
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve MiniRDBMS over the network.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = Server(host=args.host, port=args.port, path=args.unix)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nBye.")
+    finally:
+        server.executor.close()
+
+
+if __name__ == "__main__":
+    main()
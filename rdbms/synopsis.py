@@ -0,0 +1,179 @@
+# rdbms/synopsis.py
+"""Per-block data-skipping metadata: min/max zone maps and Bloom filters.
+
+A synopsis summarises one run of rows (a sealed block, or a chunk of a
+JSON-lines table) per column:
+
+    zones[col] = [min, max, numeric min, numeric max]   (string order, and
+                 float order when every value is numeric, else null)
+    bloom[col] = hex bit array over str(value)
+
+A column absent from both means it is null in every row of the block.
+may_match() answers "could any row satisfy `col <op> value`?" and only
+says no when that is certain, so skipping never changes results.
+
+Synopses live in a JSON-lines sidecar (`<table>.zmap`) whose first line
+names the base generation they describe (its file name), like the delta
+log; each further line covers the rows `first .. first + rows - 1`.
+"""
+import os
+import json
+import hashlib
+
+from rdbms import metrics
+from rdbms.fileio import DATA_DIR, atomic_write, truncate_torn_tail
+
+BITS_PER_VALUE = 10
+HASHES = 4
+
+# path -> ((inode, size, mtime), base, synopses)
+_CACHE = {}
+
+
+def synopsis_file(table):
+    return os.path.join(DATA_DIR, f"{table}.zmap")
+
+
+def _hashes(text, bits):
+    h = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+    return [(h1 + i * h2) % bits for i in range(HASHES)]
+
+
+def _bloom(values):
+    bits = max(64, len(values) * BITS_PER_VALUE + 7) // 8 * 8
+    array = bytearray(bits // 8)
+    for text in values:
+        for pos in _hashes(text, bits):
+            array[pos >> 3] |= 1 << (pos & 7)
+    return array.hex()
+
+
+def _bloom_has(hex_bits, text):
+    array = bytes.fromhex(hex_bits)
+    bits = len(array) * 8
+    return all(array[pos >> 3] & (1 << (pos & 7)) for pos in _hashes(text, bits))
+
+
+def _number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def build(rows, first):
+    """Synopsis of `rows` (dicts), the block starting at row id `first`."""
+    values = {}
+    for row in rows:
+        for col, val in row.items():
+            if val is not None:
+                values.setdefault(col, set()).add(str(val))
+    zones, bloom = {}, {}
+    for col, distinct in values.items():
+        numbers = [_number(v) for v in distinct]
+        numeric = None not in numbers
+        zones[col] = [min(distinct), max(distinct),
+                      min(numbers) if numeric else None, max(numbers) if numeric else None]
+        bloom[col] = _bloom(distinct)
+    return {"first": first, "rows": len(rows), "zones": zones, "bloom": bloom}
+
+
+class Probe:
+    """A `column <op> value` filter; `numeric` compares in float order instead of string order."""
+
+    def __init__(self, column, op, value, numeric=False):
+        self.column = column
+        self.op = op
+        self.value = str(value)
+        self.numeric = numeric and op != "="
+        self.key = _number(value) if self.numeric else self.value
+
+
+def may_match(synopsis, probe):
+    zone = synopsis["zones"].get(probe.column)
+    if zone is None:
+        return False  # every value is null, which never matches
+    lo, hi = (zone[2], zone[3]) if probe.numeric else (zone[0], zone[1])
+    if lo is None or probe.key is None:
+        return True
+    key, op = probe.key, probe.op
+    if op == "=":
+        return lo <= key <= hi and _bloom_has(synopsis["bloom"][probe.column], key)
+    if op == "<":
+        return lo < key
+    if op == "<=":
+        return lo <= key
+    if op == ">":
+        return hi > key
+    if op == ">=":
+        return hi >= key
+    return True
+
+
+class SynopsisLog:
+    """The sidecar file of block synopses for one base file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, base):
+        """Synopses in block order; [] if missing or written for another base."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        cached = _CACHE.get(self.path)
+        if cached and cached[0] == (st.st_ino, st.st_size, st.st_mtime_ns):
+            return cached[2] if cached[1] == base else []
+        with open(self.path, "rb") as f:
+            data = f.read()
+        metrics.add("bytes_read", len(data))
+        metrics.touch(self.path)
+        lines = data.splitlines()
+        owner = json.loads(lines[0]).get("base") if lines else None
+        synopses = [json.loads(line) for line in lines[1:]] if owner == base else []
+        _CACHE[self.path] = ((st.st_ino, st.st_size, st.st_mtime_ns), owner, synopses)
+        return synopses
+
+    def append(self, base, synopses):
+        """Add synopses for newly sealed blocks after the ones load(base) returns."""
+        if not synopses:
+            return
+        current = self.load(base)
+        if not current and os.path.exists(self.path):
+            return self.write(base, synopses)  # replaces a stale file
+        data = "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in synopses)
+        if not os.path.exists(self.path):
+            data = json.dumps({"base": base}) + "\n" + data
+        with open(self.path, "a") as f:
+            f.write(data)
+            f.flush()
+            st = os.fstat(f.fileno())
+        _CACHE[self.path] = ((st.st_ino, st.st_size, st.st_mtime_ns), base, current + list(synopses))
+        metrics.add("bytes_written", len(data))
+        metrics.touch(self.path)
+
+    def write(self, base, synopses):
+        data = json.dumps({"base": base}) + "\n"
+        data += "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in synopses)
+        atomic_write(self.path, data)
+        _CACHE.pop(self.path, None)
+        metrics.add("bytes_written", len(data))
+        metrics.touch(self.path)
+
+    def repair(self, base):
+        """Cut a torn final line, and remove the file if it describes another base."""
+        if not os.path.exists(self.path):
+            return
+        truncate_torn_tail(self.path)
+        _CACHE.pop(self.path, None)
+        with open(self.path) as f:
+            header = f.readline()
+        if not header or json.loads(header).get("base") != base:
+            self.drop()
+
+    def drop(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        _CACHE.pop(self.path, None)
@@ -1,9 +1,18 @@
 import pytest
 import sys, os
+import shutil
+import tempfile
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+# Tables, manifests and checkpoints written by the suite go to a scratch
+# directory, not the repo's data/ (read once, when rdbms is first imported)
+os.environ["MINIRDBMS_DATA_DIR"] = tempfile.mkdtemp(prefix="minirdbms-tests-")
+
 from rdbms.executor import Executor
 
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(os.environ["MINIRDBMS_DATA_DIR"], ignore_errors=True)
+
 @pytest.fixture(autouse=True)
 def cleanup_tables():
     yield
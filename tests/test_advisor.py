@@ -0,0 +1,89 @@
+import os
+import sys
+import asyncio
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.asyncexecutor import AsyncExecutor
+
+def make_tables(ex, rows=200):
+    assert ex.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, city TEXT, team TEXT, note TEXT);")["ok"]
+    assert ex.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, code TEXT, label TEXT);")["ok"]
+    for i in range(rows):
+        assert ex.execute(f"INSERT INTO people (id, city, team, note) VALUES ({i}, 'c{i % 20}', 't{i % 5}', 'n{i}');")["ok"]
+    for i in range(5):
+        assert ex.execute(f"INSERT INTO teams (id, code, label) VALUES ({i}, 't{i}', 'Team {i}');")["ok"]
+    ex.workload.reset()
+
+def advise(ex, apply=False):
+    res = ex.execute("ADVISE INDEXES APPLY;" if apply else "ADVISE INDEXES;")
+    assert res["ok"], res
+    return {(c["table"], c["column"]): c for c in res["result"]}
+
+def test_unindexed_filters_and_joins_are_ranked():
+    ex = Executor()
+    make_tables(ex)
+    for i in range(10):
+        ex.execute(f"SELECT * FROM people WHERE city = 'c{i}';")
+        ex.execute(f"UPDATE people SET note='x' WHERE city IN ('c{i}', 'c{i + 1}') AND id > 3;")
+    ex.execute("SELECT * FROM people WHERE note = 'n1';")
+    ex.execute("SELECT * FROM people WHERE id = 3 AND city = 'c3';")     # answered by the id index
+    ex.execute("SELECT * FROM people WHERE city < 'c3';")                 # no index would help
+    for _ in range(3):
+        ex.execute("SELECT people.id, teams.label FROM teams JOIN people ON teams.code = people.team "
+                   "WHERE teams.id = 1;")
+
+    cands = advise(ex)
+    city = cands[("people", "city")]
+    assert city["filter_scans"] == 20 and city["rows_scanned"] == 20 * 200 and city["writes"] == 10
+    assert 0 < city["estimated_savings"] < city["rows_scanned"] and city["estimated_bytes"] > 0
+    assert city["sql"] == "CREATE INDEX auto_people_city ON people USING HASH (city);"
+    assert cands[("people", "team")]["join_scans"] == 3
+    assert list(cands)[0] == ("people", "city")
+    assert ("people", "note") in cands and ("people", "id") not in cands
+
+    cands = advise(ex, apply=True)
+    assert all(c["created"] for c in cands.values())
+    res = ex.execute("SELECT * FROM people WHERE city = 'c4';", metrics=True)
+    assert len(res["result"]) == 10 and res["metrics"]["plan"] == {
+        "action": "select", "access": "index", "index": "people.city"}
+    assert ex.catalog.get_table("people").indexes["auto_people_team"] == {"column": "team", "include": [], "using": "hash"}
+    assert advise(ex) == {}
+
+def test_writes_outweigh_rare_scans():
+    ex = Executor()
+    make_tables(ex, rows=20)
+    ex.execute("SELECT * FROM people WHERE city = 'c1';")
+    assert ("people", "city") in advise(ex)
+    for i in range(20):
+        ex.execute(f"UPDATE people SET note='x' WHERE id = {i};")
+    assert advise(ex) == {}
+
+def test_automatic_indexing_within_a_budget():
+    ex = Executor()
+    make_tables(ex)
+    ex.set_auto_index(1, min_savings=1000)
+    for i in range(10):
+        ex.execute(f"SELECT * FROM people WHERE city = 'c{i}';")
+    assert "auto_people_city" not in ex.catalog.get_table("people").indexes  # does not fit in 1 byte
+
+    # Looked at once the scans had saved 1000 rows since the last look
+    ex.set_auto_index(1 << 20, min_savings=1000)
+    for i in range(10):
+        ex.execute(f"SELECT * FROM people WHERE city = 'c{i}';")
+    assert "auto_people_city" in ex.catalog.get_table("people").indexes
+    assert ex.execute("SELECT id FROM people WHERE city = 'c1' AND id < 30;")["result"] == [{"id": "1"}, {"id": "21"}]
+
+def test_async_executor_indexes_in_the_background():
+    async def run():
+        db = AsyncExecutor(Executor(), workers=2)
+        make_tables(db.executor)
+        db.set_auto_index(1 << 20, min_savings=1000)
+        assert db.executor.auto_index is None
+        results = await asyncio.gather(*(db.execute(f"SELECT * FROM people WHERE team = 't{i % 5}';")
+                                         for i in range(10)))
+        assert all(len(r["result"]) == 40 for r in results)
+        await db.close()
+        return db.executor
+    ex = asyncio.run(run())
+    assert "auto_people_team" in ex.catalog.get_table("people").indexes
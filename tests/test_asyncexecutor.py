@@ -0,0 +1,124 @@
+import os
+import sys
+import asyncio
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.asyncexecutor import AsyncExecutor, RWLock, footprint
+
+SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);",
+    "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id) ON DELETE CASCADE);",
+    "CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT);",
+]
+
+async def make_tables(db):
+    for sql in SCHEMA:
+        assert (await db.execute(sql))["ok"]
+
+def test_execute_stream_and_errors():
+    async def main():
+        db = AsyncExecutor(workers=4)
+        await make_tables(db)
+        for i in range(25):
+            assert (await db.execute("INSERT INTO users (id, name) VALUES (?, ?);", [i, f"u{i}"]))["ok"]
+        res = await db.execute("SELECT * FROM users WHERE id=?;", [3], metrics=True)
+        assert res["result"] == [{"id": "3", "name": "u3"}] and res["metrics"]["plan"]["access"] == "index"
+
+        rows = [row async for row in db.stream("SELECT * FROM users;", batch_size=10)]
+        assert sorted(int(r["id"]) for r in rows) == list(range(25))
+
+        assert "expected" in (await db.execute("SELECT * FORM users;"))["error"]
+        assert not (await db.execute("INSERT INTO orders (id, user_id) VALUES (1, 99);"))["ok"]
+        try:
+            [row async for row in db.stream("SELECT * FROM missing;")]
+            assert False, "stream() should raise"
+        except ValueError as e:
+            assert "does not exist" in str(e)
+        await db.close()
+    asyncio.run(main())
+
+def test_concurrent_statements_stay_consistent():
+    async def main():
+        db = AsyncExecutor(workers=8, checkpoint_every=25)
+        await make_tables(db)
+        await asyncio.gather(*(db.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');") for i in range(20)))
+
+        statements = []
+        for i in range(60):
+            statements.append(db.execute(f"INSERT INTO orders (id, user_id) VALUES ({i}, {i % 20});"))
+            statements.append(db.execute(f"INSERT INTO notes (id, body) VALUES ({i}, 'n{i}');"))
+            statements.append(db.execute("SELECT * FROM orders JOIN users ON orders.user_id = users.id;"))
+            if i % 10 == 9:
+                statements.append(db.execute(f"DELETE FROM users WHERE id={i // 10};"))
+        results = await asyncio.gather(*statements)
+        assert all(r["ok"] or "Foreign key violation" in r["error"] for r in results)
+
+        # Orders inserted after their user was deleted fail; the rest cascaded consistently
+        users = {r["id"] for r in (await db.execute("SELECT * FROM users;"))["result"]}
+        orders = (await db.execute("SELECT * FROM orders;"))["result"]
+        assert len(users) == 14 and all(o["user_id"] in users for o in orders)
+        assert len((await db.execute("SELECT * FROM notes;"))["result"]) == 60
+        assert db.executor.checkpointer.generation > 0
+        await db.close()
+    asyncio.run(main())
+
+def test_cancelled_callers_do_not_abort_statements():
+    async def main():
+        db = AsyncExecutor(workers=2)
+        await make_tables(db)
+        task = asyncio.ensure_future(db.execute("INSERT INTO notes (id, body) VALUES (1, 'kept');"))
+        await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        for _ in range(100):
+            if (await db.execute("SELECT * FROM notes;"))["result"]:
+                break
+            await asyncio.sleep(0.01)
+        assert (await db.execute("SELECT * FROM notes;"))["result"] == [{"id": "1", "body": "kept"}]
+        await db.close()
+    asyncio.run(main())
+
+def test_footprint_follows_keys_cascades_and_views():
+    ex = Executor()
+    for sql in SCHEMA:
+        assert ex.execute(sql)["ok"]
+    assert ex.execute("CREATE MATERIALIZED VIEW named_orders AS SELECT orders.id, users.name FROM orders "
+                      "JOIN users ON orders.user_id = users.id;")["ok"]
+    catalog = ex.catalog
+    assert footprint(catalog, {"action": "select", "table": "notes"}) == ({"notes"}, set())
+    assert footprint(catalog, {"action": "insert", "table": "notes"}) == (set(), {"notes"})
+    assert footprint(catalog, {"action": "insert", "table": "orders"}) == ({"users"}, {"orders", "named_orders"})
+    assert footprint(catalog, {"action": "delete", "table": "users"}) == (set(), {"users", "orders", "named_orders"})
+    assert footprint(catalog, {"action": "vacuum", "table": None}) is None
+    assert footprint(catalog, {"action": "create_table", "table": "x"}) is None
+
+def test_rwlock_queues_writers_ahead_of_new_readers():
+    async def main():
+        lock, log = RWLock(), []
+
+        async def reader(name, hold):
+            await lock.acquire()
+            log.append(f"+{name}")
+            await asyncio.sleep(hold)
+            log.append(f"-{name}")
+            await lock.release()
+
+        async def writer(name):
+            await lock.acquire(write=True)
+            log.append(f"+{name}")
+            await asyncio.sleep(0.01)
+            log.append(f"-{name}")
+            await lock.release(write=True)
+
+        first = asyncio.ensure_future(reader("r1", 0.02))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(writer("w"))
+        await asyncio.sleep(0)
+        third = asyncio.ensure_future(reader("r2", 0))
+        await asyncio.gather(first, second, third)
+        assert log == ["+r1", "-r1", "+w", "-w", "+r2", "-r2"]
+    asyncio.run(main())
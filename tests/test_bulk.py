@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import glob
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms import bulk
+from rdbms.executor import Executor
+from rdbms.fileio import DATA_DIR
+from rdbms.synopsis import SynopsisLog, synopsis_file
+
+def make_tables(ex, users_sql="CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, score FLOAT);"):
+    assert ex.execute(users_sql)["ok"]
+    assert ex.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, "
+                      "user_id INTEGER REFERENCES users(id) ON DELETE CASCADE);")["ok"]
+
+def rows(ex, table):
+    res = ex.execute(f"SELECT * FROM {table};")
+    assert res["ok"], res.get("error")
+    return sorted(res["result"], key=lambda r: int(r["id"]))
+
+def write(path, text):
+    with open(path, "w", newline="") as f:
+        f.write(text)
+    return str(path)
+
+def test_csv_import_and_round_trip(tmp_path):
+    ex = Executor()
+    make_tables(ex)
+    src = write(tmp_path / "users.csv", 'id,name,score\n1,ann,1.5\n2,"bob, jr",\n3,"multi\nline",2\n')
+    assert ex.import_file(src, "users") == {"table": "users", "imported": 3}
+    want = [{"id": "1", "name": "ann", "score": "1.5"}, {"id": "2", "name": "bob, jr"},
+            {"id": "3", "name": "multi\nline", "score": "2"}]
+    assert rows(ex, "users") == want
+    # Indexes were built for the new rows
+    res = ex.execute("SELECT * FROM users WHERE name='bob, jr';", metrics=True)
+    assert res["result"] == [want[1]] and res["metrics"]["plan"]["access"] == "index"
+
+    for name in ("out.csv", "out.jsonl"):
+        out = str(tmp_path / name)
+        assert ex.export_table("users", out) == {"table": "users", "exported": 3}
+        assert ex.execute("DELETE FROM users WHERE id > 0;")["ok"]
+        assert ex.import_file(out, "users")["imported"] == 3
+        assert rows(ex, "users") == want
+    with open(out) as f:
+        assert json.loads(f.readline()) == want[0]
+
+def test_parallel_workers_and_zone_sealing(tmp_path):
+    ex = Executor()
+    make_tables(ex)
+    lines = [json.dumps({"id": i, "name": f"u{i}", "score": i / 2}) for i in range(3000)]
+    src = write(tmp_path / "users.jsonl", "\n".join(lines) + "\n")
+    assert bulk.import_file(ex, src, "users", workers=2, chunk_rows=500)["imported"] == 3000
+    got = rows(ex, "users")
+    assert len(got) == 3000 and got[2999] == {"id": "2999", "name": "u2999", "score": "1499.5"}
+    # Complete 1024-row chunks got their synopses, as row-by-row inserts would
+    assert [z["rows"] for z in SynopsisLog(synopsis_file("users")).load(ex.storage._base_id("users"))] == [1024, 1024]
+    assert ex.execute("INSERT INTO users (id, name) VALUES (3000, 'next');")["ok"]
+    assert ex.execute("SELECT * FROM users WHERE id=1234;")["result"][0]["name"] == "u1234"
+
+def test_bad_records_leave_the_table_untouched(tmp_path):
+    ex = Executor()
+    make_tables(ex)
+    assert ex.execute("INSERT INTO users (id, name) VALUES (1, 'ann');")["ok"]
+    bad = [
+        ("id,name\n2,bob\n1,dup\n", "Line 3: Duplicate primary key 'id=1'"),
+        ("id,name\n2,bob\n3,bob\n", "Line 3: Duplicate unique value 'name=bob'"),
+        ("id,name,score\n2,bob,high\n", "Line 2: Column 'score'"),
+        ("id,name\n2\n", "Line 2: expected 2 fields, found 1"),
+        ("id,nick\n2,bob\n", "Column 'nick' does not exist"),
+    ]
+    for text, message in bad:
+        with pytest.raises(ValueError, match=message):
+            ex.import_file(write(tmp_path / "bad.csv", text), "users", workers=0)
+    with pytest.raises(ValueError, match="Line 2: Foreign key violation: 'user_id=7'"):
+        ex.import_file(write(tmp_path / "orders.jsonl", '{"id": 1, "user_id": 1}\n{"id": 2, "user_id": 7}\n'),
+                       "orders")
+    with pytest.raises(ValueError, match="use a .csv or .jsonl file"):
+        ex.import_file(str(tmp_path / "users.txt"), "users")
+    assert rows(ex, "users") == [{"id": "1", "name": "ann"}] and rows(ex, "orders") == []
+    assert not glob.glob(os.path.join(DATA_DIR, "*.import.tmp"))
+
+def test_self_references_partitions_blocks_and_views(tmp_path):
+    ex = Executor()
+    assert ex.execute("CREATE TABLE staff (id INTEGER PRIMARY KEY, boss INTEGER REFERENCES staff(id)) "
+                      "PARTITION BY HASH(id) PARTITIONS 3 WITH (compression = zlib, block_rows = 4);")["ok"]
+    assert ex.execute("CREATE MATERIALIZED VIEW bosses AS SELECT * FROM staff WHERE boss = 1;")["ok"]
+    # Row 2's boss only appears later in the file
+    src = write(tmp_path / "staff.csv", "id,boss\n2,5\n1,\n3,1\n4,1\n5,1\n6,5\n")
+    assert ex.import_file(src, "staff", workers=0)["imported"] == 6
+    assert [r.get("boss") for r in rows(ex, "staff")] == [None, "5", "1", "1", "1", "5"]
+    assert sum(len(ex.storage.read_all(s)) > 0 for s in ex.catalog.get_table("staff").segments) > 1
+    assert [r["id"] for r in rows(ex, "bosses")] == ["3", "4", "5"]
+    assert ex.execute("SELECT * FROM staff WHERE id=6;")["result"] == [{"id": "6", "boss": "5"}]
+
+    with pytest.raises(ValueError, match="Line 2: Foreign key violation: 'boss=9'"):
+        ex.import_file(write(tmp_path / "more.csv", "id,boss\n7,9\n"), "staff")
+    with pytest.raises(ValueError, match="materialized view"):
+        ex.import_file(src, "bosses")
@@ -0,0 +1,38 @@
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.catalog import TableSchema
+from rdbms.parser import parse
+
+def compile_table(sql):
+    ast = parse(sql)
+    return TableSchema(ast["table"], {"columns": ast["columns"], "table_constraints": ast["table_constraints"]})
+
+def test_table_schema_precomputes_column_lists():
+    ts = compile_table(
+        "CREATE TABLE orders (id INTEGER PRIMARY KEY, code TEXT UNIQUE, "
+        "user_id INTEGER REFERENCES users(id), note TEXT, UNIQUE(user_id, note));"
+    )
+    assert ts.columns == ["id", "code", "user_id", "note"]
+    assert ts.ordinals == {"id": 0, "code": 1, "user_id": 2, "note": 3}
+    assert ts.primary_key == ["id"]
+    assert ts.unique == ["code"]
+    assert ts.composite_unique == [["user_id", "note"]]
+    assert [c for c, _ in ts.foreign_keys] == ["user_id"]
+    assert ts.indexed == ["id", "code", "user_id"]
+
+def test_table_schema_validators_and_coercers():
+    ts = compile_table("CREATE TABLE t (n INTEGER, f FLOAT, b BOOLEAN, d DATE, s TEXT);")
+    # TEXT has no validator, so the hot path only checks typed columns
+    assert [c for c, _ in ts.validators] == ["n", "f", "b", "d"]
+
+    ts.validate({"n": "3", "f": "1.5", "b": "true", "d": "2026-01-20", "s": "anything"})
+    ts.validate({"n": None})
+    with pytest.raises(ValueError, match="expects DATE"):
+        ts.validate({"d": "20-01-2026"})
+    with pytest.raises(ValueError, match="expects INTEGER"):
+        ts.validate({"n": "x"})
+
+    assert ts.coercers["n"]("10") > ts.coercers["n"]("9")
+    assert ts.coercers["b"]("TRUE") is True
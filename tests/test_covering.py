@@ -0,0 +1,98 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+
+def make_users(ex, n=20):
+    assert ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT);")["ok"]
+    for i in range(n):
+        assert ex.execute(f"INSERT INTO users (id, name, email) VALUES ({i}, 'u{i % 5}', 'e{i}');")["ok"]
+
+def select(ex, sql):
+    res = ex.execute(sql, metrics=True)
+    assert res["ok"], res.get("error")
+    return res["result"], res["metrics"]
+
+def test_index_only_scan_skips_the_table():
+    ex = Executor()
+    make_users(ex)
+    rows, m = select(ex, "SELECT * FROM users WHERE name = 'u1';")
+    assert m["plan"]["access"] == "filter_scan"
+    assert ex.execute("CREATE INDEX users_name ON users (name) INCLUDE (id, email);")["result"] == {
+        "created_index": "users_name", "table": "users", "column": "name", "include": ["id", "email"]}
+
+    covered, m = select(ex, "SELECT * FROM users WHERE name = 'u1';")
+    assert covered == rows and [r["id"] for r in covered] == ["1", "6", "11", "16"]
+    assert m["plan"] == {"action": "select", "access": "index_only", "index": "users.name"}
+    assert m["rows_scanned"] == 0 and m["files_touched"] == 1
+    # Other covered columns are rechecked on the index entries
+    rows, m = select(ex, "SELECT * FROM users WHERE name IN ('u1', 'u2') AND email = 'e7';")
+    assert rows == [{"id": "7", "name": "u2", "email": "e7"}] and m["plan"]["access"] == "index_only"
+    # Two indexed columns in the condition: a normal index scan
+    assert select(ex, "SELECT * FROM users WHERE name = 'u1' AND id = 6;")[1]["plan"]["access"] == "index"
+
+def test_covering_entries_follow_writes():
+    ex = Executor()
+    ex.vacuum_ratio = 0
+    make_users(ex)
+    assert ex.execute("CREATE INDEX by_name ON users (name) INCLUDE (email, id);")["ok"]
+    for sql in (
+        "UPDATE users SET email='changed' WHERE id=1;",
+        "UPDATE users SET name='u2' WHERE id=6;",
+        "DELETE FROM users WHERE id=11;",
+        "INSERT INTO users (id, name) VALUES (30, 'u1');",
+        "VACUUM users;",
+    ):
+        assert ex.execute(sql)["ok"], sql
+        for name in ("u1", "u2"):
+            rows, m = select(ex, f"SELECT * FROM users WHERE name = '{name}';")
+            assert m["plan"]["access"] == "index_only"
+            full = [r for r in ex.execute("SELECT * FROM users;")["result"] if r.get("name") == name]
+            assert rows == full, sql
+    assert select(ex, "SELECT * FROM users WHERE name = 'u1';")[0][-1] == {"id": "30", "name": "u1"}
+
+def test_create_and_drop_index_statements():
+    ex = Executor()
+    make_users(ex, n=3)
+    bad = [
+        ("CREATE INDEX i ON users (nick);", "Column 'nick' does not exist"),
+        ("CREATE INDEX i ON users (name) INCLUDE (name);", "cannot INCLUDE its key column"),
+        ("CREATE INDEX i ON missing (name);", "does not exist"),
+        ("DROP INDEX nope;", "Index 'nope' does not exist"),
+    ]
+    for sql, message in bad:
+        res = ex.execute(sql)
+        assert not res["ok"] and message in res["error"], (sql, res)
+
+    # A named index on the primary key adds covered columns to the key's own index
+    assert ex.execute("CREATE INDEX users_pk ON users (id) INCLUDE (name, email);")["ok"]
+    assert not ex.execute("CREATE INDEX again ON users (id);")["ok"]
+    assert select(ex, "SELECT * FROM users WHERE id = 2;")[1]["plan"]["access"] == "index_only"
+    assert ex.execute("DROP INDEX users_pk;")["result"] == {"dropped_index": "users_pk"}
+    rows, m = select(ex, "SELECT * FROM users WHERE id = 2;")
+    assert rows == [{"id": "2", "name": "u2", "email": "e2"}] and m["plan"]["access"] == "index"
+
+    # A plain secondary index covers queries that need nothing but its column
+    assert ex.execute("CREATE TABLE tags (tag TEXT);")["ok"]
+    for tag in ("a", "b", "a"):
+        assert ex.execute(f"INSERT INTO tags (tag) VALUES ('{tag}');")["ok"]
+    assert select(ex, "SELECT * FROM tags WHERE tag = 'a';")[1]["plan"]["access"] == "filter_scan"
+    assert ex.execute("CREATE INDEX tags_tag ON tags (tag);")["ok"]
+    rows, m = select(ex, "SELECT * FROM tags WHERE tag = 'a';")
+    assert rows == [{"tag": "a"}, {"tag": "a"}] and m["plan"]["access"] == "index_only"
+    assert ex.execute("DROP INDEX tags_tag;")["ok"]
+    assert select(ex, "SELECT * FROM tags WHERE tag = 'a';")[1]["plan"]["access"] == "filter_scan"
+
+def test_direct_fetch_by_row_offsets():
+    ex = Executor()
+    make_users(ex, n=50)
+    rows, m = select(ex, "SELECT * FROM users WHERE id IN (3, 4, 5, 40);")
+    assert [r["id"] for r in rows] == ["3", "4", "5", "40"] and m["rows_scanned"] == 4
+    # Appended rows extend the offset map; a rewritten base replaces it
+    assert ex.execute("INSERT INTO users (id, name, email) VALUES (50, 'new', 'e50');")["ok"]
+    assert ex.execute("DELETE FROM users WHERE id < 10;")["ok"]
+    assert ex.execute("VACUUM users;")["ok"]
+    rows, m = select(ex, "SELECT * FROM users WHERE id IN (10, 50);")
+    assert rows == [{"id": "10", "name": "u0", "email": "e10"}, {"id": "50", "name": "new", "email": "e50"}]
+    assert m["rows_scanned"] == 2
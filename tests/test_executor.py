@@ -96,4 +96,120 @@ def test_drop_all_tables_helper():
 
     # Both tables should be gone
     assert not ex.catalog.get_schema("t1")
-    assert not ex.catalog.get_schema("t2")
\ No newline at end of file
+    assert not ex.catalog.get_schema("t2")
+
+def setup_orders_table(ex, on_delete="RESTRICT"):
+    setup_users_table(ex)
+    res = ex.execute(parse(
+        f"CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id) ON DELETE {on_delete});"
+    ))
+    assert res["ok"]
+    ex.execute(parse("INSERT INTO users (id, name, email) VALUES (1, 'Gina', 'g@example.com');"))
+    ex.execute(parse("INSERT INTO users (id, name, email) VALUES (2, 'Hank', 'h@example.com');"))
+
+def test_foreign_key_violation_on_insert_and_update():
+    ex = Executor()
+    setup_orders_table(ex)
+
+    res = ex.execute(parse("INSERT INTO orders (id, user_id) VALUES (1, 1);"))
+    assert res["ok"]
+    res = ex.execute(parse("INSERT INTO orders (id, user_id) VALUES (2, 99);"))
+    assert not res["ok"]
+    assert "foreign key" in res["error"].lower()
+
+    res = ex.execute(parse("UPDATE orders SET user_id=99 WHERE id=1;"))
+    assert not res["ok"]
+    assert "foreign key" in res["error"].lower()
+
+def test_foreign_key_on_delete_restrict():
+    ex = Executor()
+    setup_orders_table(ex)
+    ex.execute(parse("INSERT INTO orders (id, user_id) VALUES (1, 1);"))
+
+    res = ex.execute(parse("DELETE FROM users WHERE id=1;"))
+    assert not res["ok"]
+    assert "referenced" in res["error"].lower()
+    assert len(ex.execute(parse("SELECT * FROM users;"))["result"]) == 2
+
+    # Unreferenced parents can still go
+    res = ex.execute(parse("DELETE FROM users WHERE id=2;"))
+    assert res["ok"] and res["result"]["deleted"] == 1
+
+def test_foreign_key_on_delete_cascade():
+    ex = Executor()
+    setup_orders_table(ex, on_delete="CASCADE")
+    ex.execute(parse("INSERT INTO orders (id, user_id) VALUES (1, 1);"))
+    ex.execute(parse("INSERT INTO orders (id, user_id) VALUES (2, 2);"))
+    ex.execute(parse("INSERT INTO orders (id, user_id) VALUES (3, 1);"))
+
+    res = ex.execute(parse("DELETE FROM users WHERE id=1;"))
+    assert res["ok"]
+
+    rows = ex.execute(parse("SELECT * FROM orders;"))["result"]
+    assert [r["id"] for r in rows] == ["2"]
+    # Child index was remapped after the cascade
+    assert ex.execute(parse("SELECT * FROM orders WHERE user_id=2;"))["result"] == rows
+
+def test_drop_referenced_table_fails():
+    ex = Executor()
+    setup_orders_table(ex)
+    res = ex.execute(parse("DROP TABLE users;"))
+    assert not res["ok"]
+    assert "orders" in res["error"]
+
+def test_updates_and_deletes_go_to_the_delta_log():
+    ex = Executor()
+    ex.vacuum_ratio = 0.4
+    setup_users_table(ex)
+    for i in range(6):
+        ex.execute(parse(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');"))
+    table_file = ex.storage._table_file("users")
+    size = os.path.getsize(table_file)
+
+    res = ex.execute("UPDATE users SET name='five' WHERE id=5;", metrics=True)
+    assert res["ok"] and res["metrics"]["bytes_written"] < size
+    assert ex.execute("DELETE FROM users WHERE id=1;")["ok"]
+    assert os.path.getsize(table_file) == size
+    # Row ids are unchanged, so index lookups still land on the right rows
+    assert ex.execute("SELECT * FROM users WHERE name='five';")["result"] == [{"id": "5", "name": "five"}]
+    assert ex.execute("SELECT * FROM users WHERE id=1;")["result"] == []
+    assert not ex.execute("INSERT INTO users (id, name) VALUES (6, 'five');")["ok"]
+
+    # 3 dead of 7 versions crosses the 0.4 garbage ratio and folds the log
+    assert ex.execute("DELETE FROM users WHERE id=2;")["ok"]
+    assert not os.path.exists(ex.storage._delta_file("users"))
+    assert len(ex.storage.read_all("users")) == 4
+    assert ex.execute("SELECT * FROM users WHERE id=5;")["result"] == [{"id": "5", "name": "five"}]
+    assert ex.execute("VACUUM;")["result"] == {"vacuumed": {}}
+
+def test_updates_and_deletes_find_rows_through_indexes():
+    ex = Executor()
+    assert ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, team TEXT, email TEXT, "
+                      "UNIQUE(team, email));")["ok"]
+    for i in range(20):
+        assert ex.execute(f"INSERT INTO users (id, name, team, email) VALUES ({i}, 'u{i}', 't{i % 2}', 'e{i}');")["ok"]
+
+    # The target row is fetched by id and the new name probed in its index: no scan
+    res = ex.execute("UPDATE users SET name='renamed' WHERE id=3;", metrics=True)
+    assert res["ok"] and res["metrics"]["plan"] == {"action": "update", "access": "index", "index": "users.id"}
+    assert res["metrics"]["rows_scanned"] == 1
+    res = ex.execute("DELETE FROM users WHERE id IN (4, 5) OR name='u6';", metrics=True)
+    assert res["result"] == {"deleted": 3} and res["metrics"]["plan"]["access"] == "index"
+    assert res["metrics"]["rows_scanned"] == 3
+    assert ex.execute("DELETE FROM users WHERE email='e7';", metrics=True)["metrics"]["plan"]["access"] == "filter_scan"
+
+    # Keys are checked against the other rows and against each other; nothing is written on failure
+    bad = [
+        ("UPDATE users SET id=2 WHERE id=1;", "Duplicate primary key 'id=2'"),
+        ("UPDATE users SET name='u9' WHERE id=8;", "Duplicate unique value 'name=u9'"),
+        ("UPDATE users SET name='same' WHERE id IN (8, 9);", "Duplicate unique value 'name=same'"),
+        ("UPDATE users SET team='t0', email='e10' WHERE id=11;", "Duplicate composite unique (team, email)"),
+        ("UPDATE users SET email='x' WHERE team='t1';", "Duplicate composite unique (team, email)"),
+    ]
+    for sql, message in bad:
+        res = ex.execute(sql)
+        assert not res["ok"] and message in res["error"], (sql, res)
+    assert ex.execute("SELECT * FROM users WHERE name='same' OR email='x';")["result"] == []
+    # Unchanged keys never clash with the row's own entries
+    assert ex.execute("UPDATE users SET name='u8', team='t1', email='moved' WHERE id=8;")["ok"]
+    assert ex.execute("SELECT id FROM users WHERE team='t1' AND email='moved';")["result"] == [{"id": "8"}]
@@ -0,0 +1,144 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+
+def make_people(ex, n=60, partitioned=False):
+    sql = ("CREATE TABLE people (id INTEGER PRIMARY KEY, email TEXT UNIQUE, team INTEGER, "
+           "city TEXT, age INTEGER)")
+    if partitioned:
+        sql += " PARTITION BY HASH(team) PARTITIONS 4"
+    assert ex.execute(sql + ";")["ok"]
+    assert ex.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT);")["ok"]
+    for t in range(6):
+        assert ex.execute(f"INSERT INTO teams (id, name) VALUES ({t}, 'team{t}');")["ok"]
+    rows = []
+    for i in range(n):
+        row = {"id": str(i), "email": f"p{i}@x.org", "team": str(i % 6), "city": ["Oslo", "Rome", "Lima"][i % 3],
+               "age": str(20 + i % 40)}
+        if i % 10 == 7:
+            row["city"] = None  # NULL city
+        cols = [c for c in row if row[c] is not None]
+        values = ", ".join(f"'{row[c]}'" for c in cols)
+        assert ex.execute(f"INSERT INTO people ({', '.join(cols)}) VALUES ({values});")["ok"]
+        rows.append(row)
+    return rows
+
+def ids(res):
+    assert res["ok"], res.get("error")
+    return sorted(int(r["id"]) for r in res["result"])
+
+def test_in_list_uses_one_index_probe_per_key():
+    ex = Executor()
+    make_people(ex)
+    res = ex.execute("SELECT * FROM people WHERE id IN (3, 5, 8, 999);", metrics=True)
+    assert ids(res) == [3, 5, 8]
+    m = res["metrics"]
+    assert m["plan"] == {"action": "select", "access": "index", "index": "people.id"}
+    assert m["index_probes"] == 4
+
+def test_and_intersects_and_or_unions_index_results():
+    ex = Executor()
+    make_people(ex)
+    res = ex.execute("SELECT * FROM people WHERE id IN (1, 2, 3, 4) AND email IN ('p2@x.org', 'p4@x.org', 'p9@x.org');",
+                     metrics=True)
+    assert ids(res) == [2, 4]
+    assert res["metrics"]["plan"]["index"] == "people.id, people.email"
+
+    res = ex.execute("SELECT * FROM people WHERE id = 10 OR email = 'p11@x.org';", metrics=True)
+    assert ids(res) == [10, 11]
+    assert res["metrics"]["plan"]["access"] == "index"
+
+    # An AND keeps using its indexed part and filters the rest
+    res = ex.execute("SELECT * FROM people WHERE id IN (1, 2, 3, 4) AND age > 22;", metrics=True)
+    assert ids(res) == [3, 4] and res["metrics"]["plan"]["access"] == "index"
+
+    # One unindexed branch makes an OR a scan
+    res = ex.execute("SELECT * FROM people WHERE id = 10 OR city = 'Lima';", metrics=True)
+    assert res["metrics"]["plan"]["access"] == "filter_scan"
+    assert ids(res) == sorted({10} | {i for i in range(60) if i % 3 == 2 and i % 10 != 7})
+
+def test_not_and_nulls_follow_three_valued_logic():
+    ex = Executor()
+    make_people(ex, n=20)
+    # NULL cities are neither 'Oslo' nor not 'Oslo'
+    oslo = ids(ex.execute("SELECT * FROM people WHERE city = 'Oslo';"))
+    not_oslo = ids(ex.execute("SELECT * FROM people WHERE NOT city = 'Oslo';"))
+    assert not set(oslo) & set(not_oslo)
+    assert sorted(oslo + not_oslo) == [i for i in range(20) if i % 10 != 7]
+    assert ids(ex.execute("SELECT * FROM people WHERE city NOT IN ('Oslo', 'Rome');")) == [2, 5, 8, 11, 14]
+    # Unknown AND false is false, so NOT of it is true even with a NULL city (17, but not 7)
+    assert ids(ex.execute("SELECT * FROM people WHERE NOT (city = 'Oslo' AND age < 30);")) == \
+        sorted([i for i in range(20) if i % 10 != 7 and not (i % 3 == 0 and 20 + i < 30)] + [17])
+
+def test_update_and_delete_accept_expressions():
+    ex = Executor()
+    make_people(ex, n=20)
+    assert ex.execute("UPDATE people SET city='Kyiv' WHERE team IN (1, 2) AND age >= 30;")["ok"]
+    assert ids(ex.execute("SELECT * FROM people WHERE city = 'Kyiv';")) == [13, 14, 19]
+    res = ex.execute("DELETE FROM people WHERE city = 'Kyiv' OR id IN (0, 1);")
+    assert res["result"] == {"deleted": 5}
+    assert 0 not in ids(ex.execute("SELECT * FROM people;"))
+    res = ex.execute("DELETE FROM people WHERE nope = 1 OR id = 2;")
+    assert not res["ok"] and "does not exist" in res["error"]
+
+def test_in_list_prunes_partitions():
+    ex = Executor()
+    make_people(ex, partitioned=True)
+    res = ex.execute("SELECT * FROM people WHERE team IN (1, 1);", metrics=True)
+    assert ids(res) == [i for i in range(60) if i % 6 == 1]
+    assert res["metrics"]["partitions_pruned"] == 3
+
+def test_join_pushes_single_table_parts_and_filters_the_rest():
+    ex = Executor()
+    make_people(ex, n=30)
+    sql = ("SELECT people.id, teams.name FROM people JOIN teams ON people.team = teams.id "
+           "WHERE teams.name IN ('team1', 'team2') AND (people.age < 25 OR teams.id = 2);")
+    res = ex.execute(sql)
+    assert res["ok"], res.get("error")
+    got = sorted(int(r["people.id"]) for r in res["result"])
+    assert got == [i for i in range(30) if i % 6 in (1, 2) and (20 + i < 25 or i % 6 == 2)]
+
+def test_random_expressions_match_python_evaluation():
+    ex = Executor()
+    people = make_people(ex)
+    rng = random.Random(7)
+
+    def leaf():
+        kind = rng.randrange(4)
+        if kind == 0:
+            v = rng.randrange(70)
+            return f"id = {v}", lambda r: r["id"] == str(v)
+        if kind == 1:
+            vs = rng.sample(range(6), 2)
+            return f"team IN ({vs[0]}, {vs[1]})", lambda r: int(r["team"]) in vs
+        if kind == 2:
+            v = rng.randrange(20, 60)
+            return f"age > {v}", lambda r: int(r["age"]) > v
+        c = rng.choice(["Oslo", "Rome"])
+        return f"city = '{c}'", lambda r: None if r["city"] is None else r["city"] == c
+
+    def expr(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return leaf()
+        op = rng.choice(["AND", "OR", "NOT"])
+        if op == "NOT":
+            sql, fn = expr(depth - 1)
+            return f"NOT ({sql})", lambda r: None if fn(r) is None else not fn(r)
+        (ls, lf), (rs, rf) = expr(depth - 1), expr(depth - 1)
+        if op == "AND":
+            def both(r):
+                a, b = lf(r), rf(r)
+                return False if a is False or b is False else (None if a is None or b is None else True)
+            return f"({ls}) AND ({rs})", both
+        def either(r):
+            a, b = lf(r), rf(r)
+            return True if a is True or b is True else (None if a is None or b is None else False)
+        return f"({ls}) OR ({rs})", either
+
+    for _ in range(40):
+        sql, fn = expr(3)
+        want = sorted(int(r["id"]) for r in people if fn(r) is True)
+        assert ids(ex.execute(f"SELECT * FROM people WHERE {sql};")) == want, sql
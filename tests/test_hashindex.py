@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms import index
+from rdbms.executor import Executor
+from rdbms.index import Index, HashIndex, write_index, index_file, PAGE_SIZE
+
+def test_hash_index_splits_and_answers_like_a_json_index():
+    write_index("hashed", "k", {}, hashed=True)
+    idx = Index("hashed", "k")
+    assert isinstance(idx, HashIndex) and os.path.getsize(idx.file) == 3 * PAGE_SIZE
+    expected = {}
+    for i in range(3000):
+        value = f"value-{i % 1000}"
+        idx.add(value, str(i))
+        expected.setdefault(value, []).append(str(i))
+    # Buckets split as they fill, so the directory deepens and keys spread over many pages
+    mm = idx._map()
+    depth = index._HEADER.unpack_from(mm, 0)[2]
+    assert depth >= 4 and os.path.getsize(idx.file) > 16 * PAGE_SIZE
+    assert idx.lookup("value-7") == ["7", "1007", "2007"] and idx.lookup("missing") == []
+    assert idx._load() == expected
+
+    idx.update(removed=[("value-7", "1007"), ("value-8", "8"), ("value-8", "1008"), ("value-8", "2008")],
+               added=[(42, "3000")])
+    assert idx.lookup_many(["value-7", "value-8", "42"]) == {"value-7": ["7", "2007"], "42": ["3000"]}
+    # A rebuild from the entries gives the same answers from a fresh, compact file
+    entries = idx._load()
+    write_index("hashed", "k", entries, hashed=True)
+    assert Index("hashed", "k")._load() == entries
+    os.remove(index_file("hashed", "k", hashed=True))
+
+def test_oversized_keys_chain_overflow_pages_and_covering_entries():
+    write_index("hashed", "big", {}, hashed=True)
+    idx = Index("hashed", "big")
+    many = [("same", str(i), ["x" * 50]) for i in range(200)]
+    idx.update(added=many)
+    assert len(idx.lookup("same")) == 200
+    assert idx.lookup_entries(["same"])["same"][199] == ["199", "x" * 50]
+    idx.update(removed=[("same", str(i)) for i in range(199)])
+    assert idx.lookup_entries(["same"]) == {"same": [["199", "x" * 50]]}
+    # Switching the column back to a JSON index removes the hash file
+    write_index("hashed", "big", {"a": ["1"]})
+    assert type(Index("hashed", "big")) is Index and not os.path.exists(index_file("hashed", "big", True))
+    os.remove(index_file("hashed", "big"))
+
+def test_using_hash_through_sql():
+    ex = Executor()
+    assert ex.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, price FLOAT);")["ok"]
+    for i in range(50):
+        assert ex.execute(f"INSERT INTO items (id, name, price) VALUES ({i}, 'n{i}', {i}.5);")["ok"]
+    res = ex.execute("CREATE INDEX items_pk ON items USING HASH (id) INCLUDE (price);")
+    assert res["ok"] and res["result"]["using"] == "hash"
+    assert os.path.exists(index_file("items", "id", True)) and not os.path.exists(index_file("items", "id"))
+    assert ex.execute("CREATE INDEX items_name ON items USING HASH (name);")["ok"]
+
+    res = ex.execute("SELECT * FROM items WHERE id = 7;", metrics=True)
+    assert res["result"] == [{"id": "7", "name": "n7", "price": "7.5"}]
+    assert res["metrics"]["plan"]["access"] == "index"
+    res = ex.execute("SELECT price FROM items WHERE id = 8;", metrics=True)
+    assert res["result"] == [{"price": "8.5"}] and res["metrics"]["plan"]["access"] == "index_only"
+    assert ex.execute("UPDATE items SET name='renamed', price=1.0 WHERE id=9;")["ok"]
+    assert ex.execute("DELETE FROM items WHERE id=10;")["ok"]
+    assert ex.execute("SELECT id FROM items WHERE name = 'renamed';")["result"] == [{"id": "9"}]
+    assert ex.execute("SELECT price FROM items WHERE id = 9;")["result"] == [{"price": "1.0"}]
+    assert ex.execute("SELECT * FROM items WHERE id = 10;")["result"] == []
+    assert "Duplicate primary key" in ex.execute("INSERT INTO items (id, name) VALUES (9, 'x');")["error"]
+
+    # Recovery checks and rebuilds hash index files like JSON ones
+    ex.close()
+    with open(index_file("items", "name", True), "r+b") as f:
+        f.write(b"garbage")
+    ex = Executor()
+    assert ex.recovery["rebuilt"] == {"items": ["name"]}
+    assert ex.execute("SELECT id FROM items WHERE name = 'n3';")["result"] == [{"id": "3"}]
+
+    # The primary key keeps a plain index once its named index is dropped
+    assert ex.execute("DROP INDEX items_pk;")["ok"]
+    assert os.path.exists(index_file("items", "id")) and not os.path.exists(index_file("items", "id", True))
+    assert ex.execute("DROP INDEX items_name;")["ok"]
+    assert not os.path.exists(index_file("items", "name", True))
+    assert not ex.execute("CREATE INDEX bad ON items USING BTREE (name);")["ok"]
+    assert json.loads(open(index_file("items", "id")).read())["7"] == ["7"]
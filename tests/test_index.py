@@ -53,4 +53,11 @@ def test_index_persists_between_instances():
 
     # Create a new Index object pointing to same file
     idx2 = Index("sessions", "token")
-    assert idx2.lookup("xyz") == ["0"]
\ No newline at end of file
+    assert idx2.lookup("xyz") == ["0"]
+def test_covering_entries_carry_included_values():
+    idx = Index("users", "name")
+    idx.update(added=[("ann", "0", ["a@x", "1"]), ("bob", "1", ["b@x", None]), ("ann", "2", ["c@x", "3"])])
+    assert idx.lookup("ann") == ["0", "2"]
+    assert idx.lookup_entries(["ann", "zed"]) == {"ann": [["0", "a@x", "1"], ["2", "c@x", "3"]]}
+    idx.remove("ann", "0")
+    assert idx.lookup_many(["ann", "bob"]) == {"ann": ["2"], "bob": ["1"]}
@@ -0,0 +1,115 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.joins import TableStats, order
+
+ORDERS_SQL = ("SELECT orders.id, users.name, events.title FROM orders "
+              "JOIN users ON orders.user_id = users.id "
+              "JOIN events ON orders.event_id = events.id")
+
+def make_shop(ex, users=6, events=4, orders=20):
+    for sql in (
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);",
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, city TEXT);",
+        "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id), "
+        "event_id INTEGER REFERENCES events(id));",
+    ):
+        assert ex.execute(sql)["ok"]
+    for i in range(users):
+        assert ex.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');")["ok"]
+    for i in range(events):
+        assert ex.execute(f"INSERT INTO events (id, title, city) VALUES ({i}, 'e{i}', 'c{i % 2}');")["ok"]
+    for i in range(orders):
+        assert ex.execute(f"INSERT INTO orders (id, user_id, event_id) VALUES "
+                          f"({i}, {i % users}, {i * 7 % events});")["ok"]
+
+def expected(where=lambda o, u, e: True, users=6, events=4, orders=20):
+    rows = []
+    for i in range(orders):
+        o, u, e = i, i % users, i * 7 % events
+        if where(o, u, e):
+            rows.append({"orders.id": str(o), "users.name": f"u{u}", "events.title": f"e{e}"})
+    return rows
+
+def key(rows):
+    return sorted(rows, key=lambda r: int(r["orders.id"]))
+
+def test_three_way_join_matches_nested_loops():
+    ex = Executor()
+    make_shop(ex)
+    res = ex.execute(ORDERS_SQL + ";", metrics=True)
+    assert res["ok"], res.get("error")
+    assert key(res["result"]) == expected()
+    assert sorted(t for t, _ in res["metrics"]["plan"]["join_order"]) == ["events", "orders", "users"]
+
+def test_where_is_pushed_to_its_table_and_drives_the_order():
+    ex = Executor()
+    make_shop(ex)
+    res = ex.execute(ORDERS_SQL + " WHERE users.id = 3;", metrics=True)
+    assert key(res["result"]) == expected(lambda o, u, e: u == 3)
+    # The single filtered user is the cheapest place to start, then the FK index on orders
+    order_ = res["metrics"]["plan"]["join_order"]
+    assert order_[0] == ["users", "scan"]
+    assert order_[1] == ["orders", "index"]
+
+    res = ex.execute(ORDERS_SQL + " WHERE city = 'c1';")
+    assert key(res["result"]) == expected(lambda o, u, e: e % 2 == 1)
+    res = ex.execute(ORDERS_SQL + " WHERE orders.id >= 15;")
+    assert key(res["result"]) == expected(lambda o, u, e: o >= 15)
+
+def test_join_results_follow_updates_and_deletes():
+    ex = Executor()
+    make_shop(ex)
+    assert ex.execute("UPDATE users SET name='renamed' WHERE id=2;")["ok"]
+    assert ex.execute("DELETE FROM orders WHERE id=0;")["ok"]
+    rows = key(ex.execute(ORDERS_SQL + ";")["result"])
+    want = [r for r in expected() if r["orders.id"] != "0"]
+    for r in want:
+        if r["users.name"] == "u2":
+            r["users.name"] = "renamed"
+    assert rows == want
+
+def test_select_star_and_join_errors():
+    ex = Executor()
+    make_shop(ex, users=2, events=1, orders=2)
+    rows = ex.execute("SELECT * FROM users JOIN orders ON orders.user_id = users.id WHERE orders.id = 1;")["result"]
+    assert rows == [{"users.id": "1", "users.name": "u1", "orders.id": "1", "orders.user_id": "1",
+                     "orders.event_id": "0"}]
+
+    bad = [
+        ("SELECT users.name FROM users JOIN orders ON users.id = events.id;", "Unknown table qualifier"),
+        ("SELECT users.name FROM users JOIN orders ON users.id = users.name;", "earlier table"),
+        ("SELECT users.name FROM users JOIN users ON users.id = users.id;", "only appear once"),
+        ("SELECT users.name FROM users JOIN orders ON orders.user_id = users.id WHERE id = 1;", "ambiguous"),
+        ("SELECT name FROM users JOIN orders ON orders.user_id = users.id;", "must be qualified"),
+    ]
+    for sql, message in bad:
+        res = ex.execute(sql)
+        assert not res["ok"] and message in res["error"], (sql, res)
+
+def test_order_prefers_small_inputs_and_index_lookups():
+    stats = {
+        "big": TableStats("big", 100000, indexed=["small_id"]),
+        "small": TableStats("small", 10, unique=["id"], indexed=["id"]),
+    }
+    edges = [("big", "small_id", "small", "id")]
+    assert [(t, m) for t, m, _ in order(stats, edges)] == [("small", "scan"), ("big", "index")]
+
+    # Without the index, stream the big table past a hash table of the small one
+    stats["big"].indexed = set()
+    assert [(t, m) for t, m, _ in order(stats, edges)] == [("big", "scan"), ("small", "hash")]
+
+def test_greedy_order_for_many_tables():
+    # A chain t0 - t1 - ... - t9 is beyond the dynamic-programming limit
+    stats = {f"t{i}": TableStats(f"t{i}", 1000 - i * 50, unique=["id"]) for i in range(10)}
+    stats["t5"].restrict("id", "=")
+    edges = [(f"t{i}", "id", f"t{i + 1}", "id") for i in range(9)]
+    steps = order(stats, edges)
+    assert steps[0][0] == "t5"
+    assert sorted(t for t, _, _ in steps) == sorted(stats)
+    joined = set()
+    for table, _, keys in steps:
+        assert all(outer in joined for outer, _, _ in keys)
+        joined.add(table)
@@ -0,0 +1,61 @@
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.parser import parse
+from rdbms.executor import Executor
+
+def setup_users(ex, n=5):
+    ex.execute(parse("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, email TEXT);"))
+    for i in range(1, n + 1):
+        ex.execute(parse(f"INSERT INTO users (id, name, email) VALUES ({i}, 'u{i}', 'u{i}@example.com');"))
+
+def test_metrics_attached_on_request():
+    ex = Executor()
+    setup_users(ex)
+
+    res = ex.execute(parse("SELECT * FROM users WHERE id=3;"))
+    assert "metrics" not in res
+
+    res = ex.execute("SELECT * FROM users WHERE id=3;", metrics=True)
+    assert res["ok"]
+    m = res["metrics"]
+    assert m["action"] == "select"
+    assert m["plan"]["access"] == "index"
+    assert m["index_probes"] == 1
+    assert m["rows_scanned"] == 1  # only the matching row is read
+    assert m["rows_returned"] == 1
+    assert m["bytes_read"] > 0 and m["bytes_written"] == 0
+    assert m["files_touched"] == 2  # table file + index file
+    assert m["parse_ms"] > 0
+
+    res = ex.execute("SELECT * FROM users WHERE email='u2@example.com';", metrics=True)
+    assert res["metrics"]["plan"]["access"] == "filter_scan"
+    assert res["metrics"]["index_probes"] == 0
+
+    res = ex.execute("DELETE FROM users WHERE id=5;", metrics=True)
+    assert res["metrics"]["rows_returned"] == 1
+    assert res["metrics"]["bytes_written"] > 0
+
+def test_parse_errors_are_reported_and_counted():
+    ex = Executor()
+    res = ex.execute("SELECT FROM", metrics=True)
+    assert not res["ok"]
+    assert "Invalid SELECT" in res["error"]
+    assert ex.metrics.snapshot()["unknown"]["error"] == 1
+
+def test_registry_aggregates_and_renders_prometheus():
+    ex = Executor()
+    setup_users(ex, n=3)
+    ex.execute(parse("SELECT * FROM users;"))
+    ex.execute(parse("INSERT INTO users (id, name, email) VALUES (1, 'dup', 'd@example.com');"))
+
+    snap = ex.metrics.snapshot()
+    assert snap["insert"]["ok"] == 3
+    assert snap["insert"]["error"] == 1
+    assert snap["select"]["rows_returned"] == 3
+
+    text = ex.metrics.render_prometheus()
+    assert 'minirdbms_statements_total{action="insert",status="error"} 1' in text
+    assert 'minirdbms_statement_duration_seconds_count{action="select"} 1' in text
+    assert 'minirdbms_rows_scanned_total{action="select"} 3' in text
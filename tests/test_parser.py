@@ -2,7 +2,7 @@ import pytest
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from rdbms.parser import parse
+from rdbms.parser import parse, ParseError
 
 def test_create_table_basic():
     sql = "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE);"
@@ -45,13 +45,21 @@ def test_select_join_with_condition():
     ast = parse(sql)
     assert ast["action"] == "select_join"
     assert "users.name" in ast["columns"]
-    assert ast["left_table"] == "users"
-    assert ast["right_table"] == "events"
-    assert ast["on"]["left"] == "users.id"
-    assert ast["on"]["right"] == "events.user_id"
+    assert ast["tables"] == ["users", "events"]
+    assert ast["joins"] == [{"table": "events", "left": "users.id", "right": "events.user_id"}]
     assert ast["condition"]["column"] == "events.title"
     assert ast["condition"]["value"] == "Meetup"
 
+def test_select_multi_way_join():
+    sql = ("SELECT orders.id, users.name, events.title FROM orders "
+           "JOIN users ON orders.user_id = users.id "
+           "INNER JOIN events ON events.id = orders.event_id;")
+    ast = parse(sql)
+    assert ast["tables"] == ["orders", "users", "events"]
+    assert [j["table"] for j in ast["joins"]] == ["users", "events"]
+    assert ast["joins"][1] == {"table": "events", "left": "events.id", "right": "orders.event_id"}
+    assert ast["condition"] is None
+
 def test_update_multiple_assignments():
     sql = "UPDATE users SET name='Alice', email='alice@example.com' WHERE id=1;"
     ast = parse(sql)
@@ -68,4 +76,109 @@ def test_delete():
     assert ast["action"] == "delete"
     assert ast["table"] == "users"
     assert ast["condition"]["column"] == "id"
-    assert ast["condition"]["value"] == "1"
\ No newline at end of file
+    assert ast["condition"]["value"] == "1"
+
+def test_create_table_with_references():
+    sql = ("CREATE TABLE orders (id INTEGER PRIMARY KEY, "
+           "user_id INTEGER REFERENCES users(id) ON DELETE CASCADE, event_id INTEGER, "
+           "FOREIGN KEY (event_id) REFERENCES events (id));")
+    ast = parse(sql)
+    assert ast["columns"]["user_id"]["references"] == {"table": "users", "column": "id", "on_delete": "cascade"}
+    assert ast["columns"]["event_id"]["references"] == {"table": "events", "column": "id", "on_delete": "restrict"}
+    assert "references" not in ast["columns"]["id"]
+
+def test_errors_report_positions():
+    with pytest.raises(ParseError) as err:
+        parse("SELECT * FROM users WHERE id=1 extra;")
+    assert err.value.position == 31
+    assert "expected end of statement, got 'extra'" in str(err.value)
+
+    with pytest.raises(ParseError, match="position 29: unterminated string"):
+        parse("SELECT * FROM users WHERE id='1;")
+    with pytest.raises(ParseError, match="2 columns but 1 values"):
+        parse("INSERT INTO users (id, name) VALUES (1);")
+    with pytest.raises(ValueError, match="expected WHERE"):
+        parse("DELETE FROM users;")
+
+def test_keywords_are_case_insensitive_and_whitespace_free():
+    ast = parse("select *\n  from users\twhere name='a  ;  b'")
+    assert ast == {"action": "select", "table": "users", "condition": {"column": "name", "value": "a  ;  b"}}
+
+def test_large_insert():
+    cols = [f"c{i}" for i in range(2000)]
+    sql = f"INSERT INTO t ({', '.join(cols)}) VALUES ({', '.join(repr(str(i)) for i in range(2000))});"
+    ast = parse(sql)
+    assert len(ast["row"]) == 2000 and ast["row"]["c1999"] == "1999"
+
+def test_partition_clause_and_comparisons():
+    ast = parse("CREATE TABLE t (id INTEGER, d DATE) PARTITION BY RANGE(d) ('2026-01-01', '2027-01-01') "
+                "WITH (compression = zlib);")
+    assert ast["partition"] == {"method": "range", "column": "d", "bounds": ["2026-01-01", "2027-01-01"]}
+    assert ast["options"] == {"compression": "zlib"}
+    ast = parse("CREATE TABLE t (id INTEGER) PARTITION BY HASH(id) PARTITIONS 8;")
+    assert ast["partition"] == {"method": "hash", "column": "id", "partitions": "8"}
+    assert parse("CREATE TABLE t (id INTEGER);")["partition"] is None
+
+    assert parse("SELECT * FROM t WHERE id>=10;")["condition"] == {"column": "id", "value": "10", "op": ">="}
+    assert parse("DELETE FROM t WHERE id < 3")["condition"] == {"column": "id", "value": "3", "op": "<"}
+    with pytest.raises(ParseError, match="expected a comparison"):
+        parse("SELECT * FROM t WHERE id 3;")
+
+def test_boolean_where_clauses():
+    cond = parse("SELECT * FROM t WHERE a = 1 OR b IN (2, '3') AND NOT c > 4;")["condition"]
+    assert cond == {"or": [
+        {"column": "a", "value": "1"},
+        {"and": [{"column": "b", "op": "in", "values": ["2", "3"]},
+                 {"not": {"column": "c", "value": "4", "op": ">"}}]},
+    ]}
+    cond = parse("DELETE FROM t WHERE (a = 1 OR a = 2) AND b NOT IN (?, ?);")["condition"]
+    assert cond["and"][0] == {"or": [{"column": "a", "value": "1"}, {"column": "a", "value": "2"}]}
+    assert cond["and"][1]["not"]["op"] == "in" and len(cond["and"][1]["not"]["values"]) == 2
+    with pytest.raises(ParseError, match="expected"):
+        parse("SELECT * FROM t WHERE a IN ();")
+    with pytest.raises(ParseError, match="expected"):
+        parse("SELECT * FROM t WHERE (a = 1;")
+
+def test_materialized_view_statements():
+    ast = parse("CREATE MATERIALIZED VIEW v AS SELECT a.x, b.y FROM a JOIN b ON a.id = b.a_id WHERE b.y = 1;")
+    assert ast["action"] == "create_view" and ast["view"] == "v"
+    assert ast["query"]["action"] == "select_join" and ast["query"]["tables"] == ["a", "b"]
+    assert parse("create materialized view v as select * from a;")["query"]["action"] == "select"
+    assert parse("REFRESH MATERIALIZED VIEW v;") == {"action": "refresh_view", "view": "v"}
+    assert parse("DROP MATERIALIZED VIEW v") == {"action": "drop_view", "view": "v"}
+    with pytest.raises(ParseError, match="expected AS"):
+        parse("CREATE MATERIALIZED VIEW v SELECT * FROM a;")
+    with pytest.raises(ParseError, match="TABLE, INDEX or MATERIALIZED VIEW"):
+        parse("CREATE VIEW v AS SELECT * FROM a;")
+
+def test_index_statements():
+    assert parse("CREATE INDEX by_name ON users (name) INCLUDE (email, id);") == {
+        "action": "create_index", "index": "by_name", "table": "users", "column": "name", "include": ["email", "id"]}
+    assert parse("create index i on t (c)")["include"] == []
+    assert parse("CREATE INDEX i ON t USING hash (c);")["using"] == "hash"
+    with pytest.raises(ParseError, match="only HASH is supported"):
+        parse("CREATE INDEX i ON t USING btree (c);")
+    assert parse("ADVISE INDEXES;") == {"action": "advise_indexes", "apply": False}
+    assert parse("advise indexes apply")["apply"] is True
+    assert parse("DROP INDEX by_name;") == {"action": "drop_index", "index": "by_name"}
+    with pytest.raises(ParseError, match="exactly one key column"):
+        parse("CREATE INDEX i ON t (a, b);")
+    with pytest.raises(ParseError, match="expected ON"):
+        parse("CREATE INDEX i t (a);")
+
+def test_select_lists_and_arithmetic():
+    ast = parse("SELECT id, users.name, price * (qty - 1) AS total, -id, 2/-x FROM users WHERE id > -1;")
+    assert ast["columns"] == [
+        "id", "users.name",
+        {"expr": {"op": "*", "args": [{"column": "price"},
+                                      {"op": "-", "args": [{"column": "qty"}, {"value": "1"}]}]}, "name": "total"},
+        {"expr": {"op": "neg", "args": [{"column": "id"}]}, "name": "-id"},
+        {"expr": {"op": "/", "args": [{"value": "2"}, {"op": "neg", "args": [{"column": "x"}]}]}, "name": "2/-x"},
+    ]
+    assert ast["condition"] == {"column": "id", "op": ">", "value": "-1"}
+    # * and / bind tighter than + and -
+    assert parse("SELECT a + b * 2 FROM t;")["columns"][0]["expr"]["op"] == "+"
+    with pytest.raises(ParseError, match="only supported in single-table SELECT"):
+        parse("SELECT a.x + 1 FROM a JOIN b ON a.id = b.a_id;")
+    with pytest.raises(ParseError, match="expected column alias"):
+        parse("SELECT a AS FROM t;")
@@ -0,0 +1,115 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.storage import Storage, DATA_DIR
+
+def ids(res):
+    assert res["ok"], res.get("error")
+    return sorted(int(r["id"]) for r in res["result"])
+
+def make_hash(ex, n=20):
+    assert ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE) "
+                      "PARTITION BY HASH(id) PARTITIONS 4;")["ok"]
+    for i in range(n):
+        assert ex.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');")["ok"]
+
+def make_range(ex):
+    assert ex.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT) "
+                      "PARTITION BY RANGE(id) (10, 20, 30);")["ok"]
+    for i in range(40):
+        assert ex.execute(f"INSERT INTO events (id, title) VALUES ({i}, 't{i}');")["ok"]
+
+def segment_stat(name):
+    path = Storage()._table_file(name)
+    st = os.stat(path)
+    return (path, st.st_ino, st.st_mtime_ns)
+
+def test_hash_partitions_are_separate_files_and_pruned():
+    ex = Executor()
+    make_hash(ex)
+    ts = ex.catalog.get_table("users")
+    assert ts.segments == [f"users.p{i}" for i in range(4)]
+    sizes = [len(ex.storage.read_all(s)) for s in ts.segments]
+    assert sum(sizes) == 20 and all(sizes)
+
+    res = ex.execute("SELECT * FROM users WHERE id=7;", metrics=True)
+    assert res["result"] == [{"id": "7", "name": "u7"}]
+    assert res["metrics"]["partitions_pruned"] == 3
+    assert ids(ex.execute("SELECT * FROM users WHERE name='u3';")) == [3]
+    assert not ex.execute("INSERT INTO users (id, name) VALUES (7, 'again');")["ok"]
+    assert not ex.execute("INSERT INTO users (id, name) VALUES (99, 'u7');")["ok"]
+
+def test_dml_rewrites_only_the_affected_partition():
+    ex = Executor()
+    make_hash(ex)
+    ts = ex.catalog.get_table("users")
+    target = ts.segment_of({"id": "5"})
+    before = {s: segment_stat(s) for s in ts.segments}
+
+    assert ex.execute("UPDATE users SET name='five' WHERE id=5;")["ok"]
+    assert ex.execute("DELETE FROM users WHERE id=5;")["result"] == {"deleted": 1}
+    after = {s: segment_stat(s) for s in ts.segments}
+    assert before == after
+    assert [s for s in ts.segments if os.path.exists(os.path.join(DATA_DIR, f"{s}.delta"))] == [target]
+    assert ex.execute("VACUUM users;")["result"] == {"vacuumed": {target: 2}}
+    assert [s for s in ts.segments if segment_stat(s) != before[s]] == [target]
+    assert ids(ex.execute("SELECT * FROM users;")) == [i for i in range(20) if i != 5]
+
+def test_update_of_partition_key_moves_the_row():
+    ex = Executor()
+    make_range(ex)
+    assert ex.execute("UPDATE events SET id=45 WHERE id=3;")["ok"]
+    assert ex.catalog.get_table("events").segment_of({"id": "45"}) == "events.p3"
+    assert ex.execute("SELECT * FROM events WHERE id=45;")["result"] == [{"id": "45", "title": "t3"}]
+    assert ex.execute("SELECT * FROM events WHERE id=3;")["result"] == []
+    # Indexes of the segment the row left were renumbered
+    assert ids(ex.execute("SELECT * FROM events WHERE id=9;")) == [9]
+    assert not ex.execute("UPDATE events SET id=12 WHERE id=45;")["ok"]
+
+def test_range_predicates_prune_partitions():
+    ex = Executor()
+    make_range(ex)
+    res = ex.execute("SELECT * FROM events WHERE id < 10;", metrics=True)
+    assert ids(res) == list(range(10)) and res["metrics"]["partitions_pruned"] == 3
+    res = ex.execute("SELECT * FROM events WHERE id >= 25;", metrics=True)
+    assert ids(res) == list(range(25, 40)) and res["metrics"]["partitions_pruned"] == 2
+    res = ex.execute("SELECT * FROM events WHERE id <= 20;", metrics=True)
+    assert ids(res) == list(range(21)) and res["metrics"]["partitions_pruned"] == 1
+    assert ex.execute("DELETE FROM events WHERE id > 29;")["result"] == {"deleted": 10}
+    assert ex.execute("SELECT * FROM events WHERE id > 'x';")["error"].startswith("Cannot compare")
+
+def test_partitioned_parent_and_child_keep_foreign_keys():
+    ex = Executor()
+    make_hash(ex, n=6)
+    assert ex.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, "
+                      "user_id INTEGER REFERENCES users(id) ON DELETE CASCADE) "
+                      "PARTITION BY RANGE(id) (100);")["ok"]
+    assert ex.execute("INSERT INTO orders (id, user_id) VALUES (1, 2);")["ok"]
+    assert ex.execute("INSERT INTO orders (id, user_id) VALUES (150, 2);")["ok"]
+    assert not ex.execute("INSERT INTO orders (id, user_id) VALUES (2, 42);")["ok"]
+    assert ex.execute("DELETE FROM users WHERE id=2;")["ok"]
+    assert ex.execute("SELECT * FROM orders;")["result"] == []
+
+def test_invalid_partition_specs():
+    ex = Executor()
+    assert "strictly increasing" in ex.execute(
+        "CREATE TABLE t (id INTEGER) PARTITION BY RANGE(id) (5, 5);")["error"]
+    assert "valid values" in ex.execute(
+        "CREATE TABLE t (id INTEGER) PARTITION BY RANGE(id) (a);")["error"]
+    assert "PARTITIONS" in ex.execute(
+        "CREATE TABLE t (id INTEGER) PARTITION BY HASH(id) PARTITIONS 0;")["error"]
+    assert "unknown column" in ex.execute(
+        "CREATE TABLE t (id INTEGER) PARTITION BY HASH(nope) PARTITIONS 2;")["error"]
+
+def test_recovery_works_per_partition():
+    ex = Executor()
+    make_range(ex)
+    ex.checkpoint()
+    with open(os.path.join(DATA_DIR, "events.p1.db"), "a") as f:
+        f.write('{"id": "19", "ti')
+    ex = Executor()
+    assert ex.recovery["truncated"] == {"events.p1": len('{"id": "19", "ti')}
+    assert ex.recovery["rebuilt"] == {"events.p1": ["id"]}
+    assert ids(ex.execute("SELECT * FROM events WHERE id >= 10;"))[:2] == [10, 11]
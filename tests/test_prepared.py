@@ -0,0 +1,70 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.parser import parse, Param
+from rdbms.prepared import normalize_sql
+
+def setup_table(ex):
+    ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, active BOOLEAN);")
+
+def test_parse_placeholders():
+    ast = parse("UPDATE users SET name=? WHERE id=?;")
+    assert ast["set"] == {"name": Param(0)}
+    assert ast["condition"] == {"column": "id", "value": Param(1)}
+
+    ast = parse("INSERT INTO users (id, name) VALUES (:id, ':not a param');")
+    assert ast["row"] == {"id": Param("id"), "name": ":not a param"}
+
+def test_positional_and_named_binding():
+    ex = Executor()
+    setup_table(ex)
+    res = ex.execute("INSERT INTO users (id, name, active) VALUES (?, ?, ?);", params=[1, "O'Brien", True])
+    assert res["ok"], res
+    ex.execute("INSERT INTO users (id, name, active) VALUES (:id, :name, :active);",
+               params={"id": 2, "name": "Ann", "active": False})
+
+    rows = ex.execute("SELECT * FROM users WHERE name=?;", params=["O'Brien"])["result"]
+    assert rows == [{"id": "1", "name": "O'Brien", "active": "TRUE"}]
+    stmt = ex.prepare("SELECT * FROM users WHERE id=:id;")
+    assert stmt.execute({"id": 2})["result"][0]["name"] == "Ann"
+
+    # A bound value is never re-parsed as SQL
+    ex.execute("UPDATE users SET name=? WHERE id=?;", params=["x' WHERE id=2; --", 1])
+    assert ex.execute("SELECT * FROM users WHERE id=2;")["result"][0]["name"] == "Ann"
+
+def test_parameter_errors():
+    ex = Executor()
+    setup_table(ex)
+    res = ex.execute("SELECT * FROM users WHERE id=?;")
+    assert not res["ok"] and "expects 1 parameter" in res["error"]
+    res = ex.execute("SELECT * FROM users WHERE id=:id;", params={"other": 1})
+    assert not res["ok"] and "Missing parameter" in res["error"]
+    res = ex.execute("UPDATE users SET name=? WHERE id=:id;", params=[1])
+    assert not res["ok"] and "Cannot mix" in res["error"]
+    res = ex.execute(parse("SELECT * FROM users;"), params=[1])
+    assert not res["ok"]
+
+def test_statement_cache_hits_and_plan_invalidation():
+    ex = Executor()
+    setup_table(ex)
+    assert normalize_sql("SELECT *  FROM users\n WHERE name='a  b';") == "SELECT * FROM users WHERE name='a  b'"
+
+    ex.statements.clear()
+    ex.statements.hits = ex.statements.misses = 0
+    for i in range(3):
+        ex.execute("SELECT * FROM users WHERE name=?;", params=[f"n{i}"])
+    assert (ex.statements.hits, ex.statements.misses) == (2, 1)
+
+    stmt = ex.prepare("SELECT * FROM users WHERE name=?;")
+    assert stmt.plan["access"] == "index"
+    version = stmt.catalog_version
+
+    # DDL bumps the catalog version, so the cached plan is recomputed
+    ex.execute("DROP TABLE users;")
+    ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, active BOOLEAN);")
+    ex.execute("INSERT INTO users (id, name, active) VALUES (1, 'a', TRUE);")
+    res = stmt.execute(["a"], metrics=True)
+    assert res["result"] == [{"id": "1", "name": "a", "active": "TRUE"}]
+    assert res["metrics"]["plan"]["access"] == "filter_scan"
+    assert stmt.catalog_version != version
@@ -0,0 +1,63 @@
+import json
+import pstats
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+
+def setup_table(ex):
+    ex.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT);")
+    for i in range(3):
+        ex.execute(f"INSERT INTO t (id, name) VALUES ({i}, 'n{i}');")
+
+def test_slow_query_log_writes_json_lines(tmp_path):
+    ex = Executor()
+    setup_table(ex)
+    log_path = tmp_path / "slow.jsonl"
+
+    ex.set_slow_query_log(0, str(log_path))
+    ex.execute("SELECT * FROM t WHERE id=1;")
+    ex.execute("SELECT * FROM missing;")
+
+    entries = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [e["sql"] for e in entries] == ["SELECT * FROM t WHERE id=1;", "SELECT * FROM missing;"]
+    assert entries[0]["ok"] and entries[0]["plan"]["access"] == "index"
+    assert entries[0]["rows_returned"] == 1 and entries[0]["rows_scanned"] == 1
+    assert not entries[1]["ok"] and "does not exist" in entries[1]["error"]
+
+    # Above the threshold nothing is written; None switches it off entirely
+    ex.set_slow_query_log(60_000, str(log_path))
+    ex.execute("SELECT * FROM t;")
+    ex.set_slow_query_log(None)
+    ex.execute("SELECT * FROM t;")
+    assert len(log_path.read_text().splitlines()) == 2
+
+def test_cprofile_sampling_dumps_pstats(tmp_path):
+    ex = Executor()
+    setup_table(ex)
+    ex.set_profiling(1.0, "cprofile", str(tmp_path))
+
+    res = ex.execute("DELETE FROM t WHERE id=2;", metrics=True)
+    assert res["ok"]
+    path = res["metrics"]["profile"]
+    assert os.path.dirname(path) == str(tmp_path) and path.endswith("-delete.pstats")
+    stats = pstats.Stats(path)
+    assert any(func[2] == "_delete" for func in stats.stats)
+
+    ex.set_profiling(0)
+    assert "profile" not in ex.execute("SELECT * FROM t;", metrics=True)["metrics"]
+
+def test_span_sampling_times_operators():
+    ex = Executor()
+    setup_table(ex)
+    ex.set_profiling(1.0, "spans")
+
+    spans = ex.execute("DELETE FROM t WHERE id=0;", metrics=True)["metrics"]["spans_ms"]
+    assert {"index.lookup", "storage.fetch", "storage.delta"} <= set(spans) and "storage.scan" not in spans
+    assert "storage.scan" in ex.execute("DELETE FROM t WHERE name='none';", metrics=True)["metrics"]["spans_ms"]
+    spans = ex.execute("VACUUM t;", metrics=True)["metrics"]["spans_ms"]
+    assert {"storage.compact", "storage.rewrite", "index.remap"} <= set(spans)
+
+    with pytest.raises(ValueError, match="Unknown profile mode"):
+        ex.set_profiling(0.5, "flamegraph")
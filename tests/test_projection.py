@@ -0,0 +1,91 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+
+TABLES = {
+    "plain": "",
+    "blocks": " WITH (compression = zlib, block_rows = 4)",
+    "parts": " PARTITION BY HASH(id) PARTITIONS 3",
+}
+
+def make_items(ex, table, options):
+    assert ex.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT, price FLOAT, "
+                      f"qty INTEGER, note TEXT){options};")["ok"]
+    for i in range(10):
+        # Row 3 has no qty
+        qty = ("", "") if i == 3 else (", qty", f", {i * 2}")
+        assert ex.execute(f"INSERT INTO {table} (id, name, price{qty[0]}, note) "
+                          f"VALUES ({i}, 'n{i}', {i}.5{qty[1]}, 'long note {i}');")["ok"]
+
+def select(ex, sql):
+    res = ex.execute(sql)
+    assert res["ok"], (sql, res.get("error"))
+    return sorted(res["result"], key=lambda r: int(r.get("id", 0)))
+
+def test_column_lists_and_expressions_on_every_format():
+    ex = Executor()
+    for table, options in TABLES.items():
+        make_items(ex, table, options)
+        assert ex.execute(f"UPDATE {table} SET name='renamed' WHERE id=1;")["ok"]
+        rows = select(ex, f"SELECT id, {table}.name FROM {table} WHERE id < 3;")
+        assert rows == [{"id": "0", f"{table}.name": "n0"}, {"id": "1", f"{table}.name": "renamed"},
+                        {"id": "2", f"{table}.name": "n2"}]
+        rows = select(ex, f"SELECT id, price * 2 AS double, (id - qty) / 3, -qty, (qty + 1) * -2 FROM {table} "
+                          f"WHERE name = 'n3' OR id IN (1, 9);")
+        assert rows == [
+            {"id": "1", "double": "3.0", "(id - qty) / 3": "0", "-qty": "-2", "(qty + 1) * -2": "-6"},
+            {"id": "3", "double": "7.0", "(id - qty) / 3": None, "-qty": None, "(qty + 1) * -2": None},
+            {"id": "9", "double": "19.0", "(id - qty) / 3": "-3", "-qty": "-18", "(qty + 1) * -2": "-38"},
+        ]
+        # Explicit lists keep NULL columns; WHERE may read columns that are not selected
+        assert select(ex, f"SELECT qty FROM {table} WHERE note = 'long note 3';") == [{"qty": None}]
+
+def test_projection_is_pushed_into_block_scans():
+    ex = Executor()
+    make_items(ex, "items", TABLES["blocks"])
+    decoded = []
+    store_rows = ex.storage.scan
+
+    def scan(table, probe=None, columns=None):
+        pairs = store_rows(table, probe, columns)
+        decoded.extend(row for _, row in pairs)
+        return pairs
+    ex.storage.scan = scan
+    assert select(ex, "SELECT id FROM items;")[:2] == [{"id": "0"}, {"id": "1"}]
+    assert select(ex, "SELECT name FROM items WHERE price > 8;") == [{"name": "n8"}, {"name": "n9"}]
+    assert decoded and all(set(row) <= {"id", "name", "price"} for row in decoded)
+
+def test_index_only_plans_use_the_select_list():
+    ex = Executor()
+    make_items(ex, "items", "")
+    assert ex.execute("CREATE INDEX items_name ON items (name) INCLUDE (price);")["ok"]
+    res = ex.execute("SELECT name, price + 1 AS next FROM items WHERE name = 'n4';", metrics=True)
+    assert res["result"] == [{"name": "n4", "next": "5.5"}]
+    assert res["metrics"]["plan"]["access"] == "index_only"
+    res = ex.execute("SELECT name, qty FROM items WHERE name = 'n4';", metrics=True)
+    assert res["result"] == [{"name": "n4", "qty": "8"}] and res["metrics"]["plan"]["access"] == "index"
+    prepared = ex.prepare("SELECT id * ? AS scaled FROM items WHERE id = ?;")
+    assert ex.execute(prepared, params=[10, 7])["result"] == [{"scaled": "70"}]
+
+def test_bad_select_lists():
+    ex = Executor()
+    make_items(ex, "items", "")
+    bad = [
+        ("SELECT nope FROM items;", "Column 'nope' does not exist"),
+        ("SELECT other.id FROM items;", "Column 'other.id' does not exist"),
+        ("SELECT name + 1 FROM items;", "cannot be used in arithmetic"),
+        ("SELECT id + 'x' FROM items;", "'x' is not a number"),
+        ("SELECT id / 0 FROM items;", "Division by zero"),
+        ("SELECT id, name AS id FROM items;", "must be unique"),
+        ("SELECT id + 1 AS id, id FROM items;", "must be unique"),
+        ("CREATE MATERIALIZED VIEW v AS SELECT id + 1 FROM items;", "cannot compute expressions"),
+    ]
+    for sql, message in bad:
+        res = ex.execute(sql)
+        assert not res["ok"] and message in res["error"], (sql, res)
+    assert select(ex, "SELECT id, name AS label FROM items WHERE id = 2;") == [{"id": "2", "label": "n2"}]
+    assert ex.execute("CREATE MATERIALIZED VIEW cheap AS SELECT id, name FROM items WHERE price < 3;")["ok"]
+    assert select(ex, "SELECT * FROM cheap;") == [{"id": "0", "name": "n0"}, {"id": "1", "name": "n1"},
+                                                  {"id": "2", "name": "n2"}]
@@ -0,0 +1,75 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.storage import DATA_DIR
+from rdbms.index import Index
+
+def setup_tables(ex):
+    ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE);")
+    ex.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT);")
+    for i in range(3):
+        ex.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');")
+    ex.execute("INSERT INTO notes (id, body) VALUES (1, 'hello');")
+
+def test_clean_close_needs_no_repair():
+    ex = Executor()
+    setup_tables(ex)
+    generation = ex.close()
+
+    report = Executor().recovery
+    assert report["generation"] == generation and report["clean"]
+    assert report["rebuilt"] == {} and report["truncated"] == {}
+
+def test_torn_append_is_cut_and_indexes_rebuilt():
+    ex = Executor()
+    setup_tables(ex)
+    ex.checkpoint()
+    # A row appended after the checkpoint, then a crash before its index updates
+    # and halfway through the next append
+    with open(os.path.join(DATA_DIR, "users.db"), "a") as f:
+        f.write('{"id": "7", "name": "u7"}\n{"id": "8", "na')
+
+    ex = Executor()
+    assert ex.recovery["truncated"] == {"users": len('{"id": "8", "na')}
+    assert sorted(ex.recovery["rebuilt"]["users"]) == ["id", "name"]
+    assert "notes" not in ex.recovery["rebuilt"]
+    assert ex.execute("SELECT * FROM users WHERE id=7;")["result"] == [{"id": "7", "name": "u7"}]
+    assert not ex.execute("INSERT INTO users (id, name) VALUES (7, 'dup');")["ok"]
+
+def test_damaged_index_is_rebuilt_alone():
+    ex = Executor()
+    setup_tables(ex)
+    ex.close()
+    with open(Index("users", "name").file, "w") as f:
+        f.write('{"u0": [')
+
+    ex = Executor()
+    assert ex.recovery["rebuilt"] == {"users": ["name"]}
+    assert ex.execute("SELECT * FROM users WHERE name='u2';")["result"] == [{"id": "2", "name": "u2"}]
+
+def test_truncated_catalog_is_restored_from_manifest():
+    ex = Executor()
+    setup_tables(ex)
+    ex.checkpoint()
+    with open(os.path.join(DATA_DIR, "catalog.json"), "w") as f:
+        f.write('{"users": {"col')
+
+    ex = Executor()
+    assert ex.recovery["catalog_restored"]
+    assert sorted(ex.catalog.list_tables()) == ["notes", "users"]
+    assert len(ex.execute("SELECT * FROM users;")["result"]) == 3
+    os.remove(os.path.join(DATA_DIR, "catalog.json.corrupt"))
+
+def test_delta_written_without_its_index_update_is_reindexed():
+    ex = Executor()
+    setup_tables(ex)
+    ex.checkpoint()
+    # Crash after the delta append of "UPDATE users SET name='zed' WHERE id=1" but before the index update
+    ex.storage.write_deltas("users", [(1, {"id": "1", "name": "zed"})])
+
+    ex = Executor()
+    assert sorted(ex.recovery["rebuilt"]["users"]) == ["id", "name"]
+    assert ex.execute("SELECT * FROM users WHERE name='zed';")["result"] == [{"id": "1", "name": "zed"}]
+    assert ex.execute("SELECT * FROM users WHERE name='u1';")["result"] == []
@@ -0,0 +1,110 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.resultcache import ResultCache, estimate_size
+
+def make_tables(ex):
+    assert ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);")["ok"]
+    assert ex.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, "
+                      "user_id INTEGER REFERENCES users(id) ON DELETE CASCADE);")["ok"]
+    for i in range(5):
+        assert ex.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');")["ok"]
+        assert ex.execute(f"INSERT INTO orders (id, user_id) VALUES ({i}, {i});")["ok"]
+
+def names(res):
+    assert res["ok"], res.get("error")
+    return sorted(r["name"] for r in res["result"])
+
+def test_repeated_selects_are_served_from_the_cache():
+    ex = Executor()
+    make_tables(ex)
+    ex.set_result_cache(1 << 20)
+    first = ex.execute("SELECT * FROM users;", metrics=True)
+    again = ex.execute("SELECT *   FROM users", metrics=True)
+    assert again["result"] == first["result"]
+    assert again["metrics"]["plan"]["access"] == "result_cache"
+    assert again["metrics"]["rows_scanned"] == 0 and again["metrics"]["rows_returned"] == 5
+
+    # Parameters are part of the key
+    stmt = ex.prepare("SELECT * FROM users WHERE id=?;")
+    assert names(stmt.execute([1])) == ["u1"]
+    assert names(stmt.execute([2])) == ["u2"]
+    assert names(stmt.execute([1])) == ["u1"]
+    stats = ex.result_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 3, 3)
+
+    # Keyed by the values bound, not the Python ones: 1 == 1.0 == True
+    assert ex.execute("CREATE TABLE p (id INTEGER PRIMARY KEY, v TEXT);")["ok"]
+    for i, v in enumerate(["1", "1.0", "TRUE"]):
+        assert ex.execute("INSERT INTO p (id, v) VALUES (?, ?);", params=[i, v])["ok"]
+    for value, expected in ((1, "0"), (1.0, "1"), (True, "2"), (1, "0")):
+        res = ex.execute("SELECT id FROM p WHERE v = ?;", params=[value])
+        assert res["result"] == [{"id": expected}], value
+    # Unused named parameters are not part of the key
+    res = ex.execute("SELECT id FROM p WHERE id = :id;", params={"id": 1, "x": [1]})
+    assert res["result"] == [{"id": "1"}]
+
+    # Callers get copies they are free to change
+    again["result"][0]["name"] = "changed"
+    assert "changed" not in names(ex.execute("SELECT * FROM users;"))
+
+def test_writes_invalidate_only_the_tables_they_touch():
+    ex = Executor()
+    make_tables(ex)
+    ex.set_result_cache(1 << 20)
+    ex.execute("SELECT * FROM users;")
+    ex.execute("SELECT * FROM orders;")
+
+    assert ex.execute("INSERT INTO orders (id, user_id) VALUES (9, 1);")["ok"]
+    assert ex.execute("SELECT * FROM users;", metrics=True)["metrics"]["plan"]["access"] == "result_cache"
+    assert len(ex.execute("SELECT * FROM orders;")["result"]) == 6
+
+    assert ex.execute("UPDATE users SET name='x' WHERE id=0;")["ok"]
+    assert "x" in names(ex.execute("SELECT * FROM users;"))
+
+    # ON DELETE CASCADE removes orders too, so their cached result goes stale as well
+    ex.execute("SELECT * FROM orders;")
+    assert ex.execute("DELETE FROM users WHERE id=1;")["ok"]
+    assert sorted(r["id"] for r in ex.execute("SELECT * FROM orders;")["result"]) == ["0", "2", "3", "4"]
+    assert ex.result_cache.stats()["invalidations"] == 3
+
+def test_joins_are_invalidated_by_any_joined_table():
+    ex = Executor()
+    make_tables(ex)
+    ex.set_result_cache(1 << 20)
+    sql = "SELECT users.name, orders.id FROM orders JOIN users ON orders.user_id = users.id;"
+    assert len(ex.execute(sql)["result"]) == 5
+    assert ex.execute("INSERT INTO orders (id, user_id) VALUES (7, 2);")["ok"]
+    assert len(ex.execute(sql)["result"]) == 6
+    assert ex.execute("DROP TABLE orders;")["ok"]
+    assert ex.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id));")["ok"]
+    assert ex.execute(sql)["result"] == []
+
+def test_byte_budget_evicts_least_recently_used():
+    rows = [{"id": str(i), "name": "x" * 50} for i in range(10)]
+    size = estimate_size(rows)
+    cache = ResultCache(size * 2 + size // 2)
+    cache.put("a", {"t": 0}, rows)
+    cache.put("b", {"t": 0}, rows)
+    assert cache.get("a", {"t": 0}) == rows  # a is now more recent than b
+    cache.put("c", {"t": 0}, rows)
+    assert cache.get("b", {"t": 0}) is None
+    assert cache.get("a", {"t": 0}) == rows and cache.get("c", {"t": 0}) == rows
+    assert cache.stats()["evictions"] == 1 and cache.bytes <= cache.budget
+    # Too big to ever fit
+    assert not cache.put("d", {"t": 0}, rows * 3)
+    assert cache.get("c", {"t": 1}) is None
+
+def test_cache_is_opt_in_and_reported_in_metrics():
+    ex = Executor()
+    make_tables(ex)
+    assert ex.result_cache is None
+    ex.set_result_cache(1 << 20)
+    ex.execute("SELECT * FROM users;")
+    ex.execute("SELECT * FROM users;")
+    text = ex.metrics.render_prometheus()
+    assert "minirdbms_result_cache_hits 1" in text
+    ex.set_result_cache(None)
+    assert "result_cache" not in ex.metrics.render_prometheus()
@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+from rdbms.rows import Record, record_class, from_dicts, from_arrays, column
+
+def test_records_read_like_the_row_dicts_they_replace():
+    cls = record_class(["id", "name", "email"])
+    assert record_class(("id", "name", "email")) is cls
+    row = {"id": "1", "email": "a@b"}
+    rec = from_dicts(cls, [row])[0]
+    assert rec == row and rec != {"id": "1"} and rec == from_arrays(cls, ["email", "id"], [["a@b", "1"]])[0]
+    assert rec.get("name") is None and rec.get("name", "-") == "-" and rec.get("nope") is None
+    assert rec["id"] == "1" and "email" in rec and "name" not in rec
+    with pytest.raises(KeyError):
+        rec["name"]
+    assert list(rec) == rec.keys() == ["id", "email"] and len(rec) == 2
+    assert rec.items() == [("id", "1"), ("email", "a@b")] and rec.values() == ["1", "a@b"]
+    copy = rec.copy()
+    copy["name"] = "x"
+    assert type(copy) is dict and "name" not in rec
+    assert json.dumps(rec.as_dict()) == json.dumps(row)
+    assert column([rec, from_dicts(cls, [{"id": "2"}])[0]], "email") == ["a@b", None]
+    assert column([row], "email") == ["a@b"]
+
+def test_engine_reads_records_and_returns_dicts():
+    ex = Executor()
+    for options in ("", " WITH (compression = zlib, block_rows = 2)"):
+        ex.drop_all_tables()
+        assert ex.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, email TEXT, "
+                          f"UNIQUE(name, email)){options};")["ok"]
+        for i in range(5):
+            assert ex.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');")["ok"]
+        assert ex.execute("UPDATE users SET email='x' WHERE id=1;")["ok"]
+        ts = ex.catalog.get_table("users")
+        rows = ex._read(ts)
+        assert all(isinstance(r, Record) for r in rows) and rows[1] == {"id": "1", "name": "u1", "email": "x"}
+
+        res = ex.execute("SELECT * FROM users WHERE id < 2;")["result"]
+        assert res == [{"id": "0", "name": "u0"}, {"id": "1", "name": "u1", "email": "x"}]
+        assert all(type(r) is dict for r in res)
+        # Constraint checks run over the records; a row never clashes with itself
+        assert "Duplicate primary key" in ex.execute("INSERT INTO users (id, name) VALUES (3, 'new');")["error"]
+        assert "Duplicate unique value" in ex.execute("UPDATE users SET name='u2' WHERE id=4;")["error"]
+        assert ex.execute("UPDATE users SET name='u4', email='y' WHERE id=4;")["ok"]
+        assert ex.execute("DELETE FROM users WHERE id > 2;")["result"] == {"deleted": 2}
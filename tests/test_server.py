@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.server import Server
+from rdbms.client import connect, ConnectionPool, DatabaseError
+
+@pytest.fixture
+def server():
+    srv = Server(port=0)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(srv.start(), loop).result(5)
+    yield srv
+    asyncio.run_coroutine_threadsafe(srv.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+def test_cursor_roundtrip(server):
+    host, port = server.address
+    with connect(host, port) as conn:
+        cur = conn.cursor()
+        cur.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, email TEXT);")
+        cur.execute("INSERT INTO users (id, name, email) VALUES (1, 'Alice', 'alice@example.com');")
+        assert cur.rowcount == 1
+
+        cur.execute("SELECT * FROM users WHERE id=1;")
+        assert [d[0] for d in cur.description] == ["id", "name", "email"]
+        assert cur.fetchone()["name"] == "Alice"
+        assert cur.fetchone() is None
+
+        with pytest.raises(DatabaseError, match="primary key"):
+            cur.execute("INSERT INTO users (id, name, email) VALUES (1, 'Bob', 'bob@example.com');")
+        with pytest.raises(DatabaseError, match="Invalid SELECT"):
+            cur.execute("SELECT FROM")
+
+        assert conn.execute("SELECT * FROM users;", metrics=True)["metrics"]["rows_returned"] == 1
+        assert 'minirdbms_statements_total{action="insert",status="error"} 1' in conn.metrics()
+
+def test_pipelined_responses_keep_request_order(server):
+    host, port = server.address
+    with connect(host, port) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY);")
+        statements = [f"INSERT INTO t (id) VALUES ({i});" for i in range(20)]
+        statements.append("SELECT * FROM t;")
+        responses = conn.pipeline(statements)
+    assert all(r["ok"] for r in responses)
+    assert [r["result"]["row"]["id"] for r in responses[:-1]] == [str(i) for i in range(20)]
+    assert len(responses[-1]["result"]) == 20
+
+def test_a_failing_request_does_not_stall_the_connection(server, monkeypatch):
+    execute = server.executor.execute
+    def failing(sql, **kwargs):
+        if sql == "BOOM":
+            raise RuntimeError("engine failure")
+        return execute(sql, **kwargs)
+    monkeypatch.setattr(server.executor, "execute", failing)
+    host, port = server.address
+    with connect(host, port, timeout=5) as conn:
+        responses = conn.pipeline(["BOOM", "CREATE TABLE t (id INTEGER PRIMARY KEY);"])
+        assert responses[0]["ok"] is False and responses[0]["error"] == "engine failure"
+        assert responses[1]["ok"]
+        assert conn.execute("SELECT * FROM t;")["result"] == []
+
+def test_parameters_are_bound_server_side(server):
+    host, port = server.address
+    with connect(host, port) as conn:
+        cur = conn.cursor()
+        cur.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);")
+        cur.executemany("INSERT INTO users (id, name) VALUES (?, ?);", [(1, "O'Brien"), (2, "Ann")])
+        assert cur.rowcount == 2
+        cur.execute("SELECT * FROM users WHERE name=:name;", {"name": "O'Brien"})
+        assert cur.fetchall() == [{"id": "1", "name": "O'Brien"}]
+        with pytest.raises(DatabaseError, match="expects 1 parameter"):
+            cur.execute("SELECT * FROM users WHERE id=?;", [])
+
+def test_pool_reuses_connections(server):
+    host, port = server.address
+    pool = ConnectionPool(size=2, host=host, port=port)
+    pool.execute("CREATE TABLE t (id INTEGER PRIMARY KEY);")
+
+    errors = []
+    def worker(start):
+        for i in range(start, start + 10):
+            if not pool.execute(f"INSERT INTO t (id) VALUES ({i});")["ok"]:
+                errors.append(i)
+
+    threads = [threading.Thread(target=worker, args=(n * 10,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert pool._open <= 2
+    assert len(pool.execute("SELECT * FROM t;")["result"]) == 40
+    pool.close()
@@ -3,20 +3,24 @@ import json
 import pytest
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from rdbms import fileio, storage as storage_module
 from rdbms.storage import Storage, DATA_DIR
 
+
 @pytest.fixture
 def storage():
     return Storage()
 
+
 @pytest.fixture(autouse=True)
 def cleanup():
     # Clean up any leftover files before and after each test
     yield
     for f in os.listdir(DATA_DIR):
-        if f.endswith(".db"):
+        if f.endswith((".db", ".delta", ".zmap")):
             os.remove(os.path.join(DATA_DIR, f))
 
+
 def test_insert_and_read_all(storage):
     table = "test_users"
     row1 = {"id": 1, "name": "Alice"}
@@ -28,11 +32,13 @@ def test_insert_and_read_all(storage):
     rows = storage.read_all(table)
     assert rows == [row1, row2]
 
+
 def test_read_all_empty_table(storage):
     table = "nonexistent"
     rows = storage.read_all(table)
     assert rows == []
 
+
 def test_drop_table_removes_file(storage):
     table = "temp"
     row = {"id": 1, "name": "Temp"}
@@ -44,6 +50,7 @@ def test_drop_table_removes_file(storage):
     storage.drop_table(table)
     assert not os.path.exists(file_path)
 
+
 def test_insert_appends_rows(storage):
     table = "append_test"
     row1 = {"id": 1, "val": "first"}
@@ -58,4 +65,88 @@ def test_insert_appends_rows(storage):
         lines = f.readlines()
     assert len(lines) == 2
     assert json.loads(lines[0]) == row1
-    assert json.loads(lines[1]) == row2
\ No newline at end of file
+    assert json.loads(lines[1]) == row2
+
+
+def test_deltas_overlay_rows_until_compacted(storage):
+    table = "delta_test"
+    for i in range(4):
+        assert storage.insert(table, {"id": i}) == i
+    storage.write_deltas(table, [(1, {"id": 10}), (2, None)])
+    storage.write_deltas(table, [(1, {"id": 11})])
+
+    assert storage.scan(table) == [(0, {"id": 0}), (1, {"id": 11}), (3, {"id": 3})]
+    assert storage.fetch(table, ["3", "2", "1"]) == [{"id": 11}, {"id": 3}]
+    assert storage.garbage(table) == (3, 3)
+    assert storage.insert(table, {"id": 4}) == 4
+
+    assert storage.compact(table) == 3
+    assert storage.scan(table) == [(0, {"id": 0}), (1, {"id": 11}), (2, {"id": 3}), (3, {"id": 4})]
+    assert not os.path.exists(storage._delta_file(table))
+
+
+def test_stale_and_torn_deltas_are_repaired(storage):
+    table = "delta_repair"
+    for i in range(3):
+        storage.insert(table, {"id": i})
+    storage.write_deltas(table, [(0, None)])
+    with open(storage._delta_file(table)) as f:
+        delta = f.read()
+    with open(storage._delta_file(table), "a") as f:
+        f.write('[1, {"id"')
+    assert storage.repair(table) == len('[1, {"id"')
+    assert storage.read_all(table) == [{"id": 1}, {"id": 2}]
+
+    # A compaction that crashed before removing the old delta
+    storage.rewrite(table, storage.read_all(table))
+    with open(storage._delta_file(table), "w") as f:
+        f.write(delta)
+    assert storage.read_all(table) == [{"id": 1}, {"id": 2}]
+    storage.repair(table)
+    assert not os.path.exists(storage._delta_file(table))
+
+
+def test_rewrites_write_new_base_generations(storage):
+    table = "gen_test"
+    for i in range(3):
+        storage.insert(table, {"id": i})
+    storage.write_deltas(table, [(0, None)])
+    old = storage._table_file(table)
+    with open(old) as f:
+        base = f.read()
+    with open(storage._delta_file(table)) as f:
+        delta = f.read()
+    assert json.loads(delta.splitlines()[0]) == {"base": "gen_test.db"}
+
+    storage.compact(table)
+    assert storage._table_file(table).endswith("gen_test.1.db") and not os.path.exists(old)
+    assert storage._base_id(table) == "gen_test.1.db"
+
+    # A compaction that crashed after the rename: the old generation and its
+    # delta are still there, but only the newest generation is read
+    for path, data in ((old, base), (storage._delta_file(table), delta)):
+        with open(path, "w") as f:
+            f.write(data)
+    storage.repair(table)
+    assert not os.path.exists(old) and not os.path.exists(storage._delta_file(table))
+    assert storage.read_all(table) == [{"id": 1}, {"id": 2}]
+
+
+def test_row_offsets_follow_the_base_generation(storage):
+    table = "offsets_test"
+    for i in range(6):
+        storage.insert(table, {"id": i, "pad": "x" * (10 * i)})
+    assert storage.fetch(table, [4]) == [{"id": 4, "pad": "x" * 40}]
+    storage.write_deltas(table, [(0, None), (2, None)])
+    storage.compact(table)
+    assert storage.fetch_pairs(table, [2, 3]) == [(2, {"id": 4, "pad": "x" * 40}), (3, {"id": 5, "pad": "x" * 50})]
+
+    # A new table under the same name starts again at the first generation;
+    # nothing cached about the dropped files carries over
+    first = storage._table_file(table, 0)
+    storage.drop_table(table)
+    assert first not in fileio._LINE_COUNTS and first not in storage_module._OFFSETS
+    storage.create_table(table, ["id"])
+    for i in range(3):
+        assert storage.insert(table, {"id": 10 + i}) == i
+    assert storage.fetch(table, [1, 2]) == [{"id": 11}, {"id": 12}]
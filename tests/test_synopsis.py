@@ -0,0 +1,72 @@
+import os
+import sys
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms import storage as storage_module
+from rdbms.executor import Executor
+from rdbms.synopsis import Probe, build, may_match, synopsis_file
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(storage_module, "ZONE_ROWS", 4)
+
+def test_zone_maps_and_bloom_filters():
+    s = build([{"id": str(i), "name": f"n{i}", "note": None} for i in range(10, 20)], 0)
+    assert may_match(s, Probe("name", "=", "n15"))
+    assert not may_match(s, Probe("name", "=", "n5"))       # outside the zone
+    assert not may_match(s, Probe("name", "=", "n15x"))     # inside the zone, rejected by the Bloom filter
+    assert not may_match(s, Probe("note", "=", "x"))        # all null
+    assert not may_match(s, Probe("id", "<", "9", numeric=True))
+    assert may_match(s, Probe("id", "<", "11", numeric=True))
+    assert may_match(s, Probe("id", "<", "9"))              # string order: "10" < "9"
+    assert not may_match(s, Probe("id", ">=", "20", numeric=True))
+
+def make_tickets(ex, options=""):
+    assert ex.execute(f"CREATE TABLE tickets (id INTEGER PRIMARY KEY, buyer TEXT, price INTEGER){options};")["ok"]
+    for i in range(16):
+        assert ex.execute(f"INSERT INTO tickets (id, buyer, price) VALUES ({i}, 'b{i}', {i * 10});")["ok"]
+
+@pytest.mark.parametrize("options", ["", " WITH (compression = zlib, block_rows = 4)"])
+def test_select_and_delete_skip_blocks(small_chunks, options):
+    ex = Executor()
+    make_tickets(ex, options)
+
+    res = ex.execute("SELECT * FROM tickets WHERE buyer='b6';", metrics=True)
+    assert res["result"] == [{"id": "6", "buyer": "b6", "price": "60"}]
+    assert res["metrics"]["blocks_skipped"] == 3
+    res = ex.execute("SELECT * FROM tickets WHERE price >= 100;", metrics=True)
+    assert [r["id"] for r in res["result"]] == [str(i) for i in range(10, 16)]
+    assert res["metrics"]["blocks_skipped"] == 2
+
+    # A row updated into a skipped block's value range is still found
+    assert ex.execute("UPDATE tickets SET buyer='moved' WHERE id=1;")["ok"]
+    res = ex.execute("SELECT * FROM tickets WHERE buyer='moved';", metrics=True)
+    assert [r["id"] for r in res["result"]] == ["1"]
+    assert ex.execute("SELECT * FROM tickets WHERE buyer='b1';")["result"] == []
+
+    res = ex.execute("DELETE FROM tickets WHERE price < 20;", metrics=True)
+    assert res["result"] == {"deleted": 2} and res["metrics"]["blocks_skipped"] == 3
+
+    # Compaction rebuilds the synopses
+    ex.execute("VACUUM tickets;")
+    res = ex.execute("SELECT * FROM tickets WHERE buyer='b13';", metrics=True)
+    assert [r["id"] for r in res["result"]] == ["13"] and res["metrics"]["blocks_skipped"] >= 2
+
+def test_synopses_of_an_earlier_base_generation_are_ignored(small_chunks):
+    ex = Executor()
+    make_tickets(ex)
+    path = synopsis_file("tickets")
+    with open(path) as f:
+        stale = f.read()
+    assert ex.execute("DELETE FROM tickets WHERE id < 4;")["result"] == {"deleted": 4}
+    assert ex.execute("VACUUM tickets;")["ok"]
+
+    # A compaction that crashed before writing the new base's synopses: the old
+    # ones would prune the chunk that now holds b6
+    with open(path, "w") as f:
+        f.write(stale)
+    res = ex.execute("SELECT id FROM tickets WHERE buyer='b6';", metrics=True)
+    assert res["result"] == [{"id": "6"}] and res["metrics"]["blocks_skipped"] == 0
+    ex.storage.repair("tickets")
+    assert not os.path.exists(path)
@@ -0,0 +1,148 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rdbms.executor import Executor
+
+JOIN_SQL = ("SELECT orders.id, users.name, events.title FROM orders "
+            "JOIN users ON orders.user_id = users.id "
+            "JOIN events ON orders.event_id = events.id")
+
+def make_shop(ex, users=5, events=3, orders=12):
+    for sql in (
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);",
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT);",
+        "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id) ON DELETE CASCADE, "
+        "event_id INTEGER REFERENCES events(id));",
+    ):
+        assert ex.execute(sql)["ok"]
+    for i in range(users):
+        assert ex.execute(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}');")["ok"]
+    for i in range(events):
+        assert ex.execute(f"INSERT INTO events (id, title) VALUES ({i}, 'e{i}');")["ok"]
+    for i in range(orders):
+        assert ex.execute(f"INSERT INTO orders (id, user_id, event_id) VALUES "
+                          f"({i}, {i % users}, {i % events});")["ok"]
+
+def view_rows(ex, view="order_rows"):
+    res = ex.execute(f"SELECT * FROM {view};")
+    assert res["ok"], res.get("error")
+    return sorted(res["result"], key=lambda r: int(r["id"]))
+
+def join_rows(ex, where=""):
+    res = ex.execute(JOIN_SQL + where + ";")
+    assert res["ok"], res.get("error")
+    rows = [{"id": r["orders.id"], "name": r["users.name"], "title": r["events.title"]} for r in res["result"]]
+    return sorted(rows, key=lambda r: int(r["id"]))
+
+def create_view(ex, where=""):
+    res = ex.execute("CREATE MATERIALIZED VIEW order_rows AS " + JOIN_SQL + where + ";")
+    assert res["ok"], res.get("error")
+    return res["result"]
+
+def test_view_holds_the_join_result():
+    ex = Executor()
+    make_shop(ex)
+    assert create_view(ex) == {"view": "order_rows", "rows": 12}
+    # Lineage columns are kept out of SELECT output
+    assert view_rows(ex) == join_rows(ex)
+    res = ex.execute("SELECT * FROM order_rows WHERE name = 'u1';", metrics=True)
+    assert sorted(r["id"] for r in res["result"]) == ["1", "11", "6"]
+    assert "join_order" not in res["metrics"]["plan"]
+
+def test_writes_to_base_tables_are_applied_incrementally():
+    ex = Executor()
+    ex.vacuum_ratio = 0
+    make_shop(ex)
+    create_view(ex)
+
+    def recompute(view):
+        raise AssertionError("view recomputed instead of maintained")
+    ex._rematerialize = recompute
+    steps = [
+        "INSERT INTO orders (id, user_id, event_id) VALUES (20, 2, 1);",
+        "UPDATE users SET name='renamed' WHERE id=2;",
+        "UPDATE orders SET event_id=0 WHERE id=5;",
+        "DELETE FROM orders WHERE id=0;",
+        "DELETE FROM users WHERE id=1;",  # cascades to its orders
+        "UPDATE events SET title='moved' WHERE id IN (1, 2);",
+    ]
+    for sql in steps:
+        res = ex.execute(sql)
+        assert res["ok"], (sql, res.get("error"))
+        assert view_rows(ex) == join_rows(ex), sql
+
+def test_rows_enter_and_leave_a_filtered_view():
+    ex = Executor()
+    make_shop(ex)
+    create_view(ex, " WHERE events.title = 'e1' AND users.id < 3")
+    want = lambda: join_rows(ex, " WHERE events.title = 'e1' AND users.id < 3")
+    assert [r["id"] for r in view_rows(ex)] == ["1", "7", "10"]
+    for sql in (
+        "UPDATE orders SET event_id=1 WHERE id=0;",
+        "UPDATE orders SET user_id=4 WHERE id=7;",
+        "UPDATE events SET title='e1' WHERE id=2;",
+        "INSERT INTO orders (id, user_id, event_id) VALUES (30, 2, 2);",
+    ):
+        assert ex.execute(sql)["ok"], sql
+        assert view_rows(ex) == want(), sql
+
+def test_vacuum_and_refresh_keep_the_view_correct():
+    ex = Executor()
+    ex.vacuum_ratio = 0
+    make_shop(ex)
+    create_view(ex)
+    assert ex.execute("DELETE FROM orders WHERE id < 6;")["ok"]
+    # Compaction renumbers the orders the view's lineage points at
+    assert ex.execute("VACUUM orders;")["result"] == {"vacuumed": {"orders": 6}}
+    assert view_rows(ex) == join_rows(ex)
+    assert ex.execute("UPDATE orders SET user_id=0 WHERE id=11;")["ok"]
+    assert ex.execute("DELETE FROM orders WHERE id=8;")["ok"]
+    assert view_rows(ex) == join_rows(ex)
+
+    res = ex.execute("REFRESH MATERIALIZED VIEW order_rows;")
+    assert res["result"] == {"refreshed": "order_rows", "rows": 5}
+    assert view_rows(ex) == join_rows(ex)
+
+def test_views_are_read_only_and_pin_their_tables():
+    ex = Executor()
+    make_shop(ex, users=2, events=1, orders=2)
+    create_view(ex)
+    bad = [
+        ("INSERT INTO order_rows (id) VALUES (9);", "materialized view"),
+        ("DELETE FROM order_rows WHERE id=1;", "materialized view"),
+        ("DROP TABLE order_rows;", "DROP MATERIALIZED VIEW"),
+        ("DROP TABLE orders;", "used by materialized view(s): order_rows"),
+        ("REFRESH MATERIALIZED VIEW users;", "not a materialized view"),
+        ("CREATE MATERIALIZED VIEW again AS SELECT * FROM order_rows;", "another materialized view"),
+        ("CREATE MATERIALIZED VIEW clash AS SELECT orders.id, users.id FROM orders "
+         "JOIN users ON orders.user_id = users.id;", None),
+    ]
+    for sql, message in bad:
+        res = ex.execute(sql)
+        if message is None:
+            # Shared column names are qualified rather than rejected
+            assert res["ok"] and ex.execute("SELECT * FROM clash;")["result"][0].keys() == {"orders_id", "users_id"}
+            continue
+        assert not res["ok"] and message in res["error"], (sql, res)
+
+    assert ex.execute("DROP MATERIALIZED VIEW order_rows;")["ok"]
+    assert ex.execute("DROP MATERIALIZED VIEW clash;")["ok"]
+    assert ex.execute("DROP TABLE orders;")["ok"]
+
+def test_single_table_view_and_restart_after_a_crash():
+    ex = Executor()
+    make_shop(ex)
+    assert ex.execute("CREATE MATERIALIZED VIEW early AS SELECT * FROM orders WHERE id < 4;")["ok"]
+    assert ex.execute("SELECT * FROM early WHERE user_id = 1;")["result"] == [
+        {"id": "1", "user_id": "1", "event_id": "1"}]
+    ex.checkpoint()
+    # A crash between the base table append and the view maintenance
+    ex.storage.insert("orders", {"id": "3", "user_id": "0", "event_id": "0"})
+    ex.storage.write_deltas("orders", [(3, None)])
+
+    ex = Executor()
+    assert "orders" in ex.recovery["changed"]
+    rows = ex.execute("SELECT * FROM early;")["result"]
+    assert sorted(r["id"] for r in rows) == ["0", "1", "2", "3"]
+    assert {"id": "3", "user_id": "0", "event_id": "0"} in rows
@@ -1,19 +1,47 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from rdbms.parser import parse
 from rdbms.executor import Executor
+from rdbms.client import ConnectionPool
 
 app = Flask(__name__)
 # Required for flash()
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
 
-executor = Executor()
-
-def run_sql_and_flash(sql, success_msg=None):
-    """Execute SQL AST and flash error or optional success message."""
-    res = executor.execute(parse(sql))
+# MINIRDBMS_SERVER=host:port (or a Unix socket path) shares one warm engine
+# run by `python -m rdbms.server`; otherwise each worker embeds its own.
+SERVER = os.environ.get("MINIRDBMS_SERVER")
+if SERVER:
+    if ":" in SERVER:
+        host, port = SERVER.rsplit(":", 1)
+        pool = ConnectionPool(host=host, port=int(port))
+    else:
+        pool = ConnectionPool(path=SERVER)
+    executor = None
+else:
+    pool = None
+    executor = Executor()
+
+def run_sql(sql, params=None):
+    """Execute one statement locally or on the shared server; `?` placeholders bind `params`."""
+    if pool is not None:
+        return pool.execute(sql, params=params)
+    return executor.execute(sql, params=params)
+
+def select_all(table):
+    res = run_sql(f"SELECT * FROM {table};")
+    return res["result"] if res.get("ok") else []
+
+def select_by_id(table, id):
+    """The row of `table` with primary key `id`, or None (a point lookup on the key index)."""
+    res = run_sql(f"SELECT * FROM {table} WHERE id=?;", [id])
+    rows = res["result"] if res.get("ok") else []
+    return rows[0] if rows else None
+
+def run_sql_and_flash(sql, params=None, success_msg=None):
+    """Execute SQL and flash error or optional success message."""
+    res = run_sql(sql, params)
     if not res.get("ok"):
         flash(res.get("error", "Unknown error"), "error")
         return False
@@ -21,19 +49,40 @@ def run_sql_and_flash(sql, success_msg=None):
         flash(success_msg, "success")
     return True
 
-# Escape helper for all string inputs
-def escape(value):
-    if value is None:
-        return ""
-    return value.replace("'", "''").replace('"', '""')
+# The orders listing joins in user names and event titles; the engine keeps
+# it materialized in `order_rows` as orders, users and events change
+ORDERS_PAGE_SQL = (
+    "SELECT orders.id, users.name, events.title FROM orders "
+    "JOIN users ON orders.user_id = users.id JOIN events ON orders.event_id = events.id;"
+)
+
+def referenced(table, column, id):
+    """True if some row of `table` has `column` = `id`."""
+    res = run_sql(f"SELECT id FROM {table} WHERE {column}=?;", [id])
+    return bool(res.get("ok") and res["result"])
+
+# Databases created before the tables declared REFERENCES keep their old schema
+# (CREATE TABLE leaves an existing table alone), so the routes still check
+# references themselves: point lookups by id, and RESTRICT on delete.
+def missing_reference(user_id=None, event_id=None):
+    """An error message if a selected user or event does not exist, else None."""
+    if user_id is not None and select_by_id("users", user_id) is None:
+        return "Selected user does not exist."
+    if event_id is not None and select_by_id("events", event_id) is None:
+        return "Selected event does not exist."
+    return None
 
 # Ensure demo tables exist
 def init_schema():
     try:
-        executor.execute(parse("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, email TEXT);"))
-        executor.execute(parse("CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, date DATE);"))
-        executor.execute(parse("CREATE TABLE tickets (id INTEGER PRIMARY KEY, event_id INTEGER, buyer_name TEXT, UNIQUE(event_id, buyer_name));"))
-        executor.execute(parse("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, event_id INTEGER, UNIQUE(user_id, event_id));"))
+        run_sql("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT UNIQUE, email TEXT);")
+        run_sql("CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, date DATE);")
+        run_sql("CREATE TABLE tickets (id INTEGER PRIMARY KEY, event_id INTEGER REFERENCES events(id), buyer_name TEXT, UNIQUE(event_id, buyer_name));")
+        run_sql("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id), event_id INTEGER REFERENCES events(id), UNIQUE(user_id, event_id));")
+        run_sql("CREATE MATERIALIZED VIEW order_rows AS " + ORDERS_PAGE_SQL)
+        # Edit pages fetch rows by id: keep the primary keys in on-disk hash indexes
+        for table in ("users", "events", "tickets", "orders"):
+            run_sql(f"CREATE INDEX {table}_by_id ON {table} USING HASH (id);")
 
     except Exception:
         pass
@@ -44,16 +93,22 @@ init_schema()
 def index():
     return render_template("base.html")
 
+@app.route("/metrics")
+def metrics():
+    """Engine statement metrics in Prometheus text format."""
+    text = pool.metrics() if pool is not None else executor.metrics.render_prometheus()
+    return Response(text, mimetype="text/plain; version=0.0.4")
+
 # ---------------- USERS ----------------
 @app.route("/users")
 def users():
-    rows = executor.storage.read_all("users")
+    rows = select_all("users")
     return render_template("users.html", users=rows)
 
 @app.route("/users/add", methods=["POST"])
 def add_user():
     # Read existing rows to compute next id
-    rows = executor.storage.read_all("users")
+    rows = select_all("users")
     max_id = 0
     for r in rows:
         try:
@@ -64,44 +119,45 @@ def add_user():
             continue
     next_id = max_id + 1
 
-    # Escape/sanitize inputs
-    name = escape(request.form.get("name", ""))
-    email = escape(request.form.get("email", ""))
+    name = request.form.get("name", "")
+    email = request.form.get("email", "")
 
-    # Build and execute INSERT using the computed id
-    sql = f"INSERT INTO users (id, name, email) VALUES ({next_id}, '{name}', '{email}');"
-    run_sql_and_flash(sql, success_msg="User created.")
+    # Execute INSERT using the computed id; values are bound, not spliced into the SQL
+    sql = "INSERT INTO users (id, name, email) VALUES (?, ?, ?);"
+    run_sql_and_flash(sql, [next_id, name, email], success_msg="User created.")
     return redirect(url_for("users"))
 
 @app.route("/users/delete/<id>")
 def delete_user(id):
-    run_sql_and_flash(f"DELETE FROM users WHERE id={id};", success_msg="User deleted.")
+    if referenced("orders", "user_id", id):
+        flash("User has orders; delete them first.", "error")
+        return redirect(url_for("users"))
+    run_sql_and_flash("DELETE FROM users WHERE id=?;", [id], success_msg="User deleted.")
     return redirect(url_for("users"))
 
 @app.route("/users/edit/<id>")
 def edit_user(id):
-    rows = executor.storage.read_all("users")
-    user = next((u for u in rows if str(u.get("id")) == str(id)), None)
+    user = select_by_id("users", id)
     return render_template("edit_user.html", user=user)
 
 @app.route("/users/update/<id>", methods=["POST"])
 def update_user(id):
-    name = escape(request.form.get("name", ""))
-    email = escape(request.form.get("email", ""))
-    sql = f"UPDATE users SET name='{name}', email='{email}' WHERE id={id};"
-    run_sql_and_flash(sql, success_msg="User updated.")
+    name = request.form.get("name", "")
+    email = request.form.get("email", "")
+    sql = "UPDATE users SET name=?, email=? WHERE id=?;"
+    run_sql_and_flash(sql, [name, email, id], success_msg="User updated.")
     return redirect(url_for("users"))
 
 # ---------------- EVENTS ----------------
 @app.route("/events")
 def events():
-    rows = executor.storage.read_all("events")
+    rows = select_all("events")
     return render_template("events.html", events=rows)
 
 @app.route("/events/add", methods=["POST"])
 def add_event():
     # Compute next id from existing rows
-    rows = executor.storage.read_all("events")
+    rows = select_all("events")
     max_id = 0
     for r in rows:
         try:
@@ -112,48 +168,49 @@ def add_event():
             continue
     next_id = max_id + 1
 
-    # Sanitize inputs
-    title = escape(request.form.get("title", ""))
-    date = escape(request.form.get("date", ""))
+    title = request.form.get("title", "")
+    date = request.form.get("date", "")
 
-    # Build and execute INSERT with server-assigned id
-    sql = f"INSERT INTO events (id, title, date) VALUES ({next_id}, '{title}', '{date}');"
-    run_sql_and_flash(sql, success_msg="Event created.")
+    # Execute INSERT with server-assigned id
+    sql = "INSERT INTO events (id, title, date) VALUES (?, ?, ?);"
+    run_sql_and_flash(sql, [next_id, title, date], success_msg="Event created.")
     return redirect(url_for("events"))
 
 @app.route("/events/delete/<id>")
 def delete_event(id):
-    run_sql_and_flash(f"DELETE FROM events WHERE id={id};", success_msg="Event deleted.")
+    if referenced("orders", "event_id", id) or referenced("tickets", "event_id", id):
+        flash("Event has orders or tickets; delete them first.", "error")
+        return redirect(url_for("events"))
+    run_sql_and_flash("DELETE FROM events WHERE id=?;", [id], success_msg="Event deleted.")
     return redirect(url_for("events"))
 
 @app.route("/events/edit/<id>")
 def edit_event(id):
-    rows = executor.storage.read_all("events")
-    event = next((e for e in rows if str(e.get("id")) == str(id)), None)
+    event = select_by_id("events", id)
     return render_template("edit_event.html", event=event)
 
 @app.route("/events/update/<id>", methods=["POST"])
 def update_event(id):
-    title = escape(request.form.get("title", ""))
-    date = escape(request.form.get("date", ""))
-    sql = f"UPDATE events SET title='{title}', date='{date}' WHERE id={id};"
-    run_sql_and_flash(sql, success_msg="Event updated.")
+    title = request.form.get("title", "")
+    date = request.form.get("date", "")
+    sql = "UPDATE events SET title=?, date=? WHERE id=?;"
+    run_sql_and_flash(sql, [title, date, id], success_msg="Event updated.")
     return redirect(url_for("events"))
 
 # ---------------- TICKETS ----------------
 # Tickets listing: include users and events so template can render dropdown labels
 @app.route("/tickets")
 def tickets():
-    tickets = executor.storage.read_all("tickets")
-    events = executor.storage.read_all("events")
-    users = executor.storage.read_all("users")
+    tickets = select_all("tickets")
+    events = select_all("events")
+    users = select_all("users")
     return render_template("tickets.html", tickets=tickets, events=events, users=users)
 
 # Add ticket: compute next id server-side and use dropdown values
 @app.route("/tickets/add", methods=["POST"])
 def add_ticket():
     # compute next id
-    rows = executor.storage.read_all("tickets")
+    rows = select_all("tickets")
     max_id = 0
     for r in rows:
         try:
@@ -176,28 +233,32 @@ def add_ticket():
         flash("Invalid event or buyer selection.", "error")
         return redirect(url_for("tickets"))
 
+    error = missing_reference(event_id=event_id_int)
+    if error:
+        flash(error, "error")
+        return redirect(url_for("tickets"))
+
     # By default store buyer_id in buyer_name column (string). If you prefer the buyer's name,
     # look it up from users and store the name instead.
-    buyer_value = escape(str(buyer_id_int))
+    buyer_value = str(buyer_id_int)
 
-    # Build and execute INSERT using server-assigned id
-    sql = f"INSERT INTO tickets (id, event_id, buyer_name) VALUES ({next_id}, {event_id_int}, '{buyer_value}');"
-    run_sql_and_flash(sql, success_msg="Ticket created.")
+    # Execute INSERT using server-assigned id
+    sql = "INSERT INTO tickets (id, event_id, buyer_name) VALUES (?, ?, ?);"
+    run_sql_and_flash(sql, [next_id, event_id_int, buyer_value], success_msg="Ticket created.")
     return redirect(url_for("tickets"))
 
 # Delete unchanged
 @app.route("/tickets/delete/<id>")
 def delete_ticket(id):
-    run_sql_and_flash(f"DELETE FROM tickets WHERE id={id};", success_msg="Ticket deleted.")
+    run_sql_and_flash("DELETE FROM tickets WHERE id=?;", [id], success_msg="Ticket deleted.")
     return redirect(url_for("tickets"))
 
 # Edit: provide events and users so edit form can show dropdowns with current selection
 @app.route("/tickets/edit/<id>")
 def edit_ticket(id):
-    rows = executor.storage.read_all("tickets")
-    ticket = next((t for t in rows if str(t.get("id")) == str(id)), None)
-    events = executor.storage.read_all("events")
-    users = executor.storage.read_all("users")
+    ticket = select_by_id("tickets", id)
+    events = select_all("events")
+    users = select_all("users")
     return render_template("edit_ticket.html", ticket=ticket, events=events, users=users)
 
 # Update: validate dropdown values and apply update
@@ -213,29 +274,34 @@ def update_ticket(id):
         flash("Invalid event or buyer selection.", "error")
         return redirect(url_for("tickets"))
 
+    error = missing_reference(event_id=event_id_int)
+    if error:
+        flash(error, "error")
+        return redirect(url_for("tickets"))
+
     # If you want to store buyer name instead of buyer id, look up the user and use their name:
-    # users = executor.storage.read_all("users")
+    # users = select_all("users")
     # buyer_row = next((u for u in users if str(u.get("id")) == str(buyer_id_int)), None)
-    # buyer_value = escape(buyer_row.get("name")) if buyer_row else escape(str(buyer_id_int))
-    buyer_value = escape(str(buyer_id_int))
+    # buyer_value = buyer_row.get("name") if buyer_row else str(buyer_id_int)
+    buyer_value = str(buyer_id_int)
 
-    sql = f"UPDATE tickets SET event_id={event_id_int}, buyer_name='{buyer_value}' WHERE id={id};"
-    run_sql_and_flash(sql, success_msg="Ticket updated.")
+    sql = "UPDATE tickets SET event_id=?, buyer_name=? WHERE id=?;"
+    run_sql_and_flash(sql, [event_id_int, buyer_value, id], success_msg="Ticket updated.")
     return redirect(url_for("tickets"))
 
-# Orders listing: include users and events for dropdowns and joined display
+# Orders listing: rows come from the order_rows view; users and events fill the dropdowns
 @app.route("/orders")
 def orders():
-    orders = executor.storage.read_all("orders")
-    events = executor.storage.read_all("events")
-    users = executor.storage.read_all("users")
+    orders = select_all("order_rows")
+    events = select_all("events")
+    users = select_all("users")
     return render_template("orders.html", orders=orders, events=events, users=users)
 
 # Add order: compute next id server-side and validate foreign keys
 @app.route("/orders/add", methods=["POST"])
 def add_order():
     # compute next id
-    rows = executor.storage.read_all("orders")
+    rows = select_all("orders")
     max_id = 0
     for r in rows:
         try:
@@ -255,33 +321,27 @@ def add_order():
         flash("Invalid user or event selection.", "error")
         return redirect(url_for("orders"))
 
-    # FK existence checks
-    users = executor.storage.read_all("users")
-    events = executor.storage.read_all("events")
-    if not any(str(u.get("id")) == str(user_id_int) for u in users):
-        flash("Selected user does not exist.", "error")
-        return redirect(url_for("orders"))
-    if not any(str(e.get("id")) == str(event_id_int) for e in events):
-        flash("Selected event does not exist.", "error")
+    error = missing_reference(user_id_int, event_id_int)
+    if error:
+        flash(error, "error")
         return redirect(url_for("orders"))
 
-    sql = f"INSERT INTO orders (id, user_id, event_id) VALUES ({next_id}, {user_id_int}, {event_id_int});"
-    run_sql_and_flash(sql, success_msg="Order created.")
+    sql = "INSERT INTO orders (id, user_id, event_id) VALUES (?, ?, ?);"
+    run_sql_and_flash(sql, [next_id, user_id_int, event_id_int], success_msg="Order created.")
     return redirect(url_for("orders"))
 
 # Delete order
 @app.route("/orders/delete/<id>")
 def delete_order(id):
-    run_sql_and_flash(f"DELETE FROM orders WHERE id={id};", success_msg="Order deleted.")
+    run_sql_and_flash("DELETE FROM orders WHERE id=?;", [id], success_msg="Order deleted.")
     return redirect(url_for("orders"))
 
 # Edit order: provide events and users for dropdowns
 @app.route("/orders/edit/<id>")
 def edit_order(id):
-    rows = executor.storage.read_all("orders")
-    order = next((o for o in rows if str(o.get("id")) == str(id)), None)
-    events = executor.storage.read_all("events")
-    users = executor.storage.read_all("users")
+    order = select_by_id("orders", id)
+    events = select_all("events")
+    users = select_all("users")
     return render_template("edit_order.html", order=order, events=events, users=users)
 
 # Update order
@@ -296,18 +356,13 @@ def update_order(id):
         flash("Invalid user or event selection.", "error")
         return redirect(url_for("orders"))
 
-    # Optional FK checks as above
-    users = executor.storage.read_all("users")
-    events = executor.storage.read_all("events")
-    if not any(str(u.get("id")) == str(user_id_int) for u in users):
-        flash("Selected user does not exist.", "error")
-        return redirect(url_for("orders"))
-    if not any(str(e.get("id")) == str(event_id_int) for e in events):
-        flash("Selected event does not exist.", "error")
+    error = missing_reference(user_id_int, event_id_int)
+    if error:
+        flash(error, "error")
         return redirect(url_for("orders"))
 
-    sql = f"UPDATE orders SET user_id={user_id_int}, event_id={event_id_int} WHERE id={id};"
-    run_sql_and_flash(sql, success_msg="Order updated.")
+    sql = "UPDATE orders SET user_id=?, event_id=? WHERE id=?;"
+    run_sql_and_flash(sql, [user_id_int, event_id_int, id], success_msg="Order updated.")
     return redirect(url_for("orders"))
 
 if __name__ == "__main__":